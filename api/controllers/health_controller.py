@@ -8,7 +8,7 @@ import psutil
 import platform
 
 from .base_controller import BaseController
-from config.settings import APP_VERSION
+from config.settings import APP_VERSION, MODEL_CONFIG
 
 
 class HealthController(BaseController):
@@ -29,13 +29,17 @@ class HealthController(BaseController):
         }
 
     async def check_ready(self) -> Dict[str, Any]:
-        """Readiness probe -- checks critical dependencies."""
+        """Readiness probe -- checks critical dependencies, including
+        startup model warmup when it is configured."""
         checks: Dict[str, str] = {}
         try:
             from config.database import test_connection
             checks["database"] = "ok" if test_connection() else "fail"
         except Exception:
             checks["database"] = "fail"
+        if MODEL_CONFIG.get("warmup"):
+            from api.dependencies import models_status
+            checks["models"] = models_status()
 
         all_ok = all(v == "ok" for v in checks.values())
         return {
@@ -35,7 +35,8 @@ class SearchController(BaseController):
         query: str,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 10,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        quality: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute text-to-image search
@@ -45,6 +46,7 @@ class SearchController(BaseController):
             filters: Optional metadata filters
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score
+            quality: Optional recall level (fast, balanced, precise)
             
         Returns:
             Search results dictionary
@@ -58,7 +60,8 @@ class SearchController(BaseController):
             results = self._search_engine.text_to_image_search(
                 query=query,
                 filters=filters,
-                limit=limit
+                limit=limit,
+                quality=quality
             )
             
             filtered_results = [
@@ -86,7 +89,8 @@ class SearchController(BaseController):
         image_path: str,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 10,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        quality: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute image-to-image search
@@ -96,6 +100,7 @@ class SearchController(BaseController):
             filters: Optional metadata filters
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score
+            quality: Optional recall level (fast, balanced, precise)
             
         Returns:
             Search results dictionary
@@ -109,7 +114,8 @@ class SearchController(BaseController):
             results = self._search_engine.image_to_image_search(
                 image_path=image_path,
                 filters=filters,
-                limit=limit
+                limit=limit,
+                quality=quality
             )
             
             filtered_results = [
@@ -137,7 +143,8 @@ class SearchController(BaseController):
         query: Optional[str] = None,
         image_path: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
-        limit: int = 10
+        limit: int = 10,
+        quality: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute hybrid search (text + image)
@@ -147,6 +154,7 @@ class SearchController(BaseController):
             image_path: Optional image path
             filters: Optional metadata filters
             limit: Maximum number of results
+            quality: Optional recall level (fast, balanced, precise)
             
         Returns:
             Search results dictionary
@@ -163,7 +171,8 @@ class SearchController(BaseController):
                 query=query,
                 image_path=image_path,
                 filters=filters,
-                limit=limit
+                limit=limit,
+                quality=quality
             )
             
             execution_time = time.time() - start_time
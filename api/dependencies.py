@@ -2,28 +2,40 @@
 Dependency Injection for FastAPI
 Thread-safe singleton instances for controllers and services.
 """
+import logging
 import threading
-from typing import Optional
+from typing import Optional, Sequence
 
-from core.vector_db import BaseVectorDB, create_vector_db
+from core.vector_db import BaseVectorDB, WriterLockedError, create_vector_db
 from core.search_engine import SearchEngine
 from core.query_processor import QueryProcessor
 
-_lock = threading.Lock()
+# Reentrant: get_search_engine builds the vector database while holding it.
+_lock = threading.RLock()
 _vector_db_instance: Optional[BaseVectorDB] = None
 _search_engine_instance: Optional[SearchEngine] = None
 _query_processor_instance: Optional[QueryProcessor] = None
+_models_ready = threading.Event()
+_warmup_error: Optional[str] = None
+
+logger = logging.getLogger(__name__)
 
 
 def get_vector_db() -> BaseVectorDB:
     """Returns the singleton vector database instance, creating it
-    lazily with double-checked locking on first access.
+    lazily with double-checked locking on first access. With several
+    API worker processes the first to open the collection is its single
+    writer; the others serve its last checkpoint read-only.
     """
     global _vector_db_instance
     if _vector_db_instance is None:
         with _lock:
             if _vector_db_instance is None:
-                _vector_db_instance = create_vector_db()
+                try:
+                    _vector_db_instance = create_vector_db()
+                except WriterLockedError as e:
+                    logger.warning(f"{e}; serving the last checkpoint read-only")
+                    _vector_db_instance = create_vector_db(read_only=True)
     return _vector_db_instance
 
 
@@ -51,10 +63,37 @@ def get_query_processor() -> QueryProcessor:
     return _query_processor_instance
 
 
+def warm_up_models(models: Sequence[str]) -> None:
+    """Loads the named embedding models on the shared search engine so the
+    first search does not pay for them; failures are recorded, not raised.
+    """
+    global _warmup_error
+    try:
+        get_search_engine().embedding_manager.warmup(models)
+        logger.info("Embedding models warmed up: %s", ", ".join(models))
+    except Exception as e:
+        _warmup_error = str(e)
+        logger.error(f"Model warmup failed: {e}")
+    finally:
+        _models_ready.set()
+
+
+def models_status() -> str:
+    """Returns "ok" once warmup has finished, "fail" if it raised, and
+    "loading" while it is still running.
+    """
+    if not _models_ready.is_set():
+        return "loading"
+    return "fail" if _warmup_error else "ok"
+
+
 def reset_instances() -> None:
     """Reset all singletons (useful for testing)."""
     global _vector_db_instance, _search_engine_instance, _query_processor_instance
+    global _warmup_error
     with _lock:
+        _models_ready.clear()
+        _warmup_error = None
         _vector_db_instance = None
         _search_engine_instance = None
         _query_processor_instance = None
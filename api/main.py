@@ -1,6 +1,7 @@
 """
 FastAPI Application with MVC Architecture
 """
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,7 +14,8 @@ from api.middleware import (
     setup_rate_limiter,
     setup_request_id_middleware,
 )
-from config.settings import API_CONFIG, APP_VERSION
+from api.dependencies import warm_up_models
+from config.settings import API_CONFIG, APP_VERSION, MODEL_CONFIG
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,12 +27,18 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manages the application lifespan by logging startup and shutdown
-    events for the RAG Image Search API.
+    events for the RAG Image Search API. Configured models are warmed up on
+    a background thread so the server starts answering immediately.
     """
     logger.info("=" * 60)
     logger.info("RAG Image Search API Starting...")
     logger.info("Version: %s", APP_VERSION)
     logger.info("=" * 60)
+    if MODEL_CONFIG.get("warmup"):
+        threading.Thread(
+            target=warm_up_models, args=(MODEL_CONFIG["warmup"],),
+            name="model-warmup", daemon=True,
+        ).start()
     yield
     logger.info("RAG Image Search API shutting down...")
 
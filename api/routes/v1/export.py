@@ -18,12 +18,16 @@ async def export_results(
     query: str = Query(..., description="Search query"),
     format: str = Query("json", description="Export format (json, csv)"),
     limit: int = Query(100, gt=0, le=1000, description="Maximum results"),
+    quality: str = Query(
+        "precise", pattern="^(fast|balanced|precise)$", description="Search recall level"
+    ),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Export search results (requires authentication)"""
+    """Export search results (requires authentication). Exports default to
+    the precise quality level, trading latency for recall."""
     try:
         search_engine = get_search_engine()
-        results = search_engine.text_to_image_search(query, limit=limit)
+        results = search_engine.text_to_image_search(query, limit=limit, quality=quality)
 
         if format == "csv":
             import pandas as pd
@@ -43,6 +43,7 @@ async def text_search(
             filters=body.filters,
             limit=body.limit,
             similarity_threshold=body.similarity_threshold,
+            quality=body.quality,
         )
         return {"success": True, "data": result}
     except Exception as e:
@@ -66,6 +67,7 @@ async def image_search(
             filters=body.filters,
             limit=body.limit,
             similarity_threshold=body.similarity_threshold,
+            quality=body.quality,
         )
         return {"success": True, "data": result}
     except Exception as e:
@@ -89,6 +91,7 @@ async def hybrid_search(
             image_path=body.image_path,
             filters=body.filters,
             limit=body.limit,
+            quality=body.quality,
         )
         return {"success": True, "data": result}
     except Exception as e:
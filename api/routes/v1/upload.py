@@ -9,6 +9,7 @@ import shutil
 
 from api.security.jwt_handler import get_current_active_user, User
 from config.settings import API_CONFIG
+from core.utils import content_digest, file_digests
 
 router = APIRouter()
 
@@ -21,7 +22,9 @@ async def upload_image(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Upload an image for search (requires authentication)"""
+    """Upload an image for search (requires authentication). The returned
+    digest identifies the image's contents; embeddings are cached by it, so
+    searching with a re-upload of a known image skips the model."""
     try:
         if not file.content_type or not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
@@ -36,10 +39,12 @@ async def upload_image(
 
         with open(upload_path, "wb") as buffer:
             buffer.write(contents)
+        digest = file_digests.remember(str(upload_path), content_digest(contents))
 
         return {
             "filename": unique_filename,
             "path": str(upload_path),
+            "digest": digest,
             "size": len(contents),
             "content_type": file.content_type
         }
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -7,3 +7,6 @@ class HybridSearchRequest(BaseModel):
     image_path: Optional[str] = Field(None, description="Path to reference image")
     filters: Optional[Dict[str, Any]] = Field(None, description="Metadata filters")
     limit: int = Field(10, gt=0, le=100, description="Maximum number of results")
+    quality: Optional[Literal["fast", "balanced", "precise"]] = Field(
+        None, description="Recall level to search at; higher is slower"
+    )
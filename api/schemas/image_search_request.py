@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -6,4 +6,7 @@ class ImageSearchRequest(BaseModel):
     image_path: str = Field(..., description="Path to reference image")
     filters: Optional[Dict[str, Any]] = Field(None, description="Metadata filters")
     limit: int = Field(10, gt=0, le=100, description="Maximum number of results")
+    quality: Optional[Literal["fast", "balanced", "precise"]] = Field(
+        None, description="Recall level to search at; higher is slower"
+    )
     similarity_threshold: float = Field(0.7, ge=0.0, le=1.0, description="Minimum similarity score")
@@ -32,14 +32,73 @@ DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 # Vector database settings
 VECTOR_DB_CONFIG = {
     "faiss": {
-        "index_type": "IVFFlat",
-        "nlist": 1000,
+        # "auto" picks Flat / IVF / HNSW by collection size; any FAISS factory
+        # string (optionally with an {nlist} placeholder) pins the index type.
+        "index_type": "auto",
+        # "cosine" indexes unit-normalized vectors by inner product so scores
+        # are cosine similarities comparable with Chroma; "l2" scores 1 / (1 + d).
+        "metric": "cosine",
+        "flat_threshold": 10_000,
+        "large_threshold": 1_000_000,
+        "large_index": "hnsw",
+        "hnsw_m": 32,
+        "pq_m": 64,
+        "pq_nbits": 8,
+        # None keeps full vectors in the index; "sq8" (4x) or "pq" (pq_m *
+        # pq_nbits bits per vector) keep only codes in RAM and re-rank rerank_factor * k
+        # candidates against the memory-mapped raw vectors.
+        "compression": None,
+        "rerank_factor": 4,
+        "train_points_per_list": 64,
+        "regrow_factor": 4,
+        # Newly added rows are searched exactly from the raw vectors until this
+        # many accumulate, then folded into the index (a copy of it while
+        # searches hold the current one). Outgrown indexes are rebuilt on a
+        # background thread and swapped in once caught up to this many rows.
+        "delta_max_rows": 10_000,
         "nprobe": 10,
-        "dimension": 512
+        "ef_search": 64,
+        # Searches take an optional quality level, each a recall@k target.
+        # tune_search measures recall against exact search and stores the
+        # smallest nprobe / efSearch meeting each target; untuned indexes
+        # scale the nprobe and ef_search defaults above instead.
+        "quality": {"fast": 0.80, "balanced": 0.95, "precise": 0.99},
+        "default_quality": "balanced",
+        "dimension": 512,
+        # Serving workers can open the last checkpoint read-only: the index and
+        # metadata are memory-mapped and shared through the OS page cache, and
+        # prefault reads them once at startup so first queries are not cold.
+        # Only one process may open a collection for writing; API workers
+        # that find it taken fall back to read-only on their own.
+        "read_only": os.getenv("FAISS_READ_ONLY", "false").lower() == "true",
+        "prefault": os.getenv("FAISS_PREFAULT", "false").lower() == "true",
+        # "sync" makes each mutation durable before returning; "interval=N"
+        # (seconds) and "every=N" (mutations) checkpoint on a background thread.
+        "durability": "interval=30",
+        "persistence": "segments",
+        "segment_max_bytes": 64 * 1024 * 1024,
+        "merge_after_segments": 4
+    },
+    "sharded": {
+        # Shards are independent FAISS collections named {collection}_shardNN;
+        # "hash" spreads vectors by vector_id, "brand" co-locates each brand so
+        # brand-filtered queries only visit the shards that own it.
+        "num_shards": 4,
+        "shard_by": "hash",
+        "max_workers": None
     },
     "chroma": {
         "collection_name": "shoe_images",
-        "distance_metric": "cosine"
+        "distance_metric": "cosine",
+        # Persistent clients keep collections on disk under vector_db/chroma_db
+        # and reopen them warm; False uses a throwaway in-memory client.
+        "persistent": os.getenv("CHROMA_PERSISTENT", "true").lower() == "true",
+        # Fields fetched per search result; ["distances"] returns only IDs and
+        # scores. Documents are never fetched.
+        "include": ["metadatas", "distances"],
+        # Upserts are split into chunks of at most this many vectors (None
+        # uses the client's own limit, which is also the cap).
+        "max_batch_size": 5000
     }
 }
 
@@ -47,21 +106,50 @@ VECTOR_DB_CONFIG = {
 CUDA_AVAILABLE = os.getenv("CUDA_AVAILABLE", "false").lower() == "true"
 _device = "cuda" if CUDA_AVAILABLE else "cpu"
 
+# Loaded models are shared process-wide, keyed by (model_name, device, precision).
+# Models load on first use; MODEL_WARMUP (e.g. "clip,sentence_transformer")
+# names models the API loads in the background at startup instead.
+# Each model runs on a backend ("torch", "torchscript", or "onnx"; the text
+# model supports torch and onnx) at a precision ("fp32", or CPU-only "int8"
+# dynamic quantization). Non-eager variants are exported once into
+# inference.cache_dir and used only if their outputs keep min_cosine
+# similarity with eager fp32 on a probe input.
+_backend = os.getenv("MODEL_BACKEND", "torch")
+_precision = os.getenv("MODEL_PRECISION", "fp32")
+
 MODEL_CONFIG = {
+    "warmup": [m.strip() for m in os.getenv("MODEL_WARMUP", "").split(",") if m.strip()],
     "clip": {
         "model_name": "ViT-B/32",
         "device": _device,
+        "backend": _backend,
+        "precision": _precision,
         "batch_size": 32,
         "dimension": 512
     },
     "sentence_transformer": {
         "model_name": "all-MiniLM-L6-v2",
-        "device": "cpu"
+        "device": "cpu",
+        "backend": _backend,
+        "precision": _precision
     },
     "resnet": {
         "model_name": "resnet50",
         "pretrained": True,
-        "device": _device
+        "device": _device,
+        "backend": _backend,
+        "precision": _precision
+    },
+    "inference": {
+        "cache_dir": CACHE_DIR / "models",
+        "min_cosine": 0.99,
+        "onnx_threads": None
+    },
+    # Images are decoded and preprocessed on decode_workers threads, at most
+    # prefetch_batches batches ahead of the model (1 worker decodes inline).
+    "image_pipeline": {
+        "decode_workers": min(8, os.cpu_count() or 1),
+        "prefetch_batches": 2
     }
 }
 
@@ -147,8 +235,16 @@ ANALYTICS_CONFIG = {
 # Cache settings
 CACHE_CONFIG = {
     "redis_url": os.getenv("REDIS_URL", "redis://localhost:6379/0"),
-    "memory_cache_size": 1000,
-    "default_ttl": 3600
+    # In-memory LRU of query embeddings in front of the embedding cache.
+    "memory_cache_size": 10_000,
+    "default_ttl": 3600,
+    # Computed embeddings live in one SQLite file (WAL mode); least recently
+    # used entries are evicted past either bound (None disables it).
+    "embeddings": {
+        "path": CACHE_DIR / "embeddings.sqlite3",
+        "max_entries": 2_000_000,
+        "max_bytes": 8 * 1024 ** 3
+    }
 }
 
 # Export settings
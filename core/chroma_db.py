@@ -1,7 +1,9 @@
 """ChromaDB-backed vector database implementation."""
+import hashlib
+import json
 import logging
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 
 import chromadb
 from chromadb.config import Settings
@@ -16,75 +18,175 @@ class ChromaVectorDB(BaseVectorDB):
     """ChromaDB-backed vector database."""
 
     def __init__(self, dimension: int, collection_name: str = "shoe_images"):
-        """Initializes the ChromaDB client and ensures the target collection exists."""
+        """Initializes the ChromaDB client and ensures the target collection
+        exists. With ``persistent`` set the client stores collections on disk
+        under the vector DB directory, so a restart reopens the existing
+        index instead of rebuilding it; otherwise the client is in-memory."""
         super().__init__(dimension, collection_name)
-        self._client = chromadb.Client(
-            Settings(persist_directory=str(VECTOR_DB_DIR / "chroma_db"))
-        )
+        config = VECTOR_DB_CONFIG["chroma"]
+        settings = Settings(anonymized_telemetry=False)
+        self._persistent = config.get("persistent", True)
+        if self._persistent:
+            self._client = chromadb.PersistentClient(
+                path=str(VECTOR_DB_DIR / "chroma_db"), settings=settings
+            )
+        else:
+            self._client = chromadb.EphemeralClient(settings=settings)
         self._ensure_collection()
 
     def _ensure_collection(self) -> None:
         """Retrieves an existing ChromaDB collection or creates a new one
         if it does not already exist."""
-        try:
-            self.collection = self._client.get_collection(self._collection_name)
-        except ValueError:
-            self.collection = self._client.create_collection(
-                name=self._collection_name,
-                metadata={"hnsw:space": VECTOR_DB_CONFIG["chroma"]["distance_metric"]},
-            )
+        self.collection = self._client.get_or_create_collection(
+            name=self._collection_name,
+            metadata={"hnsw:space": VECTOR_DB_CONFIG["chroma"]["distance_metric"]},
+        )
 
     def add_vectors(
         self, vectors: np.ndarray, metadata: List[Dict[str, Any]],
         ids: Optional[List[str]] = None,
     ) -> None:
-        """Adds embedding vectors along with their metadata and optional IDs
-        to the ChromaDB collection."""
+        """Upserts embedding vectors with their metadata in chunks no larger
+        than the client's maximum batch size, passing float32 arrays straight
+        through. Missing IDs are derived from each vector together with its
+        metadata, so identical images stored under different paths stay
+        separate while re-importing the same records is idempotent. An ID
+        repeated within a chunk keeps its last row, as a sequence of upserts
+        would."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self._dimension)
         if ids is None:
-            ids = [f"item_{i}" for i in range(len(vectors))]
-        self.collection.add(embeddings=vectors.tolist(), metadatas=metadata, ids=ids)
+            ids = [self.content_id(v, m) for v, m in zip(vectors, metadata)]
+        step = self._batch_size()
+        for start in range(0, len(vectors), step):
+            last = {vid: start + i for i, vid in enumerate(ids[start:start + step])}
+            rows = sorted(last.values())
+            self.collection.upsert(
+                ids=[ids[r] for r in rows],
+                embeddings=vectors[rows],
+                metadatas=[self._chroma_metadata(metadata[r]) for r in rows],
+            )
+
+    def add_stream(
+        self, batches: Iterable[Tuple[np.ndarray, List[Dict[str, Any]]]]
+    ) -> int:
+        """Bulk-loads (vectors, metadata) batches from an iterator one batch
+        at a time, so only a single batch is held in memory, and returns the
+        number of vectors written."""
+        total = 0
+        for vectors, metadata in batches:
+            self.add_vectors(vectors, metadata)
+            total += len(vectors)
+        return total
+
+    @staticmethod
+    def content_id(vector: np.ndarray, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Returns a stable ID derived from a vector's float32 bytes and its
+        metadata in canonical JSON form."""
+        digest = hashlib.blake2b(
+            np.ascontiguousarray(vector, dtype=np.float32).tobytes(), digest_size=8
+        )
+        digest.update(json.dumps(metadata or {}, sort_keys=True, default=str).encode("utf-8"))
+        return f"item_{digest.hexdigest()}"
+
+    def _batch_size(self) -> int:
+        """Returns the configured upsert chunk size, capped at the largest
+        batch the Chroma client accepts."""
+        limit = self._client.get_max_batch_size()
+        configured = VECTOR_DB_CONFIG["chroma"].get("max_batch_size")
+        return min(configured, limit) if configured else limit
+
+    @staticmethod
+    def _chroma_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Drops None values, which Chroma rejects, and maps an empty result
+        to None since Chroma also rejects empty metadata dicts."""
+        cleaned = {k: v for k, v in (metadata or {}).items() if v is not None}
+        return cleaned or None
 
     def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
         """Updates the metadata associated with a specific vector ID
         in the ChromaDB collection."""
         self.collection.update(ids=[vector_id], metadatas=[metadata])
 
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Updates metadata for many vector IDs in a single ChromaDB call."""
+        if updates:
+            self.collection.update(ids=list(updates), metadatas=list(updates.values()))
+
     def delete_vector(self, vector_id: str) -> None:
         """Removes a vector entry from the ChromaDB collection by its ID."""
         self.collection.delete(ids=[vector_id])
 
+    def delete_many(self, vector_ids: List[str]) -> None:
+        """Removes many vector entries from the ChromaDB collection in one call."""
+        if vector_ids:
+            self.collection.delete(ids=list(vector_ids))
+
     def search(
         self, query_vector: np.ndarray, k: int = 10,
-        filters: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+        include: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         """Queries the ChromaDB collection for the top-k nearest vectors,
         optionally applying metadata filters, and returns ranked results."""
+        return self.search_batch(
+            query_vector.reshape(1, -1), k, filters, quality, include
+        )[0]
+
+    def search_batch(
+        self, query_matrix: np.ndarray, k: int = 10,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+        include: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Queries the ChromaDB collection with every row of query_matrix in
+        a single call and returns one ranked result list per row. include
+        projects the fields Chroma returns: distances are always fetched for
+        scoring, and passing ["distances"] alone yields only IDs and scores.
+        Documents are never fetched. quality is accepted for interface parity
+        but ignored: Chroma fixes its HNSW search breadth per collection."""
+        if len(query_matrix) == 0:
+            return []
+        fields = self._projection(include)
         where_clause: Dict[str, Any] = {}
         if filters:
             for key, value in filters.items():
                 where_clause[key] = {"$in": value} if isinstance(value, list) else value
         results = self.collection.query(
-            query_embeddings=[query_vector.tolist()],
+            query_embeddings=np.ascontiguousarray(query_matrix, dtype=np.float32).reshape(
+                -1, self._dimension
+            ),
             n_results=k,
             where=where_clause if where_clause else None,
+            include=fields,
         )
-        formatted: List[Dict[str, Any]] = []
-        for rank, (vid, dist, meta) in enumerate(
-            zip(results["ids"][0], results["distances"][0], results["metadatas"][0])
-        ):
-            entry = meta.copy()
-            entry["vector_id"] = vid
-            entry["similarity_score"] = 1.0 - dist
-            entry["rank"] = rank + 1
-            formatted.append(entry)
-        return formatted
+        metadatas = results.get("metadatas") or [[None] * len(ids) for ids in results["ids"]]
+        batches: List[List[Dict[str, Any]]] = []
+        for ids, distances, metas in zip(results["ids"], results["distances"], metadatas):
+            formatted: List[Dict[str, Any]] = []
+            for rank, (vid, dist, meta) in enumerate(zip(ids, distances, metas)):
+                entry = dict(meta or {})
+                entry["vector_id"] = vid
+                entry["similarity_score"] = 1.0 - dist
+                entry["rank"] = rank + 1
+                formatted.append(entry)
+            batches.append(formatted)
+        return batches
+
+    @staticmethod
+    def _projection(include: Optional[List[str]]) -> List[str]:
+        """Returns the Chroma include list for a search, defaulting to the
+        configured projection and always adding distances."""
+        fields = list(include or VECTOR_DB_CONFIG["chroma"].get("include", ["metadatas"]))
+        unknown = set(fields) - {"metadatas", "distances"}
+        if unknown:
+            raise ValueError(f"Unsupported Chroma include fields: {sorted(unknown)}")
+        return fields if "distances" in fields else fields + ["distances"]
 
     def get_vector_by_id(self, vector_id: str) -> Optional[np.ndarray]:
         """Retrieves the raw embedding vector for a given ID, or returns None
         if the ID does not exist in the collection."""
-        result = self.collection.get(ids=[vector_id])
-        if result["embeddings"]:
-            return np.array(result["embeddings"][0])
+        result = self.collection.get(ids=[vector_id], include=["embeddings"])
+        if len(result["ids"]):
+            return np.asarray(result["embeddings"][0], dtype=np.float32)
         return None
 
     def get_stats(self) -> Dict[str, Any]:
@@ -94,6 +196,7 @@ class ChromaVectorDB(BaseVectorDB):
             "backend": "chroma",
             "total_vectors": self.collection.count(),
             "collection_name": self._collection_name,
+            "persistent": self._persistent,
         }
 
     def rebuild_index(self) -> None:
@@ -104,7 +207,4 @@ class ChromaVectorDB(BaseVectorDB):
         """Deletes the current collection and recreates an empty one
         with the same name and distance metric configuration."""
         self._client.delete_collection(self._collection_name)
-        self.collection = self._client.create_collection(
-            name=self._collection_name,
-            metadata={"hnsw:space": VECTOR_DB_CONFIG["chroma"]["distance_metric"]},
-        )
+        self._ensure_collection()
@@ -0,0 +1,86 @@
+"""Bounded-prefetch image decode pipeline feeding batched model inference."""
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DecodePipeline:
+    """Decodes and preprocesses images on a pool of worker threads while the
+    caller runs the model. At most ``prefetch_batches`` batches are decoded
+    ahead of the consumer, bounding memory regardless of input size. PIL
+    decoding and the tensor transforms release the GIL, so threads overlap
+    on separate cores and hand tensors over without copying."""
+
+    def __init__(
+        self, load: Callable[[str], Any], workers: int = 4, prefetch_batches: int = 2
+    ):
+        """Stores the per-image load function and the pool and queue sizes."""
+        self._load = load
+        self._workers = max(1, workers)
+        self._prefetch_batches = max(1, prefetch_batches)
+
+    def batches(
+        self, paths: Sequence[str], batch_size: int
+    ) -> Iterator[Tuple[List[int], List[Any]]]:
+        """Yields (rows, items) batches of successfully loaded images in input
+        order, where rows are the positions of the items in paths. Images that
+        fail to load are logged and skipped, so every batch but the last is
+        full."""
+        if self._workers == 1:
+            serial = ((row, self._call(path)) for row, path in enumerate(paths))
+            yield from self._collect(serial, paths, batch_size)
+            return
+        pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="decode")
+        try:
+            yield from self._collect(self._prefetch(pool, paths, batch_size), paths, batch_size)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _prefetch(
+        self, pool: ThreadPoolExecutor, paths: Sequence[str], batch_size: int
+    ) -> Iterator[Tuple[int, Any]]:
+        """Keeps a bounded window of decode jobs in flight, yielding each
+        (row, outcome) in input order as it completes."""
+        window = self._prefetch_batches * batch_size
+        pending: Deque = deque()
+        upcoming = iter(enumerate(paths))
+        while True:
+            while len(pending) < window:
+                nxt = next(upcoming, None)
+                if nxt is None:
+                    break
+                pending.append((nxt[0], pool.submit(self._call, nxt[1])))
+            if not pending:
+                return
+            row, future = pending.popleft()
+            yield row, future.result()
+
+    def _call(self, path: str) -> Tuple[bool, Any]:
+        """Loads one image, capturing failures instead of raising them."""
+        try:
+            return True, self._load(path)
+        except Exception as e:
+            return False, e
+
+    @staticmethod
+    def _collect(
+        outcomes: Iterator[Tuple[int, Tuple[bool, Any]]], paths: Sequence[str],
+        batch_size: int,
+    ) -> Iterator[Tuple[List[int], List[Any]]]:
+        """Groups successful loads into batches of batch_size."""
+        rows: List[int] = []
+        items: List[Any] = []
+        for row, (ok, value) in outcomes:
+            if not ok:
+                logger.error(f"Failed to load image {paths[row]}: {value}")
+                continue
+            rows.append(row)
+            items.append(value)
+            if len(items) == batch_size:
+                yield rows, items
+                rows, items = [], []
+        if items:
+            yield rows, items
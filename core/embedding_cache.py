@@ -0,0 +1,272 @@
+"""Single-file embedding cache backed by SQLite."""
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keys per statement, below SQLite's default bound-parameter limit.
+_CHUNK = 500
+# Cache hits are recorded in memory and written back in one statement once
+# this many accumulate, so lookups never write to the database.
+_TOUCH_BATCH = 1024
+# Eviction trims the cache to this fraction of its bounds, so it runs rarely.
+_LOW_WATER = 0.9
+
+
+class EmbeddingCache:
+    """Packed float32 embedding store, keyed by string. Vectors are BLOB rows
+    in one SQLite database in WAL mode, so a hit is a single primary-key
+    lookup, readers never block the writer, and the cache is copied as one
+    file after compact(). Entries beyond max_entries or max_bytes are
+    evicted least recently used first. Entry and byte totals live in the
+    database and writes run in immediate transactions, so the bounds hold
+    across every process sharing the file."""
+
+    def __init__(
+        self, path: str, max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """Opens (creating if needed) the cache database at path."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._touched: Dict[str, int] = {}
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings(accessed)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS totals ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+        )
+        with self._write():
+            self._conn.execute(
+                "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), "
+                "COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            )
+        self._clock = 0
+        self._sync_clock()
+
+    def __len__(self) -> int:
+        """Returns the number of cached embeddings."""
+        with self._lock:
+            return self._totals()[0]
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns the cached embedding for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch([key])
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached embeddings for whichever of keys are present."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start:start + _CHUNK]
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(chunk))})", chunk,
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).copy()
+            self._touch(found)
+        return found
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Stores one embedding, replacing any existing entry for key."""
+        self.put_many({key: vector})
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Stores many embeddings in one transaction, then evicts least
+        recently used entries if the cache has outgrown its bounds."""
+        if not items:
+            return
+        with self._lock, self._write():
+            self._sync_clock()
+            now = self._tick()
+            rows = [
+                (key, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in items.items()
+            ]
+            replaced = self._sizes(list(items))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, accessed) "
+                "VALUES (?, ?, ?)", rows,
+            )
+            self._add_totals(
+                len(rows) - len(replaced),
+                sum(len(r[1]) for r in rows) - sum(replaced.values()),
+            )
+            if self._over(1.0):
+                self._evict()
+
+    def clear(self) -> None:
+        """Removes every cached embedding."""
+        with self._lock, self._write():
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.execute("UPDATE totals SET entries = 0, bytes = 0")
+            self._touched.clear()
+
+    def compact(self) -> Dict[str, int]:
+        """Writes back pending access times, rebuilds the database to reclaim
+        space freed by evictions and replacements, and folds the WAL into the
+        main file. Returns the file size before and after."""
+        with self._lock:
+            before = self._file_bytes()
+            with self._write():
+                self._flush_touched()
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            after = self._file_bytes()
+            entries = self._totals()[0]
+        logger.info(f"Compacted embedding cache {self.path}: {before} -> {after} bytes")
+        return {"bytes_before": before, "bytes_after": after, "entries": entries}
+
+    def stats(self) -> Dict[str, object]:
+        """Returns the entry count, vector bytes, and on-disk size."""
+        with self._lock:
+            entries, size = self._totals()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "vector_bytes": size,
+            "file_bytes": self._file_bytes(),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        """Writes back pending access times and closes the database."""
+        with self._lock:
+            if self._touched:
+                with self._write():
+                    self._flush_touched()
+            self._conn.close()
+
+    def _touch(self, keys: Iterable[str]) -> None:
+        """Records a hit for keys, writing access times back in batches."""
+        now = self._tick()
+        for key in keys:
+            self._touched[key] = now
+        if len(self._touched) >= _TOUCH_BATCH:
+            with self._write():
+                self._flush_touched()
+
+    def _tick(self) -> int:
+        """Advances and returns the logical clock that orders accesses."""
+        self._clock += 1
+        return self._clock
+
+    def _sync_clock(self) -> None:
+        """Moves the clock past the latest access time in the database, which
+        other processes sharing the file may have advanced."""
+        latest = self._conn.execute(
+            "SELECT COALESCE(MAX(accessed), 0) FROM embeddings"
+        ).fetchone()[0]
+        self._clock = max(self._clock, latest)
+
+    @contextmanager
+    def _write(self):
+        """Runs a block in an immediate transaction, which holds the database
+        write lock from the start so totals read inside it stay current."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Writes recorded access times to the database; call inside
+        _write()."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET accessed = ? WHERE key = ?",
+                [(t, k) for k, t in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _sizes(self, keys: List[str]) -> Dict[str, int]:
+        """Returns the stored vector sizes of whichever keys exist."""
+        sizes: Dict[str, int] = {}
+        for start in range(0, len(keys), _CHUNK):
+            chunk = keys[start:start + _CHUNK]
+            sizes.update(self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings WHERE key IN "
+                f"({','.join('?' * len(chunk))})", chunk,
+            ))
+        return sizes
+
+    def _over(self, fraction: float) -> bool:
+        """Returns whether the cache exceeds fraction of either bound."""
+        entries, size = self._totals()
+        return bool(
+            (self.max_entries and entries > self.max_entries * fraction)
+            or (self.max_bytes and size > self.max_bytes * fraction)
+        )
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until the cache is back under
+        the low-water mark of its bounds; call inside _write()."""
+        self._flush_touched()
+        evicted = 0
+        while self._over(_LOW_WATER):
+            entries, size = self._totals()
+            if not entries:
+                break
+            excess = entries - int((self.max_entries or entries) * _LOW_WATER)
+            if self.max_bytes and size > self.max_bytes * _LOW_WATER:
+                average = size / entries
+                excess = max(excess, int((size - self.max_bytes * _LOW_WATER) / average))
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY accessed LIMIT ?",
+                (max(1, excess),),
+            ).fetchall()
+            if not rows:
+                break
+            self._conn.executemany(
+                "DELETE FROM embeddings WHERE key = ?", [(k,) for k, _ in rows]
+            )
+            self._add_totals(-len(rows), -sum(n for _, n in rows))
+            evicted += len(rows)
+        logger.info(f"Evicted {evicted} embeddings from {self.path}")
+
+    def _totals(self) -> tuple:
+        """Returns the stored entry count and vector bytes."""
+        return self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+    def _add_totals(self, entries: int, size: int) -> None:
+        """Adjusts the stored totals; call inside _write()."""
+        self._conn.execute(
+            "UPDATE totals SET entries = entries + ?, bytes = bytes + ?", (entries, size)
+        )
+
+    def _file_bytes(self) -> int:
+        """Returns the combined size of the database and its WAL file."""
+        return sum(
+            p.stat().st_size for p in (self.path, Path(f"{self.path}-wal")) if p.exists()
+        )
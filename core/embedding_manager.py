@@ -1,95 +1,197 @@
 """Embedding cache manager and utility functions."""
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 from pathlib import Path
 
+from config.settings import CACHE_CONFIG
+from core.embedding_cache import EmbeddingCache
 from core.multimodal_embedder import MultiModalEmbedder
-from core.utils import stable_text_hash
+from core.query_cache import QueryEmbeddingCache, normalize_query
+from core.utils import file_digests, stable_text_hash
+from patterns.observer import CacheEventObserver
 
 
 class EmbeddingManager:
     """Manage and cache embeddings."""
 
-    def __init__(self, cache_dir: str = "embeddings_cache"):
-        """Initializes the embedding manager with a cache directory
-        and a multimodal embedder instance."""
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+    def __init__(self, cache_dir: Optional[str] = None):
+        """Initializes the embedding manager with its on-disk embedding cache,
+        an in-memory LRU tier for query embeddings in front of it, and a
+        multimodal embedder instance; models load on first use. cache_dir
+        overrides the directory of the configured cache file."""
+        config = CACHE_CONFIG["embeddings"]
+        path = Path(config["path"])
+        if cache_dir is not None:
+            path = Path(cache_dir) / path.name
+        self.cache = EmbeddingCache(
+            path, max_entries=config.get("max_entries"), max_bytes=config.get("max_bytes")
+        )
+        self.query_cache = QueryEmbeddingCache(CACHE_CONFIG["memory_cache_size"])
+        self.cache_observer = CacheEventObserver()
+        self.query_cache.attach(self.cache_observer)
         self.multimodal_embedder = MultiModalEmbedder()
 
+    def warmup(self, models: Sequence[str] = ("clip", "sentence_transformer")) -> None:
+        """Loads the named embedding models ahead of the first request."""
+        self.multimodal_embedder.warmup(models)
+
+    def _image_key(self, image_path: str, model_type: str) -> Optional[str]:
+        """Returns the cache key for an image embedding: the model version
+        plus a digest of the file's bytes, so identical images share an
+        entry whatever their path. Returns None if the file is unreadable."""
+        try:
+            digest = file_digests.digest(image_path)
+        except OSError:
+            return None
+        version = self._image_embedder(model_type).model_version
+        return f"image:{model_type}:{version}:{digest}"
+
+    def _text_key(self, text: str, model_type: str) -> str:
+        """Returns the cache key for a text embedding of the normalized text
+        under the current model version."""
+        version = self._text_embedder(model_type).model_version
+        return f"text:{model_type}:{version}:{stable_text_hash(normalize_query(text))}"
+
     def get_image_embedding(
         self, image_path: str, model_type: str = "clip", use_cache: bool = True
     ) -> np.ndarray:
         """Generates an image embedding using the specified model, returning
-        a cached result when available and caching is enabled."""
-        if use_cache:
-            cache_path = self.cache_dir / f"{Path(image_path).stem}_{model_type}.npy"
-            if cache_path.exists():
-                return np.load(cache_path)
-        if model_type == "clip":
-            embedding = self.multimodal_embedder.image_embedder.encode_image(image_path)
-        elif model_type == "resnet":
-            embedding = self.multimodal_embedder.resnet_embedder.encode_image(image_path)
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        if use_cache:
-            np.save(cache_path, embedding)
-        return embedding
+        a cached result when available and caching is enabled. Results are
+        served from the in-memory query tier first, then the disk cache."""
+        key = self._image_key(image_path, model_type) if use_cache else None
+        if key is None:
+            return self._image_embedder(model_type).encode_image(image_path)
+        return self._cached_query(
+            key, lambda: self._image_embedder(model_type).encode_image(image_path)
+        )
 
     def get_text_embedding(
         self, text: str, model_type: str = "sentence_transformer",
         use_cache: bool = True,
     ) -> np.ndarray:
         """Generates a text embedding using the specified model, returning
-        a cached result when available and caching is enabled."""
-        if use_cache:
-            cache_key = f"{stable_text_hash(text)}_{model_type}"
-            cache_path = self.cache_dir / f"text_{cache_key}.npy"
-            if cache_path.exists():
-                return np.load(cache_path)
-        if model_type == "clip":
-            embedding = self.multimodal_embedder.clip_embedder.encode_text(text)
-        elif model_type == "sentence_transformer":
-            embedding = self.multimodal_embedder.text_embedder.encode_text(text)
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        if use_cache:
-            np.save(cache_path, embedding)
-        return embedding
+        a cached result when available and caching is enabled. Queries that
+        differ only in case or whitespace share one entry; repeated ones are
+        served from the in-memory query tier."""
+        if not use_cache:
+            return self._text_embedder(model_type).encode_text(text)
+        return self._cached_query(
+            self._text_key(text, model_type),
+            lambda: self._text_embedder(model_type).encode_text(text),
+        )
+
+    def _cached_query(self, key: str, encode) -> np.ndarray:
+        """Looks key up in the in-memory tier, then the disk cache, and
+        encodes on a miss in both, filling whichever tiers missed. Zero
+        vectors from failed encodes are returned but never cached. Cached
+        results are read-only."""
+        hot = self.query_cache.get(key)
+        if hot is not None:
+            return hot
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.query_cache.put(key, cached)
+        embedding = encode()
+        if not np.any(embedding):
+            return embedding
+        self.cache.put(key, embedding)
+        return self.query_cache.put(key, embedding)
 
     def batch_process_images(
-        self, image_paths: List[str], model_type: str = "clip"
-    ) -> List[np.ndarray]:
-        """Processes a list of image paths in batch and returns their
-        embedding vectors using the specified model type."""
+        self, image_paths: List[str], model_type: str = "clip", use_cache: bool = True
+    ) -> np.ndarray:
+        """Processes a list of image paths in batches and returns their
+        embeddings as one (n, d) float32 array, with zero rows for images
+        that could not be encoded. Cached images are looked up in one batch
+        by content and only the misses are encoded."""
+        embedder = self._image_embedder(model_type)
+        if not use_cache:
+            return embedder.encode_images_batch(image_paths)
+        keys = [self._image_key(p, model_type) for p in image_paths]
+        cached = self.cache.get_many(k for k in keys if k is not None)
+        out = np.zeros((len(image_paths), embedder.dimension), dtype=np.float32)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        for i, key in enumerate(keys):
+            if key in cached:
+                out[i] = cached[key]
+        if missing:
+            encoded = embedder.encode_images_batch([image_paths[i] for i in missing])
+            out[missing] = encoded
+            self.cache.put_many({
+                keys[i]: row for i, row in zip(missing, encoded)
+                if keys[i] is not None and np.any(row)
+            })
+        return out
+
+    def iter_image_batches(
+        self, image_paths: List[str], model_type: str = "clip", batch_size: int = 32,
+        use_cache: bool = True,
+    ) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """Streams (rows, embeddings) batches for bulk indexing, decoding
+        upcoming images in the background while each batch is encoded.
+        rows index into image_paths and omit images that failed. Each batch
+        is written to the embedding cache under its content keys, so later
+        lookups of indexed images skip the model."""
+        for rows, embeddings in self._image_embedder(model_type).iter_batches(image_paths, batch_size):
+            if use_cache:
+                keys = [self._image_key(image_paths[r], model_type) for r in rows]
+                self.cache.put_many({
+                    key: row for key, row in zip(keys, embeddings)
+                    if key is not None and np.any(row)
+                })
+            yield rows, embeddings
+
+    def _image_embedder(self, model_type: str):
+        """Returns the image embedder for the given model type."""
+        if model_type == "clip":
+            return self.multimodal_embedder.image_embedder
+        if model_type == "resnet":
+            return self.multimodal_embedder.resnet_embedder
+        raise ValueError(f"Unsupported model type: {model_type}")
+
+    def _text_embedder(self, model_type: str):
+        """Returns the text embedder for the given model type."""
         if model_type == "clip":
-            embedder = self.multimodal_embedder.image_embedder
-        elif model_type == "resnet":
-            embedder = self.multimodal_embedder.resnet_embedder
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        return embedder.encode_images_batch(image_paths)
+            return self.multimodal_embedder.clip_embedder
+        if model_type == "sentence_transformer":
+            return self.multimodal_embedder.text_embedder
+        raise ValueError(f"Unsupported model type: {model_type}")
 
     def batch_process_texts(
-        self, texts: List[str], model_type: str = "sentence_transformer"
+        self, texts: List[str], model_type: str = "sentence_transformer",
+        use_cache: bool = True,
     ) -> List[np.ndarray]:
         """Processes a list of text strings in batch and returns their
-        embedding vectors using the specified model type."""
-        if model_type == "clip":
-            embedder = self.multimodal_embedder.clip_embedder
-        elif model_type == "sentence_transformer":
-            embedder = self.multimodal_embedder.text_embedder
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        return embedder.encode_texts_batch(texts)
+        embedding vectors using the specified model type, encoding only the
+        texts missing from the cache."""
+        embedder = self._text_embedder(model_type)
+        if not use_cache:
+            return embedder.encode_texts_batch(texts)
+        keys = [self._text_key(t, model_type) for t in texts]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        encoded: Dict[int, np.ndarray] = {}
+        if missing:
+            encoded = dict(zip(missing, embedder.encode_texts_batch([texts[i] for i in missing])))
+        self.cache.put_many({keys[i]: e for i, e in encoded.items() if np.any(e)})
+        return [cached[key] if key in cached else encoded[i] for i, key in enumerate(keys)]
+
+    def compact_cache(self) -> Dict[str, int]:
+        """Reclaims space left by evicted or replaced cache entries."""
+        return self.cache.compact()
 
     def clear_cache(self):
-        """Removes all cached embedding files by deleting and recreating
-        the cache directory."""
-        import shutil
-        if self.cache_dir.exists():
-            shutil.rmtree(self.cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        """Removes all cached embeddings from both tiers."""
+        self.query_cache.clear()
+        self.cache.clear()
+
+    def query_cache_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counts and occupancy of the in-memory query tier."""
+        return {
+            **self.cache_observer.stats,
+            "entries": len(self.query_cache),
+            "max_entries": self.query_cache.max_entries,
+        }
 
 
 def normalize_embedding(embedding: np.ndarray) -> np.ndarray:
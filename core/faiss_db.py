@@ -1,142 +1,1106 @@
 """FAISS-backed vector database implementation."""
 import pickle
 import logging
+import threading
+import time
 import numpy as np
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 
 import faiss
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
 from config.settings import VECTOR_DB_DIR, VECTOR_DB_CONFIG
+from core.faiss_index_factory import (
+    build_index, metric_type, needs_migration, normalized, select_index_spec,
+    training_sample,
+)
+from core.metadata_store import ColumnarMetadataStore
+from core.segment_log import SegmentLog
 from core.vector_db_base import BaseVectorDB
+from core.vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
 
+# Name of the serialized index inside a checkpoint's metadata directory.
+_INDEX_FILE = "index.faiss"
+# Times a read-only open retries when the writer swaps in a new checkpoint.
+_OPEN_ATTEMPTS = 20
+
+
+def parse_durability(policy: str) -> Tuple[str, float]:
+    """Parses a durability policy: "sync" makes every mutation durable before
+    it returns, "interval=N" checkpoints in the background every N seconds,
+    and "every=N" checkpoints in the background after N mutations."""
+    mode, _, value = policy.partition("=")
+    if mode == "sync" and not value:
+        return mode, 0
+    if mode in ("interval", "every") and value:
+        amount = float(value)
+        if amount > 0:
+            return mode, amount
+    raise ValueError(f"Unsupported durability policy: {policy}")
+
+
+def _hnsw(index: faiss.Index) -> Optional[faiss.IndexHNSW]:
+    """Returns the HNSW graph index inside index, unwrapping an ID map."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
+
+
+class WriterLockedError(RuntimeError):
+    """Raised when a collection is opened for writing while another
+    instance, usually another process, holds its writer lock."""
+
+
+class _WriterLock:
+    """Exclusive advisory lock on a collection's lock file, held by its one
+    writable instance so two writers never append to the same files. The
+    kernel drops it if the owning process dies. Platforms without fcntl
+    are not locked."""
+
+    def __init__(self, path: Path, collection_name: str):
+        """Takes the lock, raising WriterLockedError if another instance holds it."""
+        self._fh = None
+        if fcntl is None:
+            return
+        fh = open(path, "a+b")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            raise WriterLockedError(
+                f"FAISS collection {collection_name} is already open for writing; "
+                "every process but the single writer must open it with "
+                "read_only=True (the faiss read_only setting, FAISS_READ_ONLY=true)"
+            ) from None
+        self._fh = fh
+
+    def release(self) -> None:
+        """Releases the lock; safe to call more than once."""
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Immutable view that searches run against without taking the lock.
+    Rows below base_rows are in the FAISS index, which is never mutated while
+    a reader has the snapshot pinned; rows from base_rows up to rows form an
+    append-only delta that is scanned exactly from the raw vector store.
+    metadata is a frozen view holding exactly rows rows."""
+    index: faiss.Index
+    metadata: ColumnarMetadataStore
+    vectors: VectorStore
+    base_rows: int
+    rows: int
+    deleted: np.ndarray
+    deleted_count: int
+
 
 class FAISSVectorDB(BaseVectorDB):
-    """FAISS-backed vector database."""
+    """FAISS-backed vector database. Writers serialize on a lock and publish
+    a new snapshot after every mutation; readers only ever wait for a fold
+    of the delta into an index no other reader holds."""
 
-    def __init__(self, dimension: int, collection_name: str = "shoe_images"):
+    def __init__(
+        self, dimension: int, collection_name: str = "shoe_images",
+        read_only: Optional[bool] = None,
+    ):
         """Initializes the FAISS index paths and loads or creates the
-        underlying index and metadata store."""
+        underlying index and metadata store, replaying any pending segments.
+        A writable instance holds the collection's writer lock until
+        close(), so opening a second writer raises WriterLockedError. A read-only
+        instance takes no lock and memory-maps the last checkpoint instead,
+        so serving processes share one copy through the OS page cache."""
         super().__init__(dimension, collection_name)
-        self._index_path = VECTOR_DB_DIR / f"{collection_name}.faiss"
-        self._meta_path = VECTOR_DB_DIR / f"{collection_name}_metadata.pkl"
-        self._load_or_create()
-
-    def _load_or_create(self) -> None:
-        """Loads an existing FAISS index and metadata from disk, or creates
-        a new IVFFlat index if no persisted data is found."""
-        if self._index_path.exists() and self._meta_path.exists():
-            self.index = faiss.read_index(str(self._index_path))
-            with open(self._meta_path, "rb") as f:
-                self.metadata: List[Dict[str, Any]] = pickle.load(f)
+        config = VECTOR_DB_CONFIG["faiss"]
+        self._read_only = config.get("read_only", False) if read_only is None else read_only
+        self._writer_lock = None
+        if not self._read_only:
+            VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+            self._writer_lock = _WriterLock(
+                VECTOR_DB_DIR / f"{collection_name}.lock", collection_name
+            )
+        self._meta_dir = VECTOR_DB_DIR / f"{collection_name}_metadata"
+        self._index_path = self._meta_dir / _INDEX_FILE
+        self._legacy_index_path = VECTOR_DB_DIR / f"{collection_name}.faiss"
+        self._legacy_meta_path = VECTOR_DB_DIR / f"{collection_name}_metadata.pkl"
+        self._lock = threading.RLock()
+        self._merge_thread: Optional[threading.Thread] = None
+        self._migration_thread: Optional[threading.Thread] = None
+        self._readers = threading.Condition()
+        self._pins = 0
+        self._folding = False
+        self._log: Optional[SegmentLog] = None
+        self._replaying = False
+        self._durability, self._durability_n = parse_durability(
+            config.get("durability", "interval=30")
+        )
+        self._ops = self._checkpointed_ops = 0
+        self._last_checkpoint = time.time()
+        self._checkpoint_due = threading.Event()
+        self._closing = False
+        self._checkpointer: Optional[threading.Thread] = None
+        index = self._load_or_create()
+        self._open_vectors(index)
+        self._publish(index, self.metadata.info.get("base_rows", len(self.metadata)))
+        if self._read_only:
+            if config.get("prefault", False):
+                self._prefault()
+            return
+        if config.get("persistence", "snapshot") == "segments":
+            self._log = SegmentLog(
+                VECTOR_DB_DIR / f"{collection_name}_segments",
+                config.get("segment_max_bytes", 64 * 1024 * 1024),
+            )
+            self._replay_segments()
+        self._fold()
+        self._maybe_migrate()
+        self._wait_for_migration()
+        if self._durability != "sync":
+            self._checkpointer = threading.Thread(
+                target=self._run_checkpointer,
+                name=f"faiss-checkpoint-{collection_name}", daemon=True,
+            )
+            self._checkpointer.start()
+
+    @property
+    def index(self) -> faiss.Index:
+        """Returns the FAISS index of the currently published snapshot."""
+        return self._snapshot.index
+
+    @property
+    def next_id(self) -> int:
+        """Returns the number of the next generated item ID. It is persisted
+        and only grows, so IDs are never reused after a rebuild compacts rows."""
+        return self.metadata.info.get("next_id", len(self.metadata))
+
+    def _load_or_create(self) -> faiss.Index:
+        """Loads an existing FAISS index and memory-mapped metadata store from
+        disk, migrating a legacy pickled metadata list if that is all there is,
+        or creates a new size-appropriate index if no persisted data is found."""
+        store, index = self._open_checkpoint()
+        if store is None and self._legacy_meta_path.exists():
+            with open(self._legacy_meta_path, "rb") as f:
+                store = ColumnarMetadataStore.from_records(pickle.load(f))
+            logger.info(f"Migrated pickled metadata for {self._collection_name}")
+        if store is not None and index is None:
+            if self._legacy_index_path.exists():
+                self._index_path = self._legacy_index_path
+                index = self._read_index()
+            else:
+                store = None
+        if store is not None:
+            self.metadata = store
         else:
-            nlist = VECTOR_DB_CONFIG["faiss"]["nlist"]
-            self.index = faiss.IndexIVFFlat(
-                faiss.IndexFlatL2(self._dimension), self._dimension, nlist
+            self.metadata = ColumnarMetadataStore()
+            index = self._new_index()
+        self._generation = self.metadata.info.get("generation", 0)
+        return index
+
+    def _open_checkpoint(self) -> Tuple[Optional[ColumnarMetadataStore], Optional[faiss.Index]]:
+        """Opens the persisted metadata store and the index written with it;
+        either is None when missing. Only a writer recovers an interrupted
+        swap. A reader can race the writer's next checkpoint between the two
+        reads, so it retries until the store it opened is still current."""
+        for attempt in range(_OPEN_ATTEMPTS):
+            try:
+                store = ColumnarMetadataStore.open(self._meta_dir, recover=not self._read_only)
+                if store is None:
+                    return None, None
+                index = None
+                if (store.source / _INDEX_FILE).exists():
+                    self._index_path = store.source / _INDEX_FILE
+                    index = self._read_index()
+                if not self._read_only or (
+                    ColumnarMetadataStore.current_checkpoint(self._meta_dir) == store.checkpoint
+                ):
+                    return store, index
+            except (FileNotFoundError, RuntimeError):
+                if not self._read_only or attempt == _OPEN_ATTEMPTS - 1:
+                    raise
+            time.sleep(0.05)
+        raise RuntimeError(
+            f"FAISS collection {self._collection_name} kept changing while it was opened"
+        )
+
+    def _read_index(self) -> faiss.Index:
+        """Reads the persisted index, memory-mapping its contents read-only
+        instead of copying them onto the heap when serving read-only."""
+        if self._read_only:
+            flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            return faiss.read_index(str(self._index_path), flags)
+        return faiss.read_index(str(self._index_path))
+
+    def _prefault(self) -> None:
+        """Reads the index, raw vectors, and metadata columns once so their
+        pages are resident in the page cache before the first query."""
+        paths = [self._index_path, self._vectors.path, *self._meta_dir.glob("*.npy")]
+        buf = bytearray(16 * 1024 * 1024)
+        total = 0
+        for path in paths:
+            if path.exists():
+                with open(path, "rb", buffering=0) as f:
+                    while n := f.readinto(buf):
+                        total += n
+        logger.info(f"Prefaulted {total / 1e6:.1f} MB for {self._collection_name}")
+
+    def _check_writable(self) -> None:
+        """Raises if this instance only serves a read-only snapshot."""
+        if self._read_only:
+            raise RuntimeError(
+                f"FAISS collection {self._collection_name} is open read-only"
             )
-            self.metadata = []
+
+    def _new_index(self) -> faiss.Index:
+        """Creates an empty index of the type the size policy picks for an
+        empty collection. Labels are metadata row numbers, so deleted rows
+        can be removed by id."""
+        return self._build_index(
+            np.zeros((0, self._dimension), dtype=np.float32), np.zeros(0, dtype="int64")
+        )
+
+    def _build_index(
+        self, vectors: np.ndarray, ids: np.ndarray, info: Optional[Dict[str, Any]] = None
+    ) -> faiss.Index:
+        """Builds an index sized for the given vectors and records its spec
+        in info, which defaults to the live metadata's."""
+        config = VECTOR_DB_CONFIG["faiss"]
+        spec = select_index_spec(len(vectors), config)
+        info = self.metadata.info if info is None else info
+        info["index_spec"] = spec
+        info["trained_rows"] = len(vectors)
+        return build_index(spec, self._dimension, vectors, ids, config)
+
+    def _publish(self, index: Optional[faiss.Index] = None, base_rows: Optional[int] = None) -> None:
+        """Installs a new snapshot of the current metadata, vectors, and
+        deletions, optionally with a new base index. Called with the write
+        lock held; the single attribute assignment is what readers observe."""
+        current = getattr(self, "_snapshot", None)
+        metadata = self.metadata.view()
+        self._snapshot = _Snapshot(
+            index=index if index is not None else current.index,
+            metadata=metadata,
+            vectors=self._vectors,
+            base_rows=base_rows if base_rows is not None else current.base_rows,
+            rows=len(metadata),
+            deleted=metadata.deleted_mask(),
+            deleted_count=metadata.deleted_count(),
+        )
+
+    @contextmanager
+    def _reading(self):
+        """Pins the published snapshot for the duration of a search."""
+        snap = self._pin()
+        try:
+            yield snap
+        finally:
+            self._unpin()
+
+    def _pin(self) -> _Snapshot:
+        """Returns the published snapshot, holding its index against in-place
+        folds until _unpin(). Waits while an in-place fold is running."""
+        with self._readers:
+            while self._folding:
+                self._readers.wait()
+            self._pins += 1
+            return self._snapshot
+
+    def _unpin(self) -> None:
+        """Releases a snapshot taken by _pin()."""
+        with self._readers:
+            self._pins -= 1
+
+    def _fold(self) -> None:
+        """Moves the delta rows into the base index and purges deleted rows
+        from it. When no search or checkpoint holds a snapshot the index is
+        updated in place, which costs O(delta), and searches arriving
+        meanwhile wait for it; otherwise it is cloned first so in-flight
+        searches keep their snapshot. Called with the write lock held."""
+        snap = self._snapshot
+        delta = np.arange(snap.base_rows, snap.rows, dtype="int64")
+        delta = delta[~snap.deleted[snap.base_rows:]]
+        gone = np.flatnonzero(snap.deleted[: snap.base_rows]).astype("int64")
+        if len(delta) == 0 and snap.base_rows == snap.rows and len(gone) == 0:
+            return
+        if len(delta) and len(snap.vectors) < snap.rows:
+            return
+        with self._readers:
+            in_place = self._folding = self._pins == 0
+        try:
+            index = snap.index if in_place else faiss.clone_index(snap.index)
+            if len(delta):
+                vecs = snap.vectors.get(delta)
+                if self._is_cosine():
+                    vecs = normalized(vecs)
+                if not index.is_trained:
+                    ivf = faiss.extract_index_ivf(index)
+                    index.train(training_sample(vecs, ivf.nlist, VECTOR_DB_CONFIG["faiss"]))
+                index.add_with_ids(vecs, delta)
+            if len(gone):
+                try:
+                    index.remove_ids(faiss.IDSelectorArray(gone))
+                except RuntimeError:
+                    # Index types without removal rely on the search-time selector.
+                    pass
+            self._publish(index, snap.rows)
+        finally:
+            if in_place:
+                with self._readers:
+                    self._folding = False
+                    self._readers.notify_all()
+
+    def _maybe_migrate(self) -> None:
+        """Starts rebuilding the index from the stored raw vectors in the
+        background when the collection has outgrown the index type (or
+        nlist) it was built for, or when the configured metric differs from
+        the one the index was built with. Until the rebuilt index is swapped
+        in, the current one keeps serving, and the delta is folded into it
+        once it reaches ``delta_max_rows``."""
+        config = VECTOR_DB_CONFIG["faiss"]
+        info = self.metadata.info
+        snap = self._snapshot
+        live = snap.rows - snap.deleted_count
+        outgrown = snap.index.metric_type != metric_type(config) or needs_migration(
+            info.get("index_spec"), info.get("trained_rows", 0), live, config
+        )
+        migrating = self._migration_thread is not None and self._migration_thread.is_alive()
+        if outgrown and not migrating and len(self._vectors) >= len(self.metadata):
+            self._migration_thread = threading.Thread(
+                target=self._migrate, args=(snap, self._generation),
+                name=f"faiss-migrate-{self._collection_name}", daemon=True,
+            )
+            self._migration_thread.start()
+        elif snap.rows - snap.base_rows >= max(1, config.get("delta_max_rows", 10_000)):
+            self._fold()
+
+    def _migrate(self, snap: _Snapshot, generation: int) -> None:
+        """Trains and fills a new index over the live rows of snap without
+        holding the write lock, catches it up with rows added meanwhile
+        until fewer than ``delta_max_rows`` remain, then swaps it in unless
+        the collection was rebuilt or cleared. The remaining rows return to
+        the delta, and rows deleted since are filtered until the next fold."""
+        try:
+            rows = np.flatnonzero(~snap.deleted).astype("int64")
+            built: Dict[str, Any] = {}
+            index = self._build_index(snap.vectors.get(rows), rows, built)
+            covered = snap.rows
+            limit = max(1, VECTOR_DB_CONFIG["faiss"].get("delta_max_rows", 10_000))
+            while self._snapshot.rows - covered >= limit:
+                current = self._snapshot
+                rows = np.arange(covered, current.rows, dtype="int64")
+                rows = rows[~current.deleted[covered:]]
+                vecs = current.vectors.get(rows)
+                if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                    vecs = normalized(vecs)
+                index.add_with_ids(vecs, rows)
+                covered = current.rows
+            with self._lock:
+                if self._generation != generation:
+                    return
+                previous = self.metadata.info.get("index_spec")
+                self.metadata.info.update(built)
+                self._publish(index, covered)
+                self._schedule_merge()
+            logger.info(
+                f"Migrated {self._collection_name} index from {previous} to {built['index_spec']}"
+            )
+        except Exception as e:
+            logger.error(f"Index migration failed for {self._collection_name}: {e}")
+
+    def _wait_for_migration(self) -> None:
+        """Blocks until any in-flight background index migration has finished."""
+        thread = self._migration_thread
+        if thread is not None:
+            thread.join()
+
+    def _vectors_path(self, generation: int) -> Path:
+        """Returns the raw vector file belonging to the given generation."""
+        return VECTOR_DB_DIR / f"{self._collection_name}_vectors.g{generation}.f32"
+
+    def _open_vectors(self, index: faiss.Index) -> None:
+        """Opens the raw vector side store for the current generation, dropping
+        files left by an interrupted rebuild and rows newer than the snapshot."""
+        path = self._vectors_path(self._generation)
+        if self._read_only:
+            self._vectors = VectorStore(path, self._dimension, read_only=True)
+            return
+        for stale in VECTOR_DB_DIR.glob(f"{self._collection_name}_vectors.g*.f32"):
+            if stale != path:
+                stale.unlink()
+        self._vectors = VectorStore(path, self._dimension)
+        if len(self._vectors) > len(self.metadata):
+            self._vectors.truncate(len(self.metadata))
+        elif len(self._vectors) < len(self.metadata):
+            self._backfill_vectors(index)
+
+    def _backfill_vectors(self, index: faiss.Index) -> None:
+        """Recovers raw vectors for an index persisted before vectors were
+        stored alongside it, by reconstructing them from the index."""
+        missing = np.arange(len(self._vectors), len(self.metadata), dtype="int64")
+        try:
+            ivf = faiss.try_extract_index_ivf(index)
+            if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+                ivf.make_direct_map()
+            self._vectors.append(index.reconstruct_batch(missing))
+            logger.info(f"Backfilled {len(missing)} raw vectors for {self._collection_name}")
+        except RuntimeError as e:
+            logger.warning(f"Raw vectors unavailable for {self._collection_name}: {e}")
+
+    def _replay_segments(self) -> None:
+        """Re-applies every logged mutation newer than the last merged snapshot
+        so that a crash between merges loses no acknowledged writes. Records
+        from before a clear or rebuild carry an older generation and are skipped."""
+        replayed = 0
+        self._replaying = True
+        for record in self._log.replay():
+            if record["generation"] < self._generation:
+                continue
+            op = record["op"]
+            if op == "add":
+                if record["row"] < len(self.metadata):
+                    continue
+                self._apply_add(record["vectors"], record["metadata"], record["ids"])
+            elif op == "update":
+                for vid, meta in record["updates"].items():
+                    self._apply_update(vid, meta)
+                self._publish()
+            elif op == "delete":
+                self._apply_delete(record["vector_ids"])
+            replayed += 1
+        self._replaying = False
+        if replayed:
+            logger.info(f"Replayed {replayed} logged mutations for {self._collection_name}")
 
     def add_vectors(
         self, vectors: np.ndarray, metadata: List[Dict[str, Any]],
         ids: Optional[List[str]] = None,
     ) -> None:
-        """Trains the index if needed, adds vectors with metadata,
-        and persists the updated index to disk."""
-        vecs = vectors.astype("float32")
-        if not self.index.is_trained:
-            self.index.train(vecs[: min(1000, len(vecs))])
-        self.index.add(vecs)
-        if ids is None:
-            ids = [f"item_{len(self.metadata) + i}" for i in range(len(vecs))]
-        for i, (vid, meta) in enumerate(zip(ids, metadata)):
-            meta["vector_id"] = vid
-            meta["index_id"] = len(self.metadata) + i
-            self.metadata.append(meta)
-        self._persist()
+        """Adds vectors with metadata, makes them searchable through the
+        delta of a new snapshot, and records the addition durably."""
+        self._check_writable()
+        vecs = np.ascontiguousarray(vectors, dtype="float32")
+        with self._lock:
+            row = len(self.metadata)
+            if ids is None:
+                ids = [f"item_{self.next_id + i}" for i in range(len(vecs))]
+            self._apply_add(vecs, metadata, ids)
+            self._record({
+                "op": "add", "row": row, "ids": list(ids),
+                "vectors": vecs, "metadata": metadata,
+            })
+
+    def _apply_add(
+        self, vecs: np.ndarray, metadata: List[Dict[str, Any]], ids: List[str]
+    ) -> None:
+        """Appends vectors to the raw vector store and their metadata rows, then
+        publishes them as delta rows; they reach the FAISS index when the
+        delta is folded. The store keeps the vectors as given, and the ID
+        counter advances past the batch."""
+        self._vectors.append(vecs)
+        self.metadata.info["next_id"] = self.next_id + len(ids)
+        for vid, meta in zip(ids, metadata):
+            self.metadata.append({**meta, "vector_id": vid})
+        self._publish()
+        if not self._replaying:
+            self._maybe_migrate()
 
     def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
         """Updates the metadata dictionary for the vector matching the given ID
-        and persists the changes to disk."""
-        for i, meta in enumerate(self.metadata):
-            if meta.get("vector_id") == vector_id:
-                self.metadata[i].update(metadata)
-                self._persist()
-                return
+        and records the change durably."""
+        self.update_metadata_many({vector_id: metadata})
+
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Applies metadata updates for many vector IDs, publishes them in one
+        new snapshot, and records them as a single durable mutation."""
+        self._check_writable()
+        with self._lock:
+            applied = {vid: meta for vid, meta in updates.items() if self._apply_update(vid, meta)}
+            if applied:
+                self._publish()
+                self._record({"op": "update", "updates": applied})
+
+    def _apply_update(self, vector_id: str, metadata: Dict[str, Any]) -> bool:
+        """Merges the given fields into the matching metadata entry, returning
+        whether an entry was found."""
+        row = self.metadata.find(vector_id)
+        if row is None:
+            return False
+        self.metadata.update(row, metadata)
+        return True
 
     def delete_vector(self, vector_id: str) -> None:
-        """Soft-deletes a vector by marking its metadata entry as deleted
-        rather than removing it from the FAISS index."""
-        for meta in self.metadata:
-            if meta.get("vector_id") == vector_id:
-                meta["deleted"] = True
-                self._persist()
-                return
+        """Deletes a vector by marking its metadata row as deleted; it is purged
+        from the FAISS index by the next fold and from disk by the next rebuild."""
+        self.delete_many([vector_id])
+
+    def delete_many(self, vector_ids: List[str]) -> None:
+        """Deletes many vectors and records them as a single durable mutation."""
+        self._check_writable()
+        with self._lock:
+            applied = self._apply_delete(vector_ids)
+            if applied:
+                self._record({"op": "delete", "vector_ids": applied})
+
+    def _apply_delete(self, vector_ids: List[str]) -> List[str]:
+        """Marks the matching metadata rows as deleted and publishes the new
+        deletion mask, returning the IDs that were found."""
+        applied = []
+        for vid in vector_ids:
+            row = self.metadata.find(vid)
+            if row is not None and not self.metadata.is_deleted(row):
+                self.metadata.update(row, {"deleted": True})
+                applied.append(vid)
+        if applied:
+            self._publish()
+        return applied
 
     def search(
         self, query_vector: np.ndarray, k: int = 10,
-        filters: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Searches the FAISS index for the k nearest neighbors and returns
-        ranked results with similarity scores, optionally filtered by metadata."""
-        self.index.nprobe = VECTOR_DB_CONFIG["faiss"]["nprobe"]
-        distances, indices = self.index.search(
-            query_vector.reshape(1, -1).astype("float32"), k
-        )
+        ranked results with similarity scores. Metadata filters and soft
+        deletes are pushed into FAISS as an ID selector so only admissible
+        rows are visited and a full page is returned in one pass."""
+        return self.search_batch(query_vector.reshape(1, -1), k, filters, quality)[0]
+
+    def search_batch(
+        self, query_matrix: np.ndarray, k: int = 10,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Searches all query rows against the current snapshot: the base
+        index in a single FAISS call sharing one filter selector, and the
+        delta rows exactly in one brute-force call over their raw vectors,
+        merging both into one page per query. quality names a recall level
+        from the config and sets nprobe or efSearch for this call only."""
+        with self._reading() as snap:
+            queries = self._query(query_matrix)
+            admissible = self._admissible(snap, filters)
+            if admissible is None:
+                return [[] for _ in range(len(queries))]
+            base = self._search_base(snap, queries, admissible, k, self._knob(snap, quality))
+            exact = self._exact_knn(snap, queries, self._delta_rows(snap, admissible), k)
+            pages = []
+            for (distances, labels), delta_distances, delta_labels in zip(base, *exact):
+                distances, labels = self._best(
+                    np.concatenate([distances, delta_distances]),
+                    np.concatenate([labels, delta_labels]), k,
+                )
+                pages.append(self._results(snap, distances, labels))
+            return pages
+
+    def search_range(
+        self, query_vector: np.ndarray, min_score: float, limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns up to limit results scoring at least min_score using FAISS
+        range search on the base index plus an exact scan of the delta, so
+        every admissible hit above the threshold is found without guessing k.
+        Compressed indexes fall back to a re-ranked top-k search because their
+        approximate scores cannot be thresholded exactly."""
+        if self._is_compressed():
+            return super().search_range(query_vector, min_score, limit, filters, quality)
+        with self._reading() as snap:
+            admissible = self._admissible(snap, filters)
+            if admissible is None:
+                return []
+            if self._is_cosine():
+                radius = min_score
+            elif min_score > 0:
+                radius = 1.0 / min_score - 1.0
+            else:
+                radius = float("inf")
+            query = self._query(query_vector)
+            distances = np.zeros(0, dtype=np.float32)
+            labels = np.zeros(0, dtype="int64")
+            selected = self._base_selector(snap, admissible)
+            if selected is not None:
+                selector, count = selected
+                params = self._search_params(
+                    snap.index, selector, count, limit, self._knob(snap, quality)
+                )
+                lims, distances, labels = snap.index.range_search(query, radius, params=params)
+                distances, labels = distances[lims[0]:lims[1]], labels[lims[0]:lims[1]]
+            delta_rows = self._delta_rows(snap, admissible)
+            exact = self._exact(snap, query[0], delta_rows)
+            hit = exact >= radius if self._is_cosine() else exact <= radius
+            distances, labels = self._best(
+                np.concatenate([distances, exact[hit]]),
+                np.concatenate([labels, delta_rows[hit]]), limit,
+            )
+            results = self._results(snap, distances, labels)
+            return [r for r in results if r["similarity_score"] >= min_score]
+
+    def _admissible(
+        self, snap: _Snapshot, filters: Optional[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        """Returns the mask of snapshot rows that are live and match the
+        filters, or None when no row is admissible."""
+        admissible = ~snap.deleted
+        if filters:
+            admissible &= snap.metadata.mask(filters)
+        if not admissible.any():
+            return None
+        return admissible
+
+    def _base_selector(
+        self, snap: _Snapshot, admissible: np.ndarray
+    ) -> Optional[Tuple[faiss.IDSelector, int]]:
+        """Returns an ID selector over the admissible rows held by the base
+        index together with their count, or None when there are none."""
+        base = admissible[: snap.base_rows]
+        count = int(base.sum())
+        if count == 0 or snap.index.ntotal == 0:
+            return None
+        return faiss.IDSelectorBitmap(np.packbits(base, bitorder="little")), count
+
+    def _search_base(
+        self, snap: _Snapshot, queries: np.ndarray, admissible: np.ndarray, k: int,
+        knob: int,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Searches the base index for every query with filters and deletes
+        pushed down as a selector, re-ranking compressed candidates exactly."""
+        selected = self._base_selector(snap, admissible)
+        if selected is None:
+            empty = (np.zeros(0, dtype=np.float32), np.zeros(0, dtype="int64"))
+            return [empty] * len(queries)
+        selector, count = selected
+        rerank = self._is_compressed()
+        fetch = k * VECTOR_DB_CONFIG["faiss"].get("rerank_factor", 4) if rerank else k
+        params = self._search_params(snap.index, selector, count, fetch, knob)
+        distances, labels = snap.index.search(queries, fetch, params=params)
+        if rerank:
+            return [self._rerank(snap, q, idx, k) for q, idx in zip(queries, labels)]
+        return [(d[i >= 0], i[i >= 0]) for d, i in zip(distances, labels)]
+
+    @staticmethod
+    def _delta_rows(snap: _Snapshot, admissible: np.ndarray) -> np.ndarray:
+        """Returns the admissible rows of the snapshot's delta."""
+        return (np.flatnonzero(admissible[snap.base_rows:]) + snap.base_rows).astype("int64")
+
+    def _exact(self, snap: _Snapshot, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Scores rows exactly against the raw vectors in the snapshot's store,
+        as inner products for cosine indexes and squared L2 distances otherwise."""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.float32)
+        vecs = snap.vectors.get(rows)
+        if self._is_cosine():
+            return normalized(vecs) @ query
+        diffs = vecs - query
+        return np.einsum("ij,ij->i", diffs, diffs)
+
+    def _best(
+        self, distances: np.ndarray, labels: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Keeps the k best-scoring candidates in rank order."""
+        order = np.argsort(-distances if self._is_cosine() else distances, kind="stable")[:k]
+        return distances[order], labels[order]
+
+    def _query(self, query_vector: np.ndarray) -> np.ndarray:
+        """Returns the query as float32 rows, unit-normalized for cosine indexes."""
+        query = np.ascontiguousarray(query_vector, dtype="float32").reshape(-1, self._dimension)
+        return normalized(query) if self._is_cosine() else query
+
+    def _results(
+        self, snap: _Snapshot, distances: np.ndarray, indices: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """Materializes ranked result rows from FAISS distances and labels.
+        Cosine indexes report the inner product itself as the score, matching
+        the Chroma backend; L2 indexes map distance d to 1 / (1 + d)."""
+        cosine = self._is_cosine()
         results = []
-        for rank, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.metadata):
-                result = self.metadata[idx].copy()
-                result["similarity_score"] = 1.0 / (1.0 + distance)
-                result["rank"] = rank + 1
+        for distance, idx in zip(distances, indices):
+            if 0 <= idx < snap.rows:
+                result = snap.metadata.row(idx)
+                result["similarity_score"] = float(
+                    distance if cosine else 1.0 / (1.0 + distance)
+                )
+                result["rank"] = len(results) + 1
                 results.append(result)
-        if filters:
-            results = self._apply_filters(results, filters)
         return results
 
+    def _is_cosine(self) -> bool:
+        """Returns whether the index ranks by inner product over unit vectors."""
+        return self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def _is_compressed(self) -> bool:
+        """Returns whether the index stores lossy PQ or scalar-quantized codes."""
+        spec = self._snapshot.metadata.info.get("index_spec") or ""
+        return ",PQ" in spec or ",SQ" in spec
+
+    def _rerank(
+        self, snap: _Snapshot, query: np.ndarray, candidates: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-scores compressed-index candidates against the full-precision
+        vectors in the memory-mapped side store and keeps the exact top k."""
+        rows = candidates[(candidates >= 0) & (candidates < len(snap.vectors))]
+        return self._best(self._exact(snap, query, rows), rows, k)
+
+    def _search_params(
+        self, index: faiss.Index, selector: faiss.IDSelector, admissible: int, k: int,
+        knob: int,
+    ) -> faiss.SearchParameters:
+        """Builds per-call search parameters restricted to the selector, with
+        knob as the IVF nprobe or HNSW efSearch. Nothing is set on the shared
+        index, so concurrent searches at different quality levels never
+        interfere. For IVF indexes nprobe is widened in proportion to filter
+        selectivity so the probed lists are expected to hold at least k
+        admissible rows."""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            nprobe = min(ivf.nlist, knob)
+            if admissible < index.ntotal:
+                needed = int(np.ceil(2 * k * ivf.nlist / admissible))
+                nprobe = min(ivf.nlist, max(nprobe, needed))
+            return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        if _hnsw(index) is not None:
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(knob, k))
+        return faiss.SearchParameters(sel=selector)
+
+    def _knob(self, snap: _Snapshot, quality: Optional[str]) -> int:
+        """Resolves a quality level to the nprobe or efSearch to search with:
+        the value tune_search measured for the current index when there is
+        one, otherwise the configured default scaled by how much of the
+        remaining recall gap the level's target closes."""
+        config = VECTOR_DB_CONFIG["faiss"]
+        levels = config.get("quality", {})
+        default = config.get("default_quality", "balanced")
+        quality = quality or default
+        if quality not in levels:
+            raise ValueError(f"Unsupported search quality: {quality}")
+        tuning = snap.metadata.info.get("search_tuning") or {}
+        if tuning.get("index_spec") == snap.metadata.info.get("index_spec"):
+            if quality in tuning.get("knobs", {}):
+                return tuning["knobs"][quality]
+        base = config["nprobe"] if _hnsw(snap.index) is None else config.get("ef_search", 64)
+        scale = (1.0 - levels.get(default, levels[quality])) / max(1.0 - levels[quality], 1e-3)
+        return max(1, int(round(base * scale)))
+
+    def tune_search(self, k: int = 10, sample_size: int = 200) -> Dict[str, int]:
+        """Measures recall@k of the base index against exact search for a
+        sample of stored vectors used as queries, and stores the smallest
+        nprobe (IVF) or efSearch (HNSW) that meets each configured quality
+        level's recall target. Each query's own row is excluded from both
+        the exact and the measured neighbors, since it would always match
+        itself. Returns the chosen values, or an empty dict for exact flat
+        indexes, which have nothing to tune."""
+        self._check_writable()
+        with self._lock:
+            self._fold()
+        with self._reading() as snap:
+            candidates = self._knob_candidates(snap.index, k)
+            if not candidates:
+                return {}
+            live = np.flatnonzero(~snap.deleted[: snap.base_rows]).astype("int64")
+            if len(live) < 2:
+                return {}
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live, min(sample_size, len(live)), replace=False))
+            queries = self._query(snap.vectors.get(sample))
+            truth = [
+                t[t != row][:k]
+                for t, row in zip(self._exact_knn(snap, queries, live, k + 1)[1], sample)
+            ]
+            admissible = np.zeros(snap.rows, dtype=bool)
+            admissible[live] = True
+            recall = {}
+            for knob in candidates:
+                found = self._search_base(snap, queries, admissible, k + 1, knob)
+                hits = sum(
+                    len(np.intersect1d(t, l[l != row][:k]))
+                    for t, row, (_, l) in zip(truth, sample, found)
+                )
+                recall[knob] = hits / sum(len(t) for t in truth)
+            knobs = {
+                level: next((c for c in candidates if recall[c] >= target), candidates[-1])
+                for level, target in VECTOR_DB_CONFIG["faiss"].get("quality", {}).items()
+            }
+            with self._lock:
+                if self._snapshot.index is snap.index:
+                    self.metadata.info["search_tuning"] = {
+                        "index_spec": self.metadata.info.get("index_spec"),
+                        "k": k, "knobs": knobs,
+                        "recall": {str(c): round(r, 4) for c, r in recall.items()},
+                    }
+                    self._publish()
+                    self.checkpoint()
+        logger.info(f"Tuned {self._collection_name} search knobs: {knobs}")
+        return knobs
+
+    @staticmethod
+    def _knob_candidates(index: faiss.Index, k: int) -> List[int]:
+        """Returns the nprobe or efSearch values tune_search tries, in
+        increasing order of cost."""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            values = [1 << i for i in range(ivf.nlist.bit_length()) if 1 << i < ivf.nlist]
+            return values + [ivf.nlist]
+        if _hnsw(index) is not None:
+            return [max(k, 1 << i) for i in range(4, 11)]
+        return []
+
+    def _exact_knn(
+        self, snap: _Snapshot, queries: np.ndarray, rows: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the exact top-k distances and rows for every query by
+        brute force over the raw vectors of the given rows, which are
+        gathered once and scored against all queries in one FAISS call."""
+        if len(rows) == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.float32), empty.astype("int64")
+        vectors = snap.vectors.get(rows)
+        if self._is_cosine():
+            vectors = normalized(vectors)
+        distances, positions = faiss.knn(
+            queries, vectors, min(k, len(rows)), metric=snap.index.metric_type
+        )
+        return distances, rows[positions]
+
     def get_vector_by_id(self, vector_id: str) -> Optional[np.ndarray]:
-        """Returns None as FAISS does not natively support retrieval
-        of individual vectors by ID."""
-        return None
+        """Returns the stored vector for the given ID from the memory-mapped
+        side store, falling back to reconstruction from the index's direct
+        map, or None if the ID is unknown or deleted."""
+        with self._reading() as snap:
+            row = snap.metadata.find(vector_id)
+            if row is None or row >= snap.rows or snap.deleted[row]:
+                return None
+            if row < len(snap.vectors):
+                return snap.vectors.get(np.array([row]))[0]
+            try:
+                return snap.index.reconstruct(int(row))
+            except RuntimeError:
+                return None
 
     def get_stats(self) -> Dict[str, Any]:
-        """Returns a dictionary of index statistics including total vectors,
+        """Returns a dictionary of index statistics including live vectors,
         dimension, training state, and metadata count."""
-        return {
+        snap = self._snapshot
+        deleted = snap.deleted_count
+        stats = {
             "backend": "faiss",
-            "total_vectors": self.index.ntotal,
-            "dimension": self.index.d,
-            "is_trained": self.index.is_trained,
-            "metadata_count": len(self.metadata),
+            "total_vectors": snap.rows - deleted,
+            "dimension": snap.index.d,
+            "is_trained": snap.index.is_trained,
+            "metadata_count": snap.rows,
+            "index_spec": snap.metadata.info.get("index_spec"),
+            "metric": "cosine" if self._is_cosine() else "l2",
+            "stored_vectors": len(snap.vectors),
+            "deleted_count": deleted,
+            "delta_rows": snap.rows - snap.base_rows,
+            "read_only": self._read_only,
+            "search_knobs": {
+                q: self._knob(snap, q) for q in VECTOR_DB_CONFIG["faiss"].get("quality", {})
+            },
         }
+        if not self._read_only:
+            lag = self._ops - self._checkpointed_ops
+            stats["durability"] = VECTOR_DB_CONFIG["faiss"].get("durability", "interval=30")
+            stats["checkpoint_lag_ops"] = lag
+            stats["checkpoint_lag_seconds"] = (
+                time.time() - self._last_checkpoint if lag else 0.0
+            )
+        if self._log is not None:
+            stats["pending_segments"] = self._log.sealed_count + 1
+            stats["segment_bytes"] = self._log.size_bytes
+        return stats
 
     def rebuild_index(self) -> None:
-        """Rebuilds the FAISS index by removing soft-deleted metadata entries
-        and reinitializing the underlying IVFFlat structure."""
-        valid = [m for m in self.metadata if not m.get("deleted", False)]
-        if not valid:
-            return
-        nlist = VECTOR_DB_CONFIG["faiss"]["nlist"]
-        self.index = faiss.IndexIVFFlat(
-            faiss.IndexFlatL2(self._dimension), self._dimension, nlist
+        """Compacts out deleted rows and rebuilds the index from the stored raw
+        vectors, choosing the index type for the new size and retraining it
+        without re-embedding any images."""
+        self._check_writable()
+        with self._lock:
+            if len(self._vectors) < len(self.metadata):
+                raise RuntimeError(
+                    f"{len(self.metadata) - len(self._vectors)} raw vectors are missing; "
+                    "re-index the collection instead of rebuilding"
+                )
+            keep = ~self.metadata.deleted_mask()
+            vectors = self._vectors.get(np.flatnonzero(keep))
+            metadata = self.metadata.take(keep)
+            self.metadata = metadata
+            index = self._build_index(vectors, np.arange(len(vectors), dtype="int64"))
+            self._swap_generation(index, metadata, vectors)
+        logger.info(
+            f"Rebuilt {self._collection_name}: kept {int(keep.sum())} of {len(keep)} rows"
         )
-        logger.info("Rebuild requires re-embedding; metadata-only reset")
-        self.metadata = valid
-        self._persist()
 
     def clear_database(self) -> None:
-        """Replaces the current index with a fresh empty IVFFlat index
-        and clears all stored metadata."""
-        nlist = VECTOR_DB_CONFIG["faiss"]["nlist"]
-        self.index = faiss.IndexIVFFlat(
-            faiss.IndexFlatL2(self._dimension), self._dimension, nlist
+        """Replaces the current index with a fresh empty index and clears all
+        stored metadata and raw vectors."""
+        self._check_writable()
+        with self._lock:
+            next_id = self.next_id
+            self.metadata = ColumnarMetadataStore()
+            self.metadata.info["next_id"] = next_id
+            self._swap_generation(
+                self._new_index(), self.metadata,
+                np.zeros((0, self._dimension), dtype=np.float32),
+            )
+
+    def _swap_generation(
+        self, index: faiss.Index, metadata: ColumnarMetadataStore, vectors: np.ndarray
+    ) -> None:
+        """Installs a rebuilt index, metadata store, and vector file as a new
+        generation and checkpoints it so older log records are never replayed."""
+        self._wait_for_merge()
+        previous = self._vectors
+        self._generation += 1
+        VectorStore.write(self._vectors_path(self._generation), vectors)
+        self._vectors = VectorStore(self._vectors_path(self._generation), self._dimension)
+        self.metadata = metadata
+        self._publish(index, len(metadata))
+        self.checkpoint()
+        previous.close()
+        previous.path.unlink(missing_ok=True)
+
+    def checkpoint(self) -> None:
+        """Merges all logged segments into a full snapshot synchronously.
+        Writers wait for it; searches keep running on the published snapshot."""
+        self._check_writable()
+        with self._lock:
+            self._wait_for_merge()
+            sealed = self._log.seal() if self._log is not None else None
+            self._write_snapshot(*self._capture_snapshot())
+            if sealed is not None:
+                self._log.discard_through(sealed)
+
+    def close(self) -> None:
+        """Stops the background checkpointer, waits for an index migration
+        in progress, writes a final checkpoint if any mutation is not yet in
+        a snapshot, and releases the writer lock."""
+        self._stop_checkpointer()
+        self._wait_for_migration()
+        if not self._read_only:
+            with self._lock:
+                if self._ops > self._checkpointed_ops:
+                    self.checkpoint()
+                if self._log is not None:
+                    self._log.close()
+            self._writer_lock.release()
+
+    def _stop_checkpointer(self) -> None:
+        """Stops the background checkpointer thread if it is running."""
+        if self._checkpointer is not None:
+            self._closing = True
+            self._checkpoint_due.set()
+            self._checkpointer.join()
+            self._checkpointer = None
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        """Appends a mutation to the segment log and applies the durability
+        policy: "sync" fsyncs the log (or rewrites the snapshot when segment
+        persistence is disabled) before returning, while "every" and
+        "interval" leave the snapshot write to the background checkpointer."""
+        sync = self._durability == "sync"
+        self._ops += 1
+        if self._log is not None:
+            record["generation"] = self._generation
+            self._log.append(record, sync=sync)
+        elif sync:
+            self._persist()
+        if self._durability == "every" and (
+            self._ops - self._checkpointed_ops >= self._durability_n
+        ):
+            self._checkpoint_due.set()
+        threshold = VECTOR_DB_CONFIG["faiss"].get("merge_after_segments", 4)
+        if self._log is not None and self._log.sealed_count >= threshold:
+            self._schedule_merge()
+
+    def _run_checkpointer(self) -> None:
+        """Background loop that checkpoints on the configured interval, or
+        whenever the "every" policy's mutation count is reached, so request
+        threads never wait on snapshot I/O."""
+        timeout = self._durability_n if self._durability == "interval" else None
+        while True:
+            self._checkpoint_due.wait(timeout)
+            self._checkpoint_due.clear()
+            if self._closing:
+                return
+            with self._lock:
+                if self._ops > self._checkpointed_ops:
+                    self._schedule_merge()
+
+    def _schedule_merge(self) -> None:
+        """Starts a background merge of sealed segments (or a plain snapshot
+        write without a segment log) unless one is already running. Must be
+        called with the write lock held."""
+        if self._merge_thread is not None and self._merge_thread.is_alive():
+            return
+        sealed = self._log.seal() if self._log is not None else None
+        snapshot = self._capture_snapshot()
+        self._merge_thread = threading.Thread(
+            target=self._merge, args=(sealed, snapshot),
+            name=f"faiss-merge-{self._collection_name}", daemon=True,
+        )
+        self._merge_thread.start()
+
+    def _merge(self, sealed: Optional[int], snapshot: tuple) -> None:
+        """Writes a captured snapshot to disk and drops the segments it covers."""
+        try:
+            self._write_snapshot(*snapshot)
+            if sealed is not None:
+                self._log.discard_through(sealed)
+        except Exception as e:
+            logger.error(f"Segment merge failed for {self._collection_name}: {e}")
+
+    def _wait_for_merge(self) -> None:
+        """Blocks until any in-flight background merge has finished."""
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+
+    def _capture_snapshot(self) -> tuple:
+        """Exports the metadata columns in memory and pairs them with the
+        published base index, which is pinned against in-place folds until
+        _write_snapshot() has serialized it, so both can be written to disk
+        without holding the lock. Delta rows are recovered from the raw
+        vector store on load."""
+        snap = self._pin()
+        try:
+            self.metadata.info["generation"] = self._generation
+            self.metadata.info["base_rows"] = snap.base_rows
+            return (snap.index,) + self.metadata.export() + (self._ops,)
+        except BaseException:
+            self._unpin()
+            raise
+
+    def _write_snapshot(
+        self, index: faiss.Index, arrays: Dict[str, np.ndarray],
+        manifest: Dict[str, Any], ops: int,
+    ) -> None:
+        """Atomically replaces the index and metadata store on disk, after
+        making sure the raw vectors they reference are durable, and records
+        how many mutations the snapshot covers. The index is written into the
+        metadata directory, so both are swapped in by a single rename and a
+        crash can never pair an index with another checkpoint's base_rows.
+        Releases the pin taken by _capture_snapshot()."""
+        try:
+            index_bytes = faiss.serialize_index(index)
+        finally:
+            self._unpin()
+        self._vectors.flush()
+        ColumnarMetadataStore.write(
+            self._meta_dir, arrays, manifest, files={_INDEX_FILE: index_bytes.tobytes()}
         )
-        self.metadata = []
-        self._persist()
+        self._index_path = self._meta_dir / _INDEX_FILE
+        self._legacy_index_path.unlink(missing_ok=True)
+        self._checkpointed_ops = max(self._checkpointed_ops, ops)
+        self._last_checkpoint = time.time()
 
     def _persist(self) -> None:
         """Writes the FAISS index and metadata to their respective files
         on disk for persistence."""
-        faiss.write_index(self.index, str(self._index_path))
-        with open(self._meta_path, "wb") as f:
-            pickle.dump(self.metadata, f)
+        self._wait_for_merge()
+        self._write_snapshot(*self._capture_snapshot())
@@ -0,0 +1,129 @@
+"""Size-adaptive FAISS index selection and construction."""
+import math
+import logging
+import numpy as np
+from typing import Dict, Any, Optional
+
+import faiss
+
+logger = logging.getLogger(__name__)
+
+
+def ivf_nlist(n: int) -> int:
+    """Returns the IVF list count for n vectors: about 4 * sqrt(n), capped so
+    every centroid still gets at least 39 training points."""
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def select_index_spec(n: int, config: Dict[str, Any]) -> str:
+    """Chooses a FAISS factory string for a collection of n live vectors.
+    An explicit ``index_type`` other than "auto" is used verbatim (with an
+    optional ``{nlist}`` placeholder); otherwise small collections use exact
+    flat search, mid-sized ones IVF, and large ones HNSW or IVF-PQ. With
+    ``compression`` set, every non-flat tier stores SQ8 or PQ codes instead
+    of full vectors; search re-ranks against the raw vector side store."""
+    index_type = config.get("index_type", "auto")
+    if index_type != "auto":
+        return index_type.format(nlist=ivf_nlist(max(n, 1)))
+    if n < config.get("flat_threshold", 10_000):
+        return "IDMap2,Flat"
+    codec = _compression_codec(config)
+    if codec is not None:
+        return f"IVF{ivf_nlist(n)},{codec}"
+    if n < config.get("large_threshold", 1_000_000):
+        return f"IVF{ivf_nlist(n)},Flat"
+    if config.get("large_index", "hnsw") == "ivf_pq":
+        return f"IVF{ivf_nlist(n)},{_pq_codec(config)}"
+    return f"IDMap2,HNSW{config.get('hnsw_m', 32)}"
+
+
+def _compression_codec(config: Dict[str, Any]) -> Optional[str]:
+    """Returns the factory codec for the configured compression mode."""
+    compression = config.get("compression")
+    if compression is None:
+        return None
+    if compression == "sq8":
+        return "SQ8"
+    if compression == "pq":
+        return _pq_codec(config)
+    raise ValueError(f"Unsupported FAISS compression: {compression}")
+
+
+def _pq_codec(config: Dict[str, Any]) -> str:
+    """Returns the product-quantizer codec (pq_m sub-vectors of pq_nbits each)."""
+    return f"PQ{config.get('pq_m', 64)}x{config.get('pq_nbits', 8)}"
+
+
+def metric_type(config: Dict[str, Any]) -> int:
+    """Returns the FAISS metric for the configured ``metric``: "l2" for
+    Euclidean distance or "cosine" for inner product over unit vectors."""
+    metric = config.get("metric", "l2")
+    if metric == "l2":
+        return faiss.METRIC_L2
+    if metric == "cosine":
+        return faiss.METRIC_INNER_PRODUCT
+    raise ValueError(f"Unsupported FAISS metric: {metric}")
+
+
+def needs_migration(
+    current_spec: Optional[str], trained_rows: int, n: int, config: Dict[str, Any]
+) -> bool:
+    """Returns whether an index built as current_spec for trained_rows vectors
+    should be rebuilt now that the collection holds n live vectors. IVF indexes
+    are retrained only after the collection grows by ``regrow_factor``, so
+    nlist changes do not trigger a rebuild on every insert."""
+    if current_spec is None:
+        return True
+    target = select_index_spec(n, config)
+    if target == current_spec:
+        return False
+    if _family(target) != _family(current_spec):
+        return True
+    return n >= trained_rows * config.get("regrow_factor", 4)
+
+
+def _family(spec: str) -> str:
+    """Strips list counts from a factory string so IVF256,Flat and IVF512,Flat
+    compare as the same kind of index."""
+    return "".join(ch for ch in spec if not ch.isdigit())
+
+
+def build_index(
+    spec: str, dimension: int, vectors: np.ndarray, ids: np.ndarray,
+    config: Dict[str, Any],
+) -> faiss.Index:
+    """Creates an index from a factory string, trains it on a random sample
+    of the given vectors, and adds them under the given ids. Inner-product
+    indexes get unit-normalized copies of the vectors."""
+    index = faiss.index_factory(dimension, spec, metric_type(config))
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        vectors = normalized(vectors)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    if len(vectors) and not index.is_trained:
+        index.train(training_sample(vectors, ivf.nlist if ivf is not None else 1, config))
+    if len(vectors):
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+    logger.info(f"Built FAISS index {spec} over {len(vectors)} vectors")
+    return index
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    """Returns a contiguous float32 copy of the vectors scaled to unit length."""
+    out = np.array(vectors, dtype=np.float32, order="C", copy=True)
+    faiss.normalize_L2(out)
+    return out
+
+
+def training_sample(
+    vectors: np.ndarray, nlist: int, config: Dict[str, Any]
+) -> np.ndarray:
+    """Returns a uniform random sample of ``train_points_per_list`` vectors per
+    inverted list (at least 256 * 39 for PQ codebooks), or all vectors when
+    the collection is smaller than that."""
+    size = max(nlist * config.get("train_points_per_list", 64), 256 * 39)
+    if len(vectors) <= size:
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+    rows = np.sort(np.random.default_rng(0).choice(len(vectors), size, replace=False))
+    return np.ascontiguousarray(vectors[rows], dtype=np.float32)
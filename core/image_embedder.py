@@ -1,57 +1,157 @@
-"""Image embedding generation using CLIP or ResNet."""
-import torch
-import torchvision.transforms as transforms
+"""Image embedding generation using CLIP or ResNet.
+
+torch, torchvision, and clip are imported only when a model is first
+needed, so importing this module (and everything that depends on it) stays
+cheap for processes that never encode an image.
+"""
+import threading
 from PIL import Image
 import numpy as np
-from typing import List
-import clip
-import torchvision.models as models
+from typing import Any, Iterator, List, Sequence, Tuple
 from config.settings import MODEL_CONFIG
+from core.decode_pipeline import DecodePipeline
+from core.inference_backend import (
+    check_config, compile_module, is_eager_fp32, served_variant, variant,
+)
+from core.model_registry import model_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class ImageEmbedder:
-    """Generate embeddings for images using CLIP or ResNet."""
+    """Generate embeddings for images using CLIP or ResNet. The model is
+    loaded on first use, or up front by calling warmup()."""
 
     def __init__(self, model_type: str = "clip"):
-        """Initializes the image embedder by selecting and loading the
-        specified model type (CLIP or ResNet)."""
+        """Initializes the image embedder for the specified model type (CLIP
+        or ResNet) without loading the model."""
+        if model_type == "clip":
+            model_name = MODEL_CONFIG["clip"]["model_name"]
+            self.dimension = 512 if "ViT-B" in model_name else 768
+        elif model_type == "resnet":
+            self.dimension = 2048
+        else:
+            raise ValueError(f"Unsupported model type: {model_type}")
+        check_config(MODEL_CONFIG[model_type], model_type)
         self.model_type = model_type
-        self.device = torch.device(MODEL_CONFIG["clip"]["device"])
-        self._load_model()
+        self.device_name = MODEL_CONFIG["clip"]["device"]
+        self._loaded = None
+        self._model_key = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        """Returns the underlying model, loading it on first access."""
+        return self._ensure_loaded()[0]
+
+    @property
+    def preprocess(self) -> Any:
+        """Returns the model's image preprocessing transform, loading the
+        model on first access."""
+        return self._ensure_loaded()[1]
+
+    @property
+    def device(self) -> "torch.device":
+        """Returns the torch device the model runs on."""
+        import torch
+        return torch.device(self.device_name)
+
+    @property
+    def model_version(self) -> str:
+        """Identifies the weights and inference variant producing this
+        embedder's vectors, e.g. "ViT-B/32:fp32". Whether a compiled variant
+        passed its tolerance check is only known once it has loaded, so for
+        one this loads the model; eager fp32 never does."""
+        config = MODEL_CONFIG[self.model_type]
+        if is_eager_fp32(config):
+            return f"{config['model_name']}:fp32"
+        self._ensure_loaded()
+        return f"{config['model_name']}:{served_variant(config, self._compiled_name)}"
 
-    def _load_model(self):
+    @property
+    def _compiled_name(self) -> str:
+        """Returns the name the model is compiled and cached under."""
+        return f"{self.model_type}-{MODEL_CONFIG[self.model_type]['model_name']}"
+
+    @property
+    def is_loaded(self) -> bool:
+        """Returns whether the model has been loaded."""
+        return self._loaded is not None
+
+    def warmup(self) -> None:
+        """Loads the model now instead of on the first request."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> tuple:
+        """Returns the (model, preprocess) pair, taking a reference on the
+        shared registry entry the first time it is needed."""
+        loaded = self._loaded
+        if loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    self._loaded = self._load_model()
+                loaded = self._loaded
+        return loaded
+
+    def _load_model(self) -> tuple:
         """Dispatches model loading to the appropriate loader based on
         the configured model type."""
         if self.model_type == "clip":
-            self._load_clip()
-        elif self.model_type == "resnet":
-            self._load_resnet()
-        else:
-            raise ValueError(f"Unsupported model type: {self.model_type}")
+            model_name = MODEL_CONFIG["clip"]["model_name"]
+            return self._acquire(MODEL_CONFIG["clip"], lambda: self._build_clip(model_name))
+        return self._acquire(MODEL_CONFIG["resnet"], self._build_resnet)
 
-    def _load_clip(self):
+    def _acquire(self, config: dict, loader) -> tuple:
+        """Takes a reference on the shared (model, preprocess) pair for this
+        model, device, and backend/precision, loading it only on first use."""
+        self._model_key = (
+            f"{self.model_type}:{config['model_name']}", self.device_name, variant(config),
+        )
+        return model_registry.acquire(self._model_key, loader)
+
+    def close(self) -> None:
+        """Releases this embedder's reference on its shared model."""
+        with self._lock:
+            key, self._model_key, self._loaded = self._model_key, None, None
+        if key is not None:
+            model_registry.release(key)
+
+    def _build_clip(self, model_name: str) -> tuple:
         """Loads the CLIP model and its preprocessing pipeline onto
-        the configured device."""
-        model_name = MODEL_CONFIG["clip"]["model_name"]
-        self.model, self.preprocess = clip.load(model_name, device=self.device)
-        self.model.eval()
-        self.dimension = 512 if "ViT-B" in model_name else 768
+        the configured device, converting both encoders to the configured
+        inference backend."""
+        import clip
+        model, preprocess = clip.load(model_name, device=self.device)
+        model.eval()
         logger.info(f"CLIP model loaded: {model_name}")
+        size = model.visual.input_resolution
+        model = compile_module(model, {
+            "encode_image": (self._probe_images(size).to(self.device),),
+            "encode_text": (clip.tokenize(["a photo of a red running shoe"]).to(self.device),),
+        }, MODEL_CONFIG["clip"], self._compiled_name)
+        return model, preprocess
+
+    @staticmethod
+    def _probe_images(size: int) -> "torch.Tensor":
+        """Returns a fixed pseudo-random image batch, on the CPU, for export
+        and for checking a compiled model against the eager one."""
+        import torch
+        generator = torch.Generator().manual_seed(0)
+        return torch.rand(2, 3, size, size, generator=generator)
 
-    def _load_resnet(self):
+    def _build_resnet(self) -> tuple:
         """Loads a pretrained ResNet model and sets up the image
         preprocessing transforms for inference."""
+        import torchvision.models as models
+        import torchvision.transforms as transforms
         model_name = MODEL_CONFIG["resnet"]["model_name"]
-        self.model = models.__dict__[model_name](
+        model = models.__dict__[model_name](
             pretrained=MODEL_CONFIG["resnet"]["pretrained"]
         )
-        self.model = self.model.to(self.device)
-        self.model.eval()
-        self.dimension = 2048
-        self.preprocess = transforms.Compose([
+        model = model.to(self.device)
+        model.eval()
+        preprocess = transforms.Compose([
             transforms.Resize(256), transforms.CenterCrop(224),
             transforms.ToTensor(),
             transforms.Normalize(
@@ -59,46 +159,88 @@ class ImageEmbedder:
             ),
         ])
         logger.info(f"ResNet model loaded: {model_name}")
+        model = compile_module(
+            model, {"forward": (self._probe_images(224).to(self.device),)},
+            MODEL_CONFIG["resnet"], self._compiled_name,
+        )
+        return model, preprocess
 
     def encode_image(self, image_path: str) -> np.ndarray:
         """Encodes a single image file into a normalized embedding vector,
         returning a zero vector on failure."""
         try:
-            image = Image.open(image_path).convert("RGB")
-            image = self.preprocess(image).unsqueeze(0).to(self.device)
-            with torch.no_grad():
-                if self.model_type == "clip":
-                    feat = self.model.encode_image(image)
-                    feat = feat / feat.norm(dim=-1, keepdim=True)
-                else:
-                    feat = self.model(image)
-                    feat = torch.nn.functional.adaptive_avg_pool2d(feat, (1, 1))
-                    feat = feat.view(feat.size(0), -1)
-            return feat.cpu().numpy().flatten()
+            return self._forward(self._load_image(image_path).unsqueeze(0))[0]
         except Exception as e:
             logger.error(f"Failed to encode image {image_path}: {e}")
             return np.zeros(self.dimension)
 
     def encode_images_batch(
         self, image_paths: List[str], batch_size: int = 32
-    ) -> List[np.ndarray]:
-        """Encodes a list of images into embedding vectors by processing
-        them in batches of the specified size."""
-        embeddings = []
-        for i in range(0, len(image_paths), batch_size):
-            for path in image_paths[i : i + batch_size]:
-                embeddings.append(self.encode_image(path))
+    ) -> np.ndarray:
+        """Encodes images batch_size at a time, stacking each batch's
+        preprocessed tensors and running a single forward pass per batch.
+        Returns one contiguous (n, dimension) float32 array in input order;
+        images that fail to load or encode are left as zero rows."""
+        embeddings = np.zeros((len(image_paths), self.dimension), dtype=np.float32)
+        for rows, batch in self.iter_batches(image_paths, batch_size):
+            embeddings[rows] = batch
         return embeddings
 
+    def iter_batches(
+        self, image_paths: Sequence[str], batch_size: int = 32
+    ) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """Streams (rows, embeddings) for full batches of images, where rows
+        index into image_paths. Decoding and preprocessing run on the
+        configured worker pool, prefetching ahead while the model runs;
+        images that fail are logged and omitted from the rows."""
+        config = MODEL_CONFIG.get("image_pipeline", {})
+        pipeline = DecodePipeline(
+            self._load_image,
+            workers=config.get("decode_workers", 4),
+            prefetch_batches=config.get("prefetch_batches", 2),
+        )
+        import torch
+        for rows, tensors in pipeline.batches(image_paths, batch_size):
+            try:
+                yield rows, self._forward(torch.stack(tensors))
+            except Exception as e:
+                logger.error(f"Failed to encode image batch at row {rows[0]}: {e}")
+
+    def _load_image(self, image_path: str) -> "torch.Tensor":
+        """Decodes an image file and applies the model's preprocessing,
+        returning a single (C, H, W) tensor."""
+        with Image.open(image_path) as image:
+            return self.preprocess(image.convert("RGB"))
+
+    def _forward(self, batch: "torch.Tensor") -> np.ndarray:
+        """Runs one forward pass over a stacked (N, C, H, W) batch and
+        returns the (N, dimension) float32 features, L2-normalized for CLIP
+        and average-pooled for ResNet."""
+        import torch
+        model = self.model
+        batch = batch.to(self.device)
+        with torch.no_grad():
+            if self.model_type == "clip":
+                feat = model.encode_image(batch)
+                feat = feat / feat.norm(dim=-1, keepdim=True)
+            else:
+                feat = model(batch)
+                feat = torch.nn.functional.adaptive_avg_pool2d(feat, (1, 1))
+                feat = feat.view(feat.size(0), -1)
+        return feat.float().cpu().numpy()
+
     def encode_text(self, text: str) -> np.ndarray:
         """Encodes a text string into an embedding vector using the CLIP
         text encoder; raises an error for non-CLIP model types."""
         if self.model_type != "clip":
             raise ValueError("Text encoding only available for CLIP model")
         try:
+            import clip
+            import torch
+            model = self.model
             tokens = clip.tokenize([text]).to(self.device)
             with torch.no_grad():
-                feat = self.model.encode_text(tokens)
+                feat = model.encode_text(tokens)
                 feat = feat / feat.norm(dim=-1, keepdim=True)
             return feat.cpu().numpy().flatten()
         except Exception as e:
@@ -0,0 +1,305 @@
+"""CPU inference backends for the embedding models.
+
+Each model in MODEL_CONFIG selects a ``backend`` ("torch", "torchscript",
+or "onnx") and a ``precision`` ("fp32", or "int8" for dynamic quantization).
+Exported models are cached under the models cache directory and reused on
+later starts. After loading, the result is compared with the eager fp32
+model on a fixed probe input. If it falls below ``min_cosine`` it is
+discarded in favour of the eager model, so vectors stay comparable with
+existing indexes; served_variant() reports which one is in use.
+
+torch, onnxruntime, and sentence_transformers are imported only when a
+model is actually compiled.
+"""
+import logging
+import os
+import platform
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from config.settings import MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "torchscript", "onnx")
+PRECISIONS = ("fp32", "int8")
+
+# Probe sentences used to check a compiled text model against the eager one.
+TEXT_PROBES = ("red running shoes", "leather boots with a zigzag sole")
+
+# Variant actually serving each compiled model, keyed by (name, configured
+# variant); "fp32" when the tolerance check fell back to the eager model.
+_served: Dict[Tuple[str, str], str] = {}
+
+
+def check_config(config: Dict[str, Any], name: str) -> None:
+    """Raises ValueError if a model's backend or precision is unknown or
+    not usable on its device. Quantization and ONNX Runtime are CPU-only."""
+    backend = config.get("backend", "torch")
+    precision = config.get("precision", "fp32")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend for {name}: {backend}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision for {name}: {precision}")
+    if (backend == "onnx" or precision == "int8") and config.get("device", "cpu") != "cpu":
+        raise ValueError(f"{backend}/{precision} inference for {name} requires device 'cpu'")
+
+
+def variant(config: Dict[str, Any]) -> str:
+    """Returns the precision part of a model's registry key, qualified with
+    the backend when it is not eager torch (e.g. "fp32", "onnx-int8")."""
+    backend = config.get("backend", "torch")
+    precision = config.get("precision", "fp32")
+    return precision if backend == "torch" else f"{backend}-{precision}"
+
+
+def is_eager_fp32(config: Dict[str, Any]) -> bool:
+    """Returns whether a model runs as the unmodified eager fp32 model."""
+    return variant(config) == "fp32"
+
+
+def min_cosine(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Returns the lowest row-wise cosine similarity between two batches of
+    embeddings, which is how closely the candidate reproduces the reference."""
+    a = np.asarray(reference, dtype=np.float32).reshape(len(reference), -1)
+    b = np.asarray(candidate, dtype=np.float32).reshape(len(candidate), -1)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return float(np.min(np.sum(a * b, axis=1)))
+
+
+def served_variant(config: Dict[str, Any], name: str) -> str:
+    """Returns the variant the named model runs as: the configured one, or
+    "fp32" if its last load fell back to the eager model."""
+    configured = variant(config)
+    return _served.get((name, configured), configured)
+
+
+def _settings() -> Dict[str, Any]:
+    """Returns the shared inference settings."""
+    return MODEL_CONFIG.get("inference", {})
+
+
+def _cache_path(name: str) -> Path:
+    """Returns the cache path prefix for an exported model."""
+    directory = Path(_settings()["cache_dir"])
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / name.replace("/", "-").replace(":", "-")
+
+
+def compile_module(
+    model: Any, methods: Dict[str, Tuple[Any, ...]], config: Dict[str, Any], name: str,
+) -> Any:
+    """Returns model converted to its configured backend and precision.
+    methods maps each entry point the embedder calls (e.g. "encode_image",
+    or "forward" for a plain module) to example inputs. The inputs are used
+    for tracing or export and for the tolerance check, and must already be
+    on the model's configured device. The result exposes the same methods,
+    taking and returning torch tensors."""
+    check_config(config, name)
+    if is_eager_fp32(config):
+        return model
+    backend, precision = config.get("backend", "torch"), config.get("precision", "fp32")
+    if backend == "onnx":
+        compiled = _onnx(model, methods, _cache_path(name), precision)
+    else:
+        quantized = _quantize(model) if precision == "int8" else model
+        compiled = (
+            quantized if backend == "torch"
+            else _torchscript(
+                quantized, methods, _cache_path(name), precision, config.get("device", "cpu")
+            )
+        )
+    return _checked(model, compiled, methods, name, variant(config))
+
+
+def _checked(
+    model: Any, compiled: Any, methods: Dict[str, Tuple[Any, ...]], name: str, label: str,
+) -> Any:
+    """Returns compiled if it reproduces the eager model on every example
+    input, otherwise logs the mismatch and returns the eager model. The
+    outcome is recorded for served_variant()."""
+    import torch
+    threshold = _settings().get("min_cosine", 0.99)
+    with torch.no_grad():
+        for method, inputs in methods.items():
+            reference = getattr(model, method)(*inputs).float().cpu().numpy()
+            candidate = getattr(compiled, method)(*inputs).float().cpu().numpy()
+            score = min_cosine(reference, candidate)
+            if score < threshold:
+                logger.warning(
+                    f"{name} {label} {method} drifts from fp32 (cosine {score:.4f} < "
+                    f"{threshold}); using the eager fp32 model"
+                )
+                _served[(name, label)] = "fp32"
+                return model
+    logger.info(f"{name} running on {label}")
+    _served[(name, label)] = label
+    return compiled
+
+
+def _quantize(model: Any) -> Any:
+    """Returns a copy of model with its Linear layers dynamically quantized
+    to int8."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _torchscript(
+    model: Any, methods: Dict[str, Tuple[Any, ...]], path: Path, precision: str,
+    device: str,
+) -> Any:
+    """Traces the given methods into one TorchScript module, or loads it from
+    the cache if it was traced before, onto the given device."""
+    import torch
+    target = path.parent / f"{path.name}.{precision}.pt"
+    if not target.exists():
+        with torch.no_grad():
+            traced = torch.jit.trace_module(model, methods)
+        tmp = target.with_suffix(".tmp")
+        torch.jit.save(traced, str(tmp))
+        os.replace(tmp, target)
+        logger.info(f"Exported TorchScript model to {target}")
+    return torch.jit.load(str(target), map_location=device)
+
+
+def _onnx(
+    model: Any, methods: Dict[str, Tuple[Any, ...]], path: Path, precision: str,
+) -> "OnnxModule":
+    """Exports each method to its own ONNX graph with a dynamic batch axis,
+    quantizing weights to int8 with ONNX Runtime if requested, and opens
+    them from the cache."""
+    paths = {}
+    for method, inputs in methods.items():
+        target = path.parent / f"{path.name}.{method}.{precision}.onnx"
+        if not target.exists():
+            fp32 = path.parent / f"{path.name}.{method}.fp32.onnx"
+            if not fp32.exists():
+                _export_onnx(model, method, inputs, fp32)
+            if precision == "int8":
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                tmp = target.with_suffix(".tmp")
+                quantize_dynamic(str(fp32), str(tmp), weight_type=QuantType.QInt8)
+                os.replace(tmp, target)
+        paths[method] = target
+    return OnnxModule(paths, _settings().get("onnx_threads"))
+
+
+def _export_onnx(model: Any, method: str, inputs: Tuple[Any, ...], target: Path) -> None:
+    """Exports one method of model to an ONNX file."""
+    import torch
+
+    class _Method(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.inner = model
+
+        def forward(self, *args):
+            return getattr(self.inner, method)(*args)
+
+    names = [f"input_{i}" for i in range(len(inputs))]
+    tmp = target.with_suffix(".tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            _Method().eval(), inputs, str(tmp),
+            input_names=names, output_names=["output"],
+            dynamic_axes={**{n: {0: "batch"} for n in names}, "output": {0: "batch"}},
+            opset_version=17,
+        )
+    os.replace(tmp, target)
+    logger.info(f"Exported ONNX model to {target}")
+
+
+class OnnxModule:
+    """Runs exported ONNX graphs on the CPU behind the eager model's method
+    names, taking and returning torch tensors; calling the module runs
+    "forward"."""
+
+    def __init__(self, paths: Dict[str, Path], threads: int = None):
+        """Opens one ONNX Runtime session per exported method."""
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self._sessions = {
+            method: ort.InferenceSession(str(p), options, providers=["CPUExecutionProvider"])
+            for method, p in paths.items()
+        }
+
+    def __getattr__(self, method: str):
+        """Returns a runner for an exported method."""
+        sessions = self.__dict__.get("_sessions", {})
+        if method not in sessions:
+            raise AttributeError(method)
+        return lambda *inputs: self.run(method, *inputs)
+
+    def __call__(self, *inputs):
+        """Runs the exported forward method."""
+        return self.run("forward", *inputs)
+
+    def run(self, method: str, *inputs):
+        """Feeds torch tensors to the method's session and returns its first
+        output as a torch tensor."""
+        import torch
+        session = self._sessions[method]
+        feeds = {
+            arg.name: tensor.detach().cpu().numpy()
+            for arg, tensor in zip(session.get_inputs(), inputs)
+        }
+        return torch.from_numpy(session.run(None, feeds)[0])
+
+
+def sentence_transformer(name: str, device: str, config: Dict[str, Any]) -> Any:
+    """Loads a sentence-transformer model on its configured backend. int8
+    on torch quantizes the eager model. onnx uses the library's own ONNX
+    backend, which needs sentence-transformers>=3.2 and
+    optimum[onnxruntime]; the export and any int8 variant are cached. The
+    result falls back to the eager model if it drifts on the probe
+    sentences, which served_variant() then reports."""
+    from sentence_transformers import SentenceTransformer
+    check_config({"device": device, **config}, name)
+    backend, precision = config.get("backend", "torch"), config.get("precision", "fp32")
+    if backend == "torchscript":
+        raise ValueError(f"TorchScript is not supported for {name}; use 'onnx'")
+    model = SentenceTransformer(name, device=device)
+    if is_eager_fp32(config):
+        return model
+    if backend == "torch":
+        compiled = _quantize(model)
+    else:
+        compiled = _onnx_sentence_transformer(name, device, precision)
+    reference = model.encode(list(TEXT_PROBES))
+    score = min_cosine(reference, compiled.encode(list(TEXT_PROBES)))
+    threshold = _settings().get("min_cosine", 0.99)
+    if score < threshold:
+        logger.warning(
+            f"{name} {variant(config)} drifts from fp32 (cosine {score:.4f} < "
+            f"{threshold}); using the eager fp32 model"
+        )
+        _served[(name, variant(config))] = "fp32"
+        return model
+    logger.info(f"{name} running on {variant(config)}")
+    _served[(name, variant(config))] = variant(config)
+    return compiled
+
+
+def _onnx_sentence_transformer(name: str, device: str, precision: str) -> Any:
+    """Exports a sentence-transformer to ONNX once, plus an int8 copy for
+    this CPU architecture, and loads the requested file from the cache."""
+    from sentence_transformers import SentenceTransformer
+    path = _cache_path(f"sentence_transformer-{name}-onnx")
+    if not (path / "onnx" / "model.onnx").exists():
+        SentenceTransformer(name, device=device, backend="onnx").save(str(path))
+    file_name = "onnx/model.onnx"
+    if precision == "int8":
+        arch = "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx2"
+        file_name = f"onnx/model_qint8_{arch}.onnx"
+        if not (path / file_name).exists():
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            fp32 = SentenceTransformer(str(path), device=device, backend="onnx")
+            export_dynamic_quantized_onnx_model(fp32, arch, str(path))
+    return SentenceTransformer(
+        str(path), device=device, backend="onnx", model_kwargs={"file_name": file_name}
+    )
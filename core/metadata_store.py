@@ -0,0 +1,590 @@
+"""Columnar, memory-mapped metadata store for vector database rows."""
+import copy
+import json
+import os
+import shutil
+import hashlib
+import logging
+import uuid
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Coded columns: the metadata categories plus the other keys QueryProcessor
+# turns into filters, so every filter it emits is evaluated on integer codes.
+CATEGORICAL_COLUMNS = ("brand", "pattern", "shape", "size", "color", "style")
+STRING_COLUMNS = ("vector_id", "filename", "original_path")
+_EXTRA = "extra"
+_DELETED = "deleted"
+_MANIFEST = "manifest.json"
+
+
+def _id_hash(vector_id: Optional[str]) -> int:
+    """Returns a stable 64-bit hash of a vector ID (0 for an unset ID)."""
+    if vector_id is None:
+        return 0
+    digest = hashlib.blake2b(vector_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _write_synced(path: Path, write) -> None:
+    """Creates path, fills it by calling write with the open binary file,
+    and fsyncs it."""
+    with open(path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    """Fsyncs a directory so the entries created or renamed in it are
+    durable. Platforms that cannot open directories are skipped."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Rows per page of an _ArrayColumn: an edit copies at most one page.
+_PAGE_ROWS = 1 << 14
+
+
+class _ArrayColumn:
+    """Fixed-width column stored as pages of _PAGE_ROWS rows, which start
+    as views of a (possibly memory-mapped) base array. Appends fill the last
+    page and add new ones, so rows already mapped stay mapped. Pages handed
+    out by freeze() are copied before they are overwritten, so an edit
+    after a publish costs one page, not the whole column."""
+
+    def __init__(self, base: np.ndarray):
+        """Wraps the base array, all of whose rows are live."""
+        self._base = base
+        self._pages = [base[i : i + _PAGE_ROWS] for i in range(0, len(base), _PAGE_ROWS)]
+        self._owned = [True] * len(self._pages)
+        self._size = len(base)
+        self._frozen = False
+        self._joined: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        """Returns the total number of values in the column."""
+        return self._size
+
+    def get(self, i: int) -> Any:
+        """Returns the value stored at row i."""
+        page, offset = divmod(i, _PAGE_ROWS)
+        return self._pages[page][offset]
+
+    def _own(self, page: int, capacity: int) -> np.ndarray:
+        """Replaces a page shared with a frozen copy, or one too short for
+        capacity rows, with a private copy and returns it."""
+        data = self._pages[page]
+        if not self._owned[page] or len(data) < capacity:
+            fresh = np.empty(max(capacity, len(data)), dtype=data.dtype)
+            fresh[: len(data)] = data
+            self._pages[page], self._owned[page], data = fresh, True, fresh
+            self._base = None
+        return data
+
+    def set(self, i: int, value: Any) -> None:
+        """Overwrites the value at row i; memory-mapped rows are written
+        copy-on-write, and a page visible to a frozen copy is first copied."""
+        page, offset = divmod(i, _PAGE_ROWS)
+        self._own(page, 0)[offset] = value
+
+    def append(self, value: Any) -> None:
+        """Appends a value, starting a new page when the last one is full."""
+        page, offset = divmod(self._size, _PAGE_ROWS)
+        if page == len(self._pages):
+            dtype = self._pages[-1].dtype if self._pages else self._base.dtype
+            self._pages.append(np.empty(_PAGE_ROWS, dtype=dtype))
+            self._owned.append(True)
+            self._base = None
+        data = self._pages[page]
+        if offset >= len(data):
+            data = self._own(page, _PAGE_ROWS)
+        data[offset] = value
+        self._size += 1
+
+    def freeze(self) -> "_ArrayColumn":
+        """Returns a column fixed at the current rows. It shares this
+        column's pages: appends land beyond its rows, and the next set()
+        of one of its rows copies that page first."""
+        frozen = _ArrayColumn.__new__(_ArrayColumn)
+        frozen._base, frozen._pages, frozen._size = self._base, list(self._pages), self._size
+        frozen._owned = [False] * len(self._pages)
+        frozen._frozen, frozen._joined = True, None
+        self._owned = [False] * len(self._pages)
+        return frozen
+
+    def array(self) -> np.ndarray:
+        """Returns the live rows as one read-only array: a view of the base
+        array while no page has been replaced or added, otherwise the pages
+        joined, which a frozen column computes once."""
+        if self._base is not None:
+            view = self._base[: self._size].view(np.ndarray)
+        elif self._joined is not None:
+            return self._joined
+        else:
+            view = self.values()
+            if self._frozen:
+                self._joined = view
+        view.flags.writeable = False
+        return view
+
+    def values(self) -> np.ndarray:
+        """Returns the full column as a new, independent array."""
+        if self._base is not None:
+            return np.array(self._base[: self._size])
+        return np.concatenate(self._pages)[: self._size]
+
+
+class _StringColumn:
+    """Variable-width UTF-8 column stored as start/end offsets into a byte
+    buffer. Rewritten values are appended to a heap and re-pointed, so a
+    memory-mapped buffer is never modified in place."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, data: np.ndarray):
+        """Wraps the offset arrays and byte buffer of a persisted column."""
+        self._starts = _ArrayColumn(starts)
+        self._ends = _ArrayColumn(ends)
+        self._data = data
+        self._heap = bytearray()
+
+    def __len__(self) -> int:
+        """Returns the total number of values in the column."""
+        return len(self._starts)
+
+    def get(self, i: int) -> Optional[str]:
+        """Decodes the value at row i, or returns None when it is unset."""
+        start, end = int(self._starts.get(i)), int(self._ends.get(i))
+        if start < 0:
+            return None
+        n = len(self._data)
+        if start >= n:
+            return self._heap[start - n : end - n].decode("utf-8")
+        return self._data[start:end].tobytes().decode("utf-8")
+
+    def _store(self, value: Optional[str]) -> Tuple[int, int]:
+        """Appends the encoded value to the heap and returns its bounds."""
+        if value is None:
+            return -1, -1
+        raw = value.encode("utf-8")
+        start = len(self._data) + len(self._heap)
+        self._heap.extend(raw)
+        return start, start + len(raw)
+
+    def set(self, i: int, value: Optional[str]) -> None:
+        """Replaces the value at row i."""
+        start, end = self._store(value)
+        self._starts.set(i, start)
+        self._ends.set(i, end)
+
+    def append(self, value: Optional[str]) -> None:
+        """Appends a value to the end of the column."""
+        start, end = self._store(value)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def freeze(self) -> "_StringColumn":
+        """Returns a column fixed at the current rows. The byte buffer and
+        heap are shared because existing bytes are never rewritten."""
+        frozen = _StringColumn.__new__(_StringColumn)
+        frozen._starts, frozen._ends = self._starts.freeze(), self._ends.freeze()
+        frozen._data, frozen._heap = self._data, self._heap
+        return frozen
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns independent copies of the offsets and byte buffer."""
+        data = np.concatenate([self._data, np.frombuffer(bytes(self._heap), dtype=np.uint8)])
+        return self._starts.values(), self._ends.values(), data
+
+    @staticmethod
+    def pack(
+        starts: np.ndarray, ends: np.ndarray, data: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gathers the referenced byte ranges into a dense buffer, dropping
+        bytes orphaned by rewrites or removed rows."""
+        present = starts >= 0
+        lengths = np.where(present, ends - starts, 0)
+        new_ends = np.cumsum(lengths)
+        new_starts = new_ends - lengths
+        gather = np.repeat(starts - new_starts, lengths) + np.arange(int(lengths.sum()))
+        return (
+            np.where(present, new_starts, -1),
+            np.where(present, new_ends, -1),
+            data[gather].astype(np.uint8),
+        )
+
+
+class ColumnarMetadataStore:
+    """Metadata rows stored column-wise: categorical columns as integer codes
+    into per-column string tables, identifiers and paths as packed UTF-8
+    buffers, and any remaining fields as a JSON column. Persisted stores are
+    opened as copy-on-write memory maps, so worker processes share pages and
+    only rows that are actually read are turned into dictionaries."""
+
+    def __init__(self):
+        """Creates an empty in-memory store."""
+        self._vocab: Dict[str, List[str]] = {c: [] for c in CATEGORICAL_COLUMNS}
+        self._codes: Dict[str, Dict[str, int]] = {c: {} for c in CATEGORICAL_COLUMNS}
+        self._categorical = {
+            c: _ArrayColumn(np.zeros(0, dtype=np.int32)) for c in CATEGORICAL_COLUMNS
+        }
+        empty = np.zeros(0, dtype=np.int64)
+        self._strings = {
+            c: _StringColumn(empty, empty, np.zeros(0, dtype=np.uint8))
+            for c in STRING_COLUMNS + (_EXTRA,)
+        }
+        self._deleted = _ArrayColumn(np.zeros(0, dtype=bool))
+        self._deleted_count = 0
+        self._id_hashes = _ArrayColumn(np.zeros(0, dtype=np.uint64))
+        self._id_sorted = np.zeros(0, dtype=np.uint64)
+        self._id_order = np.zeros(0, dtype=np.int64)
+        self._id_overlay: Dict[str, int] = {}
+        self.info: Dict[str, Any] = {}
+        # Directory and checkpoint token of the persisted store this was opened from.
+        self.source: Optional[Path] = None
+        self.checkpoint: Optional[str] = None
+
+    def __len__(self) -> int:
+        """Returns the number of rows, including soft-deleted ones."""
+        return len(self._deleted)
+
+    def _encode(self, column: str, value: str) -> int:
+        """Returns the code for a categorical value, extending the string table."""
+        code = self._codes[column].get(value)
+        if code is None:
+            code = len(self._vocab[column])
+            self._vocab[column].append(value)
+            self._codes[column][value] = code
+        return code
+
+    def append(self, meta: Dict[str, Any]) -> int:
+        """Appends a metadata dictionary as a new row and returns its index."""
+        row = len(self)
+        for col in CATEGORICAL_COLUMNS:
+            self._categorical[col].append(-1)
+        for col in STRING_COLUMNS + (_EXTRA,):
+            self._strings[col].append(None)
+        self._deleted.append(False)
+        self._id_hashes.append(0)
+        self.update(row, meta)
+        return row
+
+    def update(self, row: int, fields: Dict[str, Any]) -> None:
+        """Merges the given fields into an existing row. Values that do not fit
+        a typed column (e.g. a non-string brand) are kept in the JSON column."""
+        extra_raw = self._strings[_EXTRA].get(row)
+        extra = json.loads(extra_raw) if extra_raw else {}
+        extra_changed = False
+        for key, value in fields.items():
+            if key == "index_id":
+                continue
+            if key == _DELETED:
+                if bool(value) != self.is_deleted(row):
+                    self._deleted.set(row, bool(value))
+                    self._deleted_count += 1 if value else -1
+                continue
+            typed = value is None or isinstance(value, str)
+            if key in CATEGORICAL_COLUMNS and typed:
+                self._categorical[key].set(row, -1 if value is None else self._encode(key, value))
+            elif key in STRING_COLUMNS and typed:
+                self._strings[key].set(row, value)
+                if key == "vector_id":
+                    self._index_id(row, value)
+            else:
+                if key in CATEGORICAL_COLUMNS:
+                    self._categorical[key].set(row, -1)
+                elif key in STRING_COLUMNS:
+                    self._strings[key].set(row, None)
+                    if key == "vector_id":
+                        self._index_id(row, None)
+                extra[key] = value
+                extra_changed = True
+                continue
+            if key in extra:
+                del extra[key]
+                extra_changed = True
+        if extra_changed:
+            self._strings[_EXTRA].set(row, json.dumps(extra, default=str) if extra else None)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Materializes row i as a fresh metadata dictionary."""
+        extra_raw = self._strings[_EXTRA].get(i)
+        meta: Dict[str, Any] = json.loads(extra_raw) if extra_raw else {}
+        for col in CATEGORICAL_COLUMNS:
+            code = int(self._categorical[col].get(i))
+            if code >= 0:
+                meta[col] = self._vocab[col][code]
+        for col in STRING_COLUMNS:
+            value = self._strings[col].get(i)
+            if value is not None:
+                meta[col] = value
+        meta["index_id"] = int(i)
+        if self.is_deleted(i):
+            meta[_DELETED] = True
+        return meta
+
+    def rows(self, indices) -> List[Dict[str, Any]]:
+        """Materializes several rows in the given order."""
+        return [self.row(int(i)) for i in indices]
+
+    def is_deleted(self, i: int) -> bool:
+        """Returns whether row i has been soft-deleted."""
+        return bool(self._deleted.get(i))
+
+    def _index_id(self, row: int, vector_id: Optional[str]) -> None:
+        """Records a row's vector ID in the hash column and in-memory overlay."""
+        self._id_hashes.set(row, _id_hash(vector_id))
+        if vector_id is not None:
+            self._id_overlay[vector_id] = row
+
+    def find(self, vector_id: str) -> Optional[int]:
+        """Returns the row holding the given vector ID, or None. Rows written
+        since the store was opened are looked up in a dictionary; persisted
+        rows by binary search over the memory-mapped sorted hash column. When
+        an ID was re-added after a delete, the live row wins."""
+        col = self._strings["vector_id"]
+        row = self._id_overlay.get(vector_id)
+        if row is not None and row < len(self) and col.get(row) == vector_id:
+            return row
+        h = np.uint64(_id_hash(vector_id))
+        lo = int(np.searchsorted(self._id_sorted, h, side="left"))
+        hi = int(np.searchsorted(self._id_sorted, h, side="right"))
+        found = None
+        for candidate in self._id_order[lo:hi]:
+            candidate = int(candidate)
+            if col.get(candidate) == vector_id:
+                found = candidate
+                if not self.is_deleted(candidate):
+                    break
+        return found
+
+    def vector_id_at(self, row: int) -> Optional[str]:
+        """Returns the vector ID stored at the given row."""
+        return self._strings["vector_id"].get(row)
+
+    def view(self) -> "ColumnarMetadataStore":
+        """Returns a read-only view of the store as it is now, for searches
+        to use without the writer's lock. Later appends fall beyond the
+        view's rows and later edits copy the edited column first, so the
+        view never changes; taking one costs O(columns), not O(rows)."""
+        view = copy.copy(self)
+        view._categorical = {c: col.freeze() for c, col in self._categorical.items()}
+        view._strings = {c: col.freeze() for c, col in self._strings.items()}
+        view._deleted = self._deleted.freeze()
+        view._id_hashes = self._id_hashes.freeze()
+        view.info = dict(self.info)
+        return view
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Returns a boolean array of rows matching every filter, with the same
+        semantics as BaseVectorDB._apply_filters: a list value matches any of
+        its members and rows lacking the key never match. Categorical columns
+        are evaluated on their integer codes without materializing rows."""
+        result = np.ones(len(self), dtype=bool)
+        has_extra = self._strings[_EXTRA]._starts.array() >= 0
+        for key, value in filters.items():
+            wanted = value if isinstance(value, list) else [value]
+            if key in CATEGORICAL_COLUMNS:
+                codes = self._categorical[key].array()
+                known = [self._codes[key][v] for v in wanted if isinstance(v, str) and v in self._codes[key]]
+                col_mask = np.isin(codes, known)
+                unset = np.flatnonzero((codes < 0) & has_extra & result)
+            elif key in STRING_COLUMNS or key in ("index_id", _DELETED):
+                col_mask = np.zeros(len(self), dtype=bool)
+                unset = np.flatnonzero(result)
+            else:
+                col_mask = np.zeros(len(self), dtype=bool)
+                unset = np.flatnonzero(result & has_extra)
+            for i in unset:
+                meta = self.row(int(i))
+                if key in meta and meta[key] in wanted:
+                    col_mask[i] = True
+            result &= col_mask
+        return result
+
+    def deleted_mask(self) -> np.ndarray:
+        """Returns a read-only boolean array marking soft-deleted rows."""
+        return self._deleted.array()
+
+    def deleted_count(self) -> int:
+        """Returns the number of soft-deleted rows, kept up to date by
+        update() so callers never scan the mask for it."""
+        return self._deleted_count
+
+    def export(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Captures a consistent copy of every column and the manifest so the
+        store can be written to disk without holding the caller's lock."""
+        arrays: Dict[str, np.ndarray] = {
+            col: self._categorical[col].values() for col in CATEGORICAL_COLUMNS
+        }
+        for col in STRING_COLUMNS + (_EXTRA,):
+            arrays[f"{col}.starts"], arrays[f"{col}.ends"], arrays[f"{col}.data"] = (
+                self._strings[col].arrays()
+            )
+        arrays[_DELETED] = self._deleted.values()
+        arrays["vector_id.hash"] = self._id_hashes.values()
+        arrays["vector_id.order"], arrays["vector_id.sorted"] = self._sort_ids(
+            arrays["vector_id.hash"]
+        )
+        manifest = {
+            "rows": len(self),
+            "vocab": {c: list(v) for c, v in self._vocab.items()},
+            "info": dict(self.info),
+        }
+        return arrays, manifest
+
+    def take(self, keep: np.ndarray) -> "ColumnarMetadataStore":
+        """Returns a new in-memory store holding only the selected rows,
+        renumbered densely and with string buffers repacked."""
+        arrays, manifest = self.export()
+        for col in CATEGORICAL_COLUMNS + (_DELETED, "vector_id.hash"):
+            arrays[col] = arrays[col][keep]
+        arrays["vector_id.order"], arrays["vector_id.sorted"] = self._sort_ids(
+            arrays["vector_id.hash"]
+        )
+        for col in STRING_COLUMNS + (_EXTRA,):
+            arrays[f"{col}.starts"], arrays[f"{col}.ends"], arrays[f"{col}.data"] = (
+                _StringColumn.pack(
+                    arrays[f"{col}.starts"][keep], arrays[f"{col}.ends"][keep],
+                    arrays[f"{col}.data"],
+                )
+            )
+        return self._from_arrays(arrays, manifest)
+
+    @staticmethod
+    def write(
+        directory: Path, arrays: Dict[str, np.ndarray], manifest: Dict[str, Any],
+        files: Optional[Dict[str, bytes]] = None,
+    ) -> None:
+        """Writes exported columns, plus any extra files that belong to the
+        same checkpoint, to a sibling temp directory and swaps it into place
+        so readers never observe a half-written store. Every file and both
+        renames are fsynced before returning, so the checkpoint survives a
+        power loss once this returns and the log it covers can be dropped.
+        The manifest is stamped with a fresh checkpoint token."""
+        directory = Path(directory)
+        manifest = dict(manifest, checkpoint=uuid.uuid4().hex)
+        tmp = directory.with_name(directory.name + ".tmp")
+        old = directory.with_name(directory.name + ".old")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, arr in arrays.items():
+            _write_synced(tmp / f"{name}.npy", lambda f, arr=arr: np.save(f, arr))
+        for name, data in (files or {}).items():
+            _write_synced(tmp / name, lambda f, data=data: f.write(data))
+        _write_synced(tmp / _MANIFEST, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+        _fsync_dir(tmp)
+        shutil.rmtree(old, ignore_errors=True)
+        if directory.exists():
+            directory.rename(old)
+        tmp.rename(directory)
+        _fsync_dir(directory.parent)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @staticmethod
+    def _resolve(directory: Path, recover: bool) -> Path:
+        """Returns where the store at directory lives. A store left at
+        <name>.old by an interrupted swap is renamed back into place when
+        recover is set, and otherwise read where it is."""
+        old = directory.with_name(directory.name + ".old")
+        if not directory.exists() and old.exists():
+            if not recover:
+                return old
+            old.rename(directory)
+        return directory
+
+    @classmethod
+    def current_checkpoint(cls, directory: Path) -> Optional[str]:
+        """Returns the checkpoint token of the store now at directory, without
+        recovering an interrupted swap. Raises FileNotFoundError while a swap
+        is in progress."""
+        directory = cls._resolve(Path(directory), recover=False)
+        with open(directory / _MANIFEST) as f:
+            return json.load(f).get("checkpoint")
+
+    @classmethod
+    def open(cls, directory: Path, recover: bool = True) -> Optional["ColumnarMetadataStore"]:
+        """Opens a persisted store with copy-on-write memory maps, or returns
+        None if no store exists at the given path. Only the writer should
+        recover an interrupted swap; read-only processes pass recover=False
+        so they never race the writer's renames, and may then see
+        FileNotFoundError if a swap removes files while they are opened."""
+        directory = cls._resolve(Path(directory), recover)
+        if not (directory / _MANIFEST).exists():
+            return None
+        with open(directory / _MANIFEST) as f:
+            manifest = json.load(f)
+        arrays = {
+            p.name[: -len(".npy")]: np.load(p, mmap_mode="c")
+            for p in directory.glob("*.npy")
+        }
+        store = cls._from_arrays(arrays, manifest)
+        store.source, store.checkpoint = directory, manifest.get("checkpoint")
+        return store
+
+    @classmethod
+    def _from_arrays(
+        cls, arrays: Dict[str, np.ndarray], manifest: Dict[str, Any]
+    ) -> "ColumnarMetadataStore":
+        """Builds a store around already-loaded column arrays."""
+        store = cls()
+        store.info = dict(manifest.get("info", {}))
+        missing = [col for col in CATEGORICAL_COLUMNS if col not in arrays]
+        for col in CATEGORICAL_COLUMNS:
+            store._vocab[col] = list(manifest["vocab"].get(col, []))
+            store._codes[col] = {v: i for i, v in enumerate(store._vocab[col])}
+            store._categorical[col] = _ArrayColumn(
+                arrays[col] if col in arrays
+                else np.full(manifest["rows"], -1, dtype=np.int32)
+            )
+        for col in STRING_COLUMNS + (_EXTRA,):
+            store._strings[col] = _StringColumn(
+                arrays[f"{col}.starts"], arrays[f"{col}.ends"], arrays[f"{col}.data"]
+            )
+        store._deleted = _ArrayColumn(arrays[_DELETED])
+        store._deleted_count = int(np.count_nonzero(arrays[_DELETED]))
+        if "vector_id.hash" in arrays:
+            store._id_hashes = _ArrayColumn(arrays["vector_id.hash"])
+            store._id_order = arrays["vector_id.order"]
+            store._id_sorted = arrays["vector_id.sorted"]
+        else:
+            col = store._strings["vector_id"]
+            hashes = np.array([_id_hash(col.get(i)) for i in range(len(col))], dtype=np.uint64)
+            store._id_hashes = _ArrayColumn(hashes)
+            store._id_order, store._id_sorted = cls._sort_ids(hashes)
+        if missing:
+            store._promote(missing)
+        return store
+
+    def _promote(self, columns: List[str]) -> None:
+        """Moves values of newly coded columns out of the JSON column of a
+        store persisted before they were coded."""
+        extra = self._strings[_EXTRA]
+        for row in np.flatnonzero(extra._starts.array() >= 0):
+            fields = json.loads(extra.get(int(row)))
+            moved = {c: fields[c] for c in columns if isinstance(fields.get(c), str)}
+            if moved:
+                self.update(int(row), moved)
+        logger.info(f"Promoted {', '.join(columns)} to coded metadata columns")
+
+    @staticmethod
+    def _sort_ids(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the stable sort order of the ID hashes and the sorted hashes."""
+        order = np.argsort(hashes, kind="stable").astype(np.int64)
+        return order, hashes[order]
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarMetadataStore":
+        """Builds an in-memory store from a list of metadata dictionaries."""
+        store = cls()
+        for meta in records:
+            store.append(meta)
+        return store
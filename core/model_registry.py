@@ -0,0 +1,80 @@
+"""Process-wide registry that shares loaded embedding models across callers."""
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+
+class ModelRegistry:
+    """Loads each (model, device, precision) at most once per process and
+    hands the same instance to every caller. References are counted so a
+    model is dropped once its last holder releases it. Distinct models load
+    concurrently; concurrent requests for the same model wait for a single
+    load."""
+
+    def __init__(self):
+        """Creates an empty registry."""
+        self._lock = threading.Lock()
+        self._models: Dict[ModelKey, Any] = {}
+        self._refs: Dict[ModelKey, int] = {}
+        self._loading: Dict[ModelKey, threading.Lock] = {}
+
+    def acquire(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """Returns the shared model for key, calling loader to build it if
+        no caller holds it yet, and takes a reference on it."""
+        with self._lock:
+            if key in self._models:
+                self._refs[key] += 1
+                return self._models[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._refs[key] += 1
+                    return self._models[key]
+            model = loader()
+            with self._lock:
+                self._models[key] = model
+                self._refs[key] = 1
+                self._loading.pop(key, None)
+        logger.info(f"Loaded shared model {format_key(key)}")
+        return model
+
+    def release(self, key: ModelKey) -> None:
+        """Drops one reference to key, unloading the model with the last one."""
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] == 0:
+                del self._refs[key]
+                del self._models[key]
+                logger.info(f"Released shared model {format_key(key)}")
+
+    def refcount(self, key: ModelKey) -> int:
+        """Returns the number of live references to key."""
+        with self._lock:
+            return self._refs.get(key, 0)
+
+    def loaded(self) -> Dict[str, int]:
+        """Returns the reference count of every loaded model."""
+        with self._lock:
+            return {format_key(k): n for k, n in self._refs.items()}
+
+    def clear(self) -> None:
+        """Forgets every model regardless of references (useful for testing)."""
+        with self._lock:
+            self._models.clear()
+            self._refs.clear()
+
+
+def format_key(key: ModelKey) -> str:
+    """Renders a registry key as model@device/precision."""
+    model, device, precision = key
+    return f"{model}@{device}/{precision}"
+
+
+model_registry = ModelRegistry()
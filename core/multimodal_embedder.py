@@ -1,5 +1,5 @@
 """Combined image and text embedding system."""
-from typing import Dict
+from typing import Dict, Sequence
 import numpy as np
 from core.image_embedder import ImageEmbedder
 from core.text_embedder import TextEmbedder
@@ -7,11 +7,14 @@ from core.text_embedder import TextEmbedder
 
 class MultiModalEmbedder:
     def __init__(self):
-        """Initializes CLIP and sentence-transformer embedders eagerly,
-        deferring the ResNet embedder until first use."""
+        """Creates the CLIP and sentence-transformer embedders, deferring the
+        ResNet embedder until first use. No model is loaded until it is first
+        needed or warmed up. One CLIP embedder serves both images and text,
+        and models come from the shared registry, so further instances do
+        not load them again."""
         self.image_embedder = ImageEmbedder("clip")
         self.text_embedder = TextEmbedder()
-        self.clip_embedder = ImageEmbedder("clip")
+        self.clip_embedder = self.image_embedder
         self._resnet_embedder = None
 
     @property
@@ -22,6 +25,26 @@ class MultiModalEmbedder:
             self._resnet_embedder = ImageEmbedder("resnet")
         return self._resnet_embedder
 
+    def warmup(self, models: Sequence[str] = ("clip", "sentence_transformer")) -> None:
+        """Loads the named models ("clip", "sentence_transformer", "resnet")
+        now instead of on their first request."""
+        embedders = {
+            "clip": lambda: self.image_embedder,
+            "sentence_transformer": lambda: self.text_embedder,
+            "resnet": lambda: self.resnet_embedder,
+        }
+        for name in models:
+            if name not in embedders:
+                raise ValueError(f"Unsupported model type: {name}")
+            embedders[name]().warmup()
+
+    def close(self) -> None:
+        """Releases this embedder's references on its shared models."""
+        self.image_embedder.close()
+        self.text_embedder.close()
+        if self._resnet_embedder is not None:
+            self._resnet_embedder.close()
+
     def encode_image(self, image_path: str) -> Dict[str, np.ndarray]:
         """Encodes an image using both CLIP and ResNet models and returns
         a dictionary keyed by model name."""
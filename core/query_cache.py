@@ -0,0 +1,60 @@
+"""In-process LRU tier for query embeddings."""
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from patterns.observer import Subject
+
+
+def normalize_query(text: str) -> str:
+    """Canonicalizes query text for cache keys. The CLIP and MiniLM
+    tokenizers are case- and whitespace-insensitive, so the key is too."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache(Subject):
+    """Bounded LRU of query vectors kept in memory in front of the on-disk
+    embedding cache, so a repeated query costs one dict lookup. Every lookup
+    publishes "cache_hit" or "cache_miss" to attached observers, such as
+    CacheEventObserver; clear() publishes "cache_cleared". Cached vectors are
+    shared and read-only."""
+
+    def __init__(self, max_entries: int = 10_000):
+        """Creates an empty cache holding at most max_entries vectors."""
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Returns the number of cached vectors."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns the cached vector for key, or None on a miss."""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        self.notify("cache_hit" if vector is not None else "cache_miss", {"key": key})
+        return vector
+
+    def put(self, key: str, vector: np.ndarray) -> np.ndarray:
+        """Caches a read-only copy of vector under key, evicting the least
+        recently used entry when full, and returns the cached array."""
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+    def clear(self) -> None:
+        """Drops every cached vector."""
+        with self._lock:
+            self._entries.clear()
+        self.notify("cache_cleared", {})
@@ -25,25 +25,29 @@ class SearchEngine:
         vector_backend: str = "faiss",
     ):
         """Initializes the search engine with injected or default dependencies
-        for the vector database, embedding manager, and multimodal embedder."""
+        for the vector database, embedding manager, and multimodal embedder;
+        by default the multimodal embedder is the embedding manager's own."""
         self.vector_db = vector_db or create_vector_db(vector_backend)
         self.embedding_manager = embedding_manager or EmbeddingManager()
-        self.multimodal_embedder = multimodal_embedder or MultiModalEmbedder()
+        self.multimodal_embedder = (
+            multimodal_embedder or self.embedding_manager.multimodal_embedder
+        )
         self.max_results = SEARCH_CONFIG["max_results"]
         self.similarity_threshold = SEARCH_CONFIG["similarity_threshold"]
         self.hybrid_weights = SEARCH_CONFIG["hybrid_weights"]
 
     def text_to_image_search(
         self, query: str, filters: Optional[Dict[str, Any]] = None,
-        limit: Optional[int] = None,
+        limit: Optional[int] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Searches for images matching a text query by encoding it with CLIP
-        and querying the vector database."""
+        and querying the vector database. quality selects the recall level
+        ("fast", "balanced", "precise") the index searches at."""
         try:
             emb = self.embedding_manager.get_text_embedding(query, "clip")
             limit = limit or self.max_results
-            results = self.vector_db.search(emb, k=limit, filters=filters)
-            results = [r for r in results if r.get("similarity_score", 0) >= self.similarity_threshold]
+            results = self.vector_db.search(emb, k=limit, filters=filters, quality=quality)
+            results = self._above_threshold(results)
             log_search_query(query, "text", filters, len(results))
             return results
         except Exception as e:
@@ -52,15 +56,15 @@ class SearchEngine:
 
     def image_to_image_search(
         self, image_path: str, filters: Optional[Dict[str, Any]] = None,
-        limit: Optional[int] = None,
+        limit: Optional[int] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Finds visually similar images by encoding the input image with CLIP
         and searching the vector database."""
         try:
             emb = self.embedding_manager.get_image_embedding(image_path, "clip")
             limit = limit or self.max_results
-            results = self.vector_db.search(emb, k=limit, filters=filters)
-            results = [r for r in results if r.get("similarity_score", 0) >= self.similarity_threshold]
+            results = self.vector_db.search(emb, k=limit, filters=filters, quality=quality)
+            results = self._above_threshold(results)
             log_search_query(f"Image: {image_path}", "image", filters, len(results))
             return results
         except Exception as e:
@@ -85,22 +89,30 @@ class SearchEngine:
     def hybrid_search(
         self, query: Optional[str] = None, image_path: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+        quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Combines text, image, and metadata search results using weighted
         scoring to produce a unified ranked list."""
         try:
             limit = limit or self.max_results
             all_results: Dict[Any, Dict[str, Any]] = {}
+            branches = []
             if query:
-                for r in self.text_to_image_search(query, filters, limit):
-                    rid = r.get("vector_id", r.get("index_id"))
-                    all_results.setdefault(rid, {**r, "scores": {}})
-                    all_results[rid]["scores"]["text"] = r.get("similarity_score", 0)
+                branches.append(("text", self.embedding_manager.get_text_embedding(query, "clip")))
             if image_path:
-                for r in self.image_to_image_search(image_path, filters, limit):
-                    rid = r.get("vector_id", r.get("index_id"))
-                    all_results.setdefault(rid, {**r, "scores": {}})
-                    all_results[rid]["scores"]["visual"] = r.get("similarity_score", 0)
+                branches.append(
+                    ("visual", self.embedding_manager.get_image_embedding(image_path, "clip"))
+                )
+            if branches:
+                batches = self.vector_db.search_batch(
+                    np.stack([emb for _, emb in branches]), k=limit, filters=filters,
+                    quality=quality,
+                )
+                for (kind, _), results in zip(branches, batches):
+                    for r in self._above_threshold(results):
+                        rid = r.get("vector_id", r.get("index_id"))
+                        all_results.setdefault(rid, {**r, "scores": {}})
+                        all_results[rid]["scores"][kind] = r.get("similarity_score", 0)
             if filters:
                 for r in self.metadata_search(filters, limit):
                     rid = r.get("vector_id", r.get("index_id"))
@@ -120,15 +132,21 @@ class SearchEngine:
 
     def semantic_search(
         self, query: str, filters: Optional[Dict[str, Any]] = None,
-        limit: Optional[int] = None,
+        limit: Optional[int] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Performs semantic search by expanding the query into variations
         and boosting results that match multiple expansions."""
         try:
             expanded = self._expand_query(query)
+            embs = np.stack([
+                self.embedding_manager.get_text_embedding(eq, "clip") for eq in expanded
+            ])
+            batches = self.vector_db.search_batch(
+                embs, k=limit or self.max_results, filters=filters, quality=quality
+            )
             all_results: Dict[Any, Dict[str, Any]] = {}
-            for eq in expanded:
-                for r in self.text_to_image_search(eq, filters, limit):
+            for eq, results in zip(expanded, batches):
+                for r in self._above_threshold(results):
                     rid = r.get("vector_id", r.get("index_id"))
                     all_results.setdefault(rid, {**r, "query_matches": []})
                     all_results[rid]["query_matches"].append(eq)
@@ -145,9 +163,39 @@ class SearchEngine:
             logger.error(f"Semantic search failed: {e}")
             return []
 
-    def get_recommendations(self, image_path: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def search_by_vector_id(
+        self, vector_id: str, filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None, quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finds images similar to an already indexed one using its stored
+        vector, skipping image decoding and CLIP inference entirely. The
+        reference item itself is excluded from the results."""
+        try:
+            emb = self.vector_db.get_vector_by_id(vector_id)
+            if emb is None:
+                return []
+            limit = limit or self.max_results
+            results = self.vector_db.search(
+                emb, k=limit + 1, filters=filters, quality=quality
+            )
+            results = [
+                r for r in self._above_threshold(results) if r.get("vector_id") != vector_id
+            ][:limit]
+            log_search_query(f"Vector: {vector_id}", "vector_id", filters, len(results))
+            return results
+        except Exception as e:
+            logger.error(f"Vector ID search failed: {e}")
+            return []
+
+    def get_recommendations(
+        self, image_path: Optional[str] = None, limit: int = 10,
+        vector_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """Returns visually similar image recommendations, excluding the
-        source image itself from the results."""
+        source image itself from the results. An indexed item's vector_id
+        is served from its stored vector without re-encoding the image."""
+        if vector_id is not None:
+            return self.search_by_vector_id(vector_id, limit=limit)
         try:
             recs = [
                 r for r in self.image_to_image_search(image_path, limit=limit * 2)
@@ -159,15 +207,28 @@ class SearchEngine:
             return []
 
     def search_by_similarity(
-        self, reference_image_path: str, similarity_threshold: float = 0.8,
-        limit: Optional[int] = None,
+        self, reference_image_path: Optional[str] = None,
+        similarity_threshold: float = 0.8, limit: Optional[int] = None,
+        vector_id: Optional[str] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Searches for images exceeding a given similarity threshold
-        relative to a reference image."""
+        relative to a reference image, or to an indexed item's stored
+        vector when vector_id is given, in which case the reference item
+        itself is excluded from the results."""
         try:
-            emb = self.embedding_manager.get_image_embedding(reference_image_path, "clip")
-            results = self.vector_db.search(emb, k=limit or self.max_results)
-            return [r for r in results if r.get("similarity_score", 0) >= similarity_threshold]
+            limit = limit or self.max_results
+            if vector_id is None:
+                emb = self.embedding_manager.get_image_embedding(reference_image_path, "clip")
+                return self.vector_db.search_range(
+                    emb, similarity_threshold, limit=limit, quality=quality
+                )
+            emb = self.vector_db.get_vector_by_id(vector_id)
+            if emb is None:
+                return []
+            results = self.vector_db.search_range(
+                emb, similarity_threshold, limit=limit + 1, quality=quality
+            )
+            return [r for r in results if r.get("vector_id") != vector_id][:limit]
         except Exception as e:
             logger.error(f"Similarity search failed: {e}")
             return []
@@ -176,6 +237,10 @@ class SearchEngine:
         """Retrieves aggregated search statistics and vector database metrics."""
         return get_search_stats(self.vector_db)
 
+    def _above_threshold(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keeps only results scoring at least the configured similarity threshold."""
+        return [r for r in results if r.get("similarity_score", 0) >= self.similarity_threshold]
+
     def _hybrid_score(self, scores: Dict[str, float]) -> float:
         """Computes a weighted average of individual search scores using
         the configured hybrid weight distribution."""
@@ -0,0 +1,108 @@
+"""Append-only segment log for incremental vector store persistence."""
+import os
+import pickle
+import struct
+import zlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct("<II")  # payload length, crc32
+
+
+class SegmentLog:
+    """Write-ahead log split into numbered, append-only segment files."""
+
+    def __init__(self, directory: Path, max_segment_bytes: int = 64 * 1024 * 1024):
+        """Opens (or creates) the segment directory and positions the writer
+        at the end of the newest segment."""
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_segment_bytes = max_segment_bytes
+        seqs = self._segment_seqs()
+        self._active_seq = seqs[-1] if seqs else 1
+        self._fh = None
+
+    def _segment_seqs(self) -> List[int]:
+        """Returns the sequence numbers of all segment files in ascending order."""
+        return sorted(int(p.stem.split("_")[1]) for p in self._dir.glob("segment_*.log"))
+
+    def _segment_path(self, seq: int) -> Path:
+        """Returns the file path of the segment with the given sequence number."""
+        return self._dir / f"segment_{seq:08d}.log"
+
+    def append(self, record: Dict[str, Any], sync: bool = False) -> None:
+        """Appends a single framed record to the active segment, rotating
+        to a new segment once the size limit is reached."""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._fh is None:
+            self._fh = open(self._segment_path(self._active_seq), "ab")
+        self._fh.write(_FRAME_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._fh.write(payload)
+        self._fh.flush()
+        if sync:
+            os.fsync(self._fh.fileno())
+        if self._fh.tell() >= self._max_segment_bytes:
+            self.seal()
+
+    def seal(self) -> int:
+        """Closes the active segment so that later appends go to a new one,
+        returning the sequence number of the last sealed segment."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        sealed = self._active_seq
+        if self._segment_path(sealed).exists():
+            self._active_seq += 1
+        else:
+            sealed -= 1
+        return sealed
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yields every intact record from all segments in write order,
+        truncating a torn record left behind by a crash."""
+        for seq in self._segment_seqs():
+            path = self._segment_path(seq)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _FRAME_HEADER.size <= len(data):
+                length, crc = _FRAME_HEADER.unpack_from(data, offset)
+                start = offset + _FRAME_HEADER.size
+                payload = data[start : start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                yield pickle.loads(payload)
+                offset = start + length
+            if offset < len(data):
+                logger.warning(f"Truncating torn tail of {path.name} at byte {offset}")
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+
+    def discard_through(self, seq: int) -> None:
+        """Deletes all sealed segments whose sequence number is at most seq."""
+        for s in self._segment_seqs():
+            if s <= seq and s != self._active_seq:
+                self._segment_path(s).unlink(missing_ok=True)
+
+    def reset(self) -> None:
+        """Deletes every segment, leaving an empty log."""
+        self.discard_through(self.seal())
+
+    @property
+    def sealed_count(self) -> int:
+        """Returns the number of sealed segments awaiting a merge."""
+        return sum(1 for s in self._segment_seqs() if s < self._active_seq)
+
+    @property
+    def size_bytes(self) -> int:
+        """Returns the total on-disk size of all segments in bytes."""
+        return sum(p.stat().st_size for p in self._dir.glob("segment_*.log"))
+
+    def close(self) -> None:
+        """Closes the active segment file handle if one is open."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
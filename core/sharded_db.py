@@ -0,0 +1,282 @@
+"""Horizontally sharded FAISS collections with scatter-gather search."""
+import heapq
+import json
+import logging
+import os
+import zlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from config.settings import VECTOR_DB_DIR, VECTOR_DB_CONFIG
+from core.faiss_db import FAISSVectorDB
+from core.vector_db_base import BaseVectorDB
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedVectorDB(BaseVectorDB):
+    """Partitions a collection across several FAISSVectorDB shards and
+    answers queries by searching every shard in parallel and merging the
+    per-shard top-k lists by score."""
+
+    def __init__(
+        self, dimension: int, collection_name: str = "shoe_images",
+        num_shards: Optional[int] = None, shard_by: Optional[str] = None,
+        read_only: Optional[bool] = None,
+    ):
+        """Opens (or creates) one FAISS collection per shard and a thread pool
+        sized to search them concurrently; FAISS releases the GIL while it
+        searches, so shards run on separate cores. The shard layout is
+        recorded on first use, and opening the collection with a different
+        layout raises ValueError, since items would be routed to shards
+        that do not hold them. read_only is passed to every shard, and the
+        shards already opened are closed if a later one fails to open."""
+        super().__init__(dimension, collection_name)
+        config = VECTOR_DB_CONFIG["sharded"]
+        self._num_shards = num_shards or config.get("num_shards", 4)
+        self._shard_by = shard_by or config.get("shard_by", "hash")
+        if self._shard_by not in ("hash", "brand"):
+            raise ValueError(f"Unsupported shard key: {self._shard_by}")
+        if read_only is None:
+            read_only = VECTOR_DB_CONFIG["faiss"].get("read_only", False)
+        self._check_layout(read_only)
+        self._shards: List[FAISSVectorDB] = []
+        try:
+            for i in range(self._num_shards):
+                self._shards.append(
+                    FAISSVectorDB(dimension, f"{collection_name}_shard{i:02d}", read_only)
+                )
+        except Exception:
+            for shard in self._shards:
+                shard.close()
+            raise
+        self._pool = ThreadPoolExecutor(
+            max_workers=config.get("max_workers") or self._num_shards,
+            thread_name_prefix=f"shard-{collection_name}",
+        )
+
+    def _check_layout(self, read_only: bool) -> None:
+        """Compares the requested layout with the collection's shard
+        manifest, writing the manifest if the collection has none yet
+        unless it is opened read-only."""
+        path = VECTOR_DB_DIR / f"{self._collection_name}_shards.json"
+        layout = {"num_shards": self._num_shards, "shard_by": self._shard_by}
+        if path.exists():
+            with open(path) as f:
+                stored = json.load(f)
+            if stored != layout:
+                raise ValueError(
+                    f"Sharded collection {self._collection_name} was created with "
+                    f"{stored}, not {layout}; re-index it to change the layout"
+                )
+            return
+        if read_only:
+            return
+        VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(layout, f)
+        os.replace(tmp, path)
+
+    @property
+    def shards(self) -> List[FAISSVectorDB]:
+        """Returns the underlying shard databases."""
+        return self._shards
+
+    def _shard_of(self, key: Any) -> int:
+        """Maps a routing key to a shard number with a process-stable hash."""
+        return zlib.crc32(str(key).encode("utf-8")) % self._num_shards
+
+    def _route(self, vector_id: str, metadata: Dict[str, Any]) -> int:
+        """Returns the shard a new vector is placed on."""
+        if self._shard_by == "brand":
+            return self._shard_of(metadata.get("brand"))
+        return self._shard_of(vector_id)
+
+    def _owners(self, vector_ids: List[str]) -> Dict[int, List[str]]:
+        """Groups existing vector IDs by the shards that may hold them. Hash
+        routing is exact; brand routing broadcasts, since an ID alone does
+        not name the brand its item is placed by."""
+        if self._shard_by == "hash":
+            groups: Dict[int, List[str]] = {}
+            for vid in vector_ids:
+                groups.setdefault(self._shard_of(vid), []).append(vid)
+            return groups
+        return {i: list(vector_ids) for i in range(self._num_shards)}
+
+    def _targets(self, filters: Optional[Dict[str, Any]]) -> List[int]:
+        """Returns the shards a query must visit, pruning to the shards that
+        own the requested brands when the collection is sharded by brand."""
+        if self._shard_by == "brand" and filters and "brand" in filters:
+            brands = filters["brand"]
+            brands = brands if isinstance(brands, list) else [brands]
+            return sorted({self._shard_of(b) for b in brands})
+        return list(range(self._num_shards))
+
+    def _scatter(
+        self, shards: List[int], fn: Callable[[FAISSVectorDB], Any]
+    ) -> List[Any]:
+        """Runs fn against the given shards concurrently, preserving order."""
+        if len(shards) == 1:
+            return [fn(self._shards[shards[0]])]
+        return list(self._pool.map(lambda i: fn(self._shards[i]), shards))
+
+    @staticmethod
+    def _gather(
+        shards: List[int], pages: List[List[Dict[str, Any]]], k: int
+    ) -> List[Dict[str, Any]]:
+        """Merges per-shard result pages into one top-k list with a heap,
+        tagging each result with its shard and re-numbering ranks."""
+        tagged = (
+            {**r, "shard": shard} for shard, page in zip(shards, pages) for r in page
+        )
+        merged = heapq.nlargest(k, tagged, key=lambda r: r.get("similarity_score", 0))
+        for rank, result in enumerate(merged):
+            result["rank"] = rank + 1
+        return merged
+
+    def add_vectors(
+        self, vectors: np.ndarray, metadata: List[Dict[str, Any]],
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        """Routes each vector to its shard and adds every shard's batch in one call."""
+        if ids is None:
+            start = sum(s.next_id for s in self._shards)
+            ids = [f"item_{start + i}" for i in range(len(vectors))]
+        groups: Dict[int, List[int]] = {}
+        for pos, (vid, meta) in enumerate(zip(ids, metadata)):
+            groups.setdefault(self._route(vid, meta), []).append(pos)
+        for shard, positions in groups.items():
+            self._shards[shard].add_vectors(
+                vectors[positions], [metadata[p] for p in positions],
+                [ids[p] for p in positions],
+            )
+
+    def search(
+        self, query_vector: np.ndarray, k: int = 10,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Searches all relevant shards in parallel and merges their top-k."""
+        return self.search_batch(query_vector.reshape(1, -1), k, filters, quality)[0]
+
+    def search_batch(
+        self, query_matrix: np.ndarray, k: int = 10,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Sends the whole query batch to every relevant shard in parallel
+        and merges the per-shard pages row by row."""
+        shards = self._targets(filters)
+        per_shard = self._scatter(shards, lambda s: s.search_batch(query_matrix, k, filters, quality))
+        return [
+            self._gather(shards, [pages[row] for pages in per_shard], k)
+            for row in range(len(query_matrix))
+        ]
+
+    def search_range(
+        self, query_vector: np.ndarray, min_score: float, limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Runs a range search on every relevant shard and merges the hits."""
+        shards = self._targets(filters)
+        pages = self._scatter(
+            shards, lambda s: s.search_range(query_vector, min_score, limit, filters, quality)
+        )
+        return self._gather(shards, pages, limit)
+
+    def get_vector_by_id(self, vector_id: str) -> Optional[np.ndarray]:
+        """Returns the stored vector from whichever shard holds the ID."""
+        for shard in self._owners([vector_id]):
+            vector = self._shards[shard].get_vector_by_id(vector_id)
+            if vector is not None:
+                return vector
+        return None
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
+        """Updates the metadata of a vector on the shard that holds it."""
+        self.update_metadata_many({vector_id: metadata})
+
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Applies metadata updates as one batch per owning shard. Under brand
+        routing, items whose brand changes are moved to the new brand's shard,
+        so brand-filtered queries pruned to that shard still find them."""
+        moved = self._relocate(updates) if self._shard_by == "brand" else set()
+        remaining = [vid for vid in updates if vid not in moved]
+        for shard, vids in self._owners(remaining).items():
+            self._shards[shard].update_metadata_many({vid: updates[vid] for vid in vids})
+
+    def _relocate(self, updates: Dict[str, Dict[str, Any]]) -> set:
+        """Moves every item whose updated brand routes to another shard,
+        deleting it from its old shard and adding it, with the updates merged
+        into its metadata, to the new one. Returns the moved IDs."""
+        removals: Dict[int, List[str]] = {}
+        additions: Dict[int, Tuple[List[np.ndarray], List[Dict[str, Any]], List[str]]] = {}
+        for vid, fields in updates.items():
+            if "brand" not in fields:
+                continue
+            target = self._shard_of(fields["brand"])
+            for i, shard in enumerate(self._shards):
+                row = shard.metadata.find(vid)
+                if i == target or row is None or shard.metadata.is_deleted(row):
+                    continue
+                vector = shard.get_vector_by_id(vid)
+                if vector is None:
+                    continue
+                meta = shard.metadata.row(row)
+                meta.pop("index_id", None)
+                meta.update(fields)
+                removals.setdefault(i, []).append(vid)
+                vectors, metas, ids = additions.setdefault(target, ([], [], []))
+                vectors.append(vector)
+                metas.append(meta)
+                ids.append(vid)
+        for shard, (vectors, metas, ids) in additions.items():
+            self._shards[shard].add_vectors(np.stack(vectors), metas, ids)
+        for shard, vids in removals.items():
+            self._shards[shard].delete_many(vids)
+        return {vid for vids in removals.values() for vid in vids}
+
+    def delete_vector(self, vector_id: str) -> None:
+        """Deletes a vector from the shard that holds it."""
+        self.delete_many([vector_id])
+
+    def delete_many(self, vector_ids: List[str]) -> None:
+        """Deletes vectors as one batch per owning shard."""
+        for shard, vids in self._owners(list(vector_ids)).items():
+            self._shards[shard].delete_many(vids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns aggregate statistics together with each shard's own stats."""
+        shard_stats = [s.get_stats() for s in self._shards]
+        return {
+            "backend": "sharded",
+            "total_vectors": sum(s["total_vectors"] for s in shard_stats),
+            "dimension": self._dimension,
+            "num_shards": self._num_shards,
+            "shard_by": self._shard_by,
+            "shards": shard_stats,
+        }
+
+    def tune_search(self, k: int = 10, sample_size: int = 200) -> List[Dict[str, int]]:
+        """Tunes every shard's search knobs in parallel, returning each
+        shard's chosen values."""
+        return self._scatter(
+            list(range(self._num_shards)), lambda s: s.tune_search(k, sample_size)
+        )
+
+    def rebuild_index(self) -> None:
+        """Rebuilds every shard in parallel."""
+        self._scatter(list(range(self._num_shards)), lambda s: s.rebuild_index())
+
+    def checkpoint(self) -> None:
+        """Checkpoints every shard in parallel."""
+        self._scatter(list(range(self._num_shards)), lambda s: s.checkpoint())
+
+    def clear_database(self) -> None:
+        """Clears every shard."""
+        self._scatter(list(range(self._num_shards)), lambda s: s.clear_database())
+
+    def close(self) -> None:
+        """Closes every shard and stops the search thread pool."""
+        self._scatter(list(range(self._num_shards)), lambda s: s.close())
+        self._pool.shutdown()
@@ -1,8 +1,12 @@
 """Text embedding generation using Sentence Transformers."""
+import threading
 import numpy as np
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import Any, List
 from config.settings import MODEL_CONFIG
+from core.inference_backend import (
+    check_config, is_eager_fp32, sentence_transformer, served_variant, variant,
+)
+from core.model_registry import model_registry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,18 +14,78 @@ logger = logging.getLogger(__name__)
 
 class TextEmbedder:
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        """Initializes the text embedder with the specified sentence-transformer
-        model and loads it onto the configured device."""
+        """Initializes the text embedder for the specified sentence-transformer
+        model. The model, and sentence_transformers itself, are loaded on first
+        use or by warmup()."""
         self.model_name = model_name
         self.device = MODEL_CONFIG["sentence_transformer"]["device"]
-        self._load_model()
+        check_config(MODEL_CONFIG["sentence_transformer"], model_name)
+        self._model = None
+        self._model_key = None
+        self._lock = threading.Lock()
 
-    def _load_model(self):
-        """Loads the sentence-transformer model and determines its
-        output embedding dimension."""
-        self.model = SentenceTransformer(self.model_name, device=self.device)
-        self.dimension = self.model.get_sentence_embedding_dimension()
+    @property
+    def model(self) -> Any:
+        """Returns the shared sentence-transformer model, loading it on
+        first access."""
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+                model = self._model
+        return model
+
+    @property
+    def dimension(self) -> int:
+        """Returns the model's output embedding dimension."""
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def model_version(self) -> str:
+        """Identifies the weights and inference variant producing this
+        embedder's vectors, e.g. "all-MiniLM-L6-v2:fp32". Whether a compiled
+        variant passed its tolerance check is only known once it has loaded,
+        so for one this loads the model; eager fp32 never does."""
+        config = MODEL_CONFIG["sentence_transformer"]
+        if is_eager_fp32(config):
+            return f"{self.model_name}:fp32"
+        self.model
+        return f"{self.model_name}:{served_variant(config, self.model_name)}"
+
+    @property
+    def is_loaded(self) -> bool:
+        """Returns whether the model has been loaded."""
+        return self._model is not None
+
+    def warmup(self) -> None:
+        """Loads the model now instead of on the first request."""
+        self.model
+
+    def _load_model(self) -> Any:
+        """Takes a reference on the shared sentence-transformer model,
+        loading it on first use."""
+        self._model_key = (
+            f"sentence_transformer:{self.model_name}", self.device,
+            variant(MODEL_CONFIG["sentence_transformer"]),
+        )
+        return model_registry.acquire(self._model_key, self._build_model)
+
+    def _build_model(self) -> Any:
+        """Loads the sentence-transformer model onto the configured device
+        and inference backend."""
+        model = sentence_transformer(
+            self.model_name, self.device, MODEL_CONFIG["sentence_transformer"]
+        )
         logger.info(f"Sentence Transformer model loaded: {self.model_name}")
+        return model
+
+    def close(self) -> None:
+        """Releases this embedder's reference on its shared model."""
+        with self._lock:
+            key, self._model_key, self._model = self._model_key, None, None
+        if key is not None:
+            model_registry.release(key)
 
     def encode_text(self, text: str) -> np.ndarray:
         """Encodes a single text string into an embedding vector, returning
@@ -1,7 +1,61 @@
 """Lightweight utility functions (no heavy ML imports)."""
 import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
 
 
 def stable_text_hash(text: str) -> str:
     """Deterministic hash for cache keys (unlike built-in hash())"""
     return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def content_digest(data: bytes) -> str:
+    """Returns a 128-bit BLAKE2b hex digest of raw file contents."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class FileDigestMemo:
+    """Bounded LRU memo of file content digests keyed on (path, mtime, size),
+    so an unchanged file is hashed once and an edited one is re-hashed."""
+
+    def __init__(self, max_entries: int = 100_000):
+        """Creates an empty memo holding at most max_entries paths."""
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+
+    def digest(self, path: str) -> str:
+        """Returns the content digest of the file at path, hashing it only
+        if it is new or has changed since it was last seen."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                self._entries.move_to_end(path)
+                return entry[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return self._store(path, st, h.hexdigest())
+
+    def remember(self, path: str, digest: str) -> str:
+        """Records the digest of a file the caller just wrote, so it is
+        never read back for hashing."""
+        path = os.path.abspath(path)
+        return self._store(path, os.stat(path), digest)
+
+    def _store(self, path: str, st: os.stat_result, digest: str) -> str:
+        """Memoizes a digest, evicting the least recently used paths."""
+        with self._lock:
+            self._entries[path] = (st.st_mtime_ns, st.st_size, digest)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return digest
+
+
+file_digests = FileDigestMemo()
@@ -1,22 +1,30 @@
 """Vector Database Management -- re-exports + factory function."""
 import numpy as np
+from typing import Optional
 from config.settings import MODEL_CONFIG
 
 from core.vector_db_base import BaseVectorDB
-from core.faiss_db import FAISSVectorDB
+from core.faiss_db import FAISSVectorDB, WriterLockedError
 from core.chroma_db import ChromaVectorDB
+from core.sharded_db import ShardedVectorDB
 
 VectorDatabase = BaseVectorDB
 
 
 def create_vector_db(
-    backend: str = "faiss", collection_name: str = "shoe_images"
+    backend: str = "faiss", collection_name: str = "shoe_images",
+    read_only: Optional[bool] = None,
 ) -> BaseVectorDB:
     """Creates and returns a vector database instance for the specified
-    backend (FAISS or ChromaDB) with the CLIP embedding dimension."""
+    backend (FAISS, sharded FAISS, or ChromaDB) with the CLIP embedding dimension.
+    read_only overrides the faiss read_only setting for the FAISS backends."""
     dim = MODEL_CONFIG["clip"].get("dimension", 512)
     if backend == "faiss":
-        return FAISSVectorDB(dimension=dim, collection_name=collection_name)
+        return FAISSVectorDB(dimension=dim, collection_name=collection_name, read_only=read_only)
+    if backend == "sharded":
+        return ShardedVectorDB(
+            dimension=dim, collection_name=collection_name, read_only=read_only
+        )
     if backend == "chroma":
         return ChromaVectorDB(dimension=dim, collection_name=collection_name)
     raise ValueError(f"Unsupported backend: {backend}")
@@ -39,7 +47,7 @@ def validate_vector(vector: np.ndarray, expected_dim: int) -> bool:
 
 
 __all__ = [
-    "BaseVectorDB", "FAISSVectorDB", "ChromaVectorDB",
-    "VectorDatabase", "create_vector_db",
+    "BaseVectorDB", "FAISSVectorDB", "ChromaVectorDB", "ShardedVectorDB",
+    "VectorDatabase", "WriterLockedError", "create_vector_db",
     "get_embedding_dimension", "validate_vector",
 ]
@@ -34,11 +34,34 @@ class BaseVectorDB(ABC):
     @abstractmethod
     def search(
         self, query_vector: np.ndarray, k: int = 10,
-        filters: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Searches for the k nearest vectors, optionally filtered by metadata."""
+        """Searches for the k nearest vectors, optionally filtered by metadata.
+        quality names a configured recall level ("fast", "balanced",
+        "precise"); backends without per-query tuning ignore it."""
         ...
 
+    def search_batch(
+        self, query_matrix: np.ndarray, k: int = 10,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Searches for the k nearest vectors of every row of query_matrix,
+        returning one result list per row; backends that can answer many
+        queries in one call should override this."""
+        return [
+            self.search(query, k=k, filters=filters, quality=quality) for query in query_matrix
+        ]
+
+    def search_range(
+        self, query_vector: np.ndarray, min_score: float, limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None, quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns up to limit results whose similarity score is at least
+        min_score, best first; backends with native range search should
+        override this to avoid over-fetching."""
+        results = self.search(query_vector, k=limit, filters=filters, quality=quality)
+        return [r for r in results if r.get("similarity_score", 0) >= min_score]
+
     @abstractmethod
     def get_vector_by_id(self, vector_id: str) -> Optional[np.ndarray]:
         """Retrieves a single vector by its unique identifier."""
@@ -54,6 +77,18 @@ class BaseVectorDB(ABC):
         """Removes a vector and its metadata from the database."""
         ...
 
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Updates metadata for many vector IDs; backends that can persist a
+        batch at once should override this."""
+        for vector_id, metadata in updates.items():
+            self.update_metadata(vector_id, metadata)
+
+    def delete_many(self, vector_ids: List[str]) -> None:
+        """Removes many vectors; backends that can persist a batch at once
+        should override this."""
+        for vector_id in vector_ids:
+            self.delete_vector(vector_id)
+
     @abstractmethod
     def get_stats(self) -> Dict[str, Any]:
         """Returns a dictionary of backend-specific database statistics."""
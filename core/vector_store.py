@@ -0,0 +1,100 @@
+"""Append-only, memory-mapped side store of raw float32 vectors."""
+import os
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """Row-aligned float32 matrix kept in a headerless file next to an index.
+    Rows are appended with plain writes and read through a memory map, so the
+    full-precision vectors never have to live on the Python heap."""
+
+    def __init__(self, path: Path, dimension: int, read_only: bool = False):
+        """Opens (or creates) the backing file for vectors of the given dimension.
+        A read-only store never creates or modifies the file."""
+        self._path = Path(path)
+        self._dimension = dimension
+        self._row_bytes = dimension * 4
+        self._read_only = read_only
+        self._map: Optional[np.ndarray] = None
+        self._fh = None
+        if read_only:
+            exists = self._path.exists()
+            self._rows = self._path.stat().st_size // self._row_bytes if exists else 0
+            return
+        self._path.touch(exist_ok=True)
+        self._fh = open(self._path, "r+b", buffering=0)
+        self._fh.seek(0, os.SEEK_END)
+        self._rows = self._fh.tell() // self._row_bytes
+
+    @property
+    def path(self) -> Path:
+        """Returns the path of the backing file."""
+        return self._path
+
+    def __len__(self) -> int:
+        """Returns the number of stored vectors."""
+        return self._rows
+
+    def append(self, vectors: np.ndarray) -> None:
+        """Appends vectors to the end of the file."""
+        self._check_writable()
+        data = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._fh.seek(self._rows * self._row_bytes)
+        self._fh.write(data.tobytes())
+        self._rows += len(data)
+
+    def truncate(self, rows: int) -> None:
+        """Drops every vector after the first `rows`, e.g. rows written after
+        the last snapshot that will be re-appended by log replay."""
+        self._check_writable()
+        if rows < self._rows:
+            self._map = None
+            self._fh.truncate(rows * self._row_bytes)
+            self._rows = rows
+
+    def matrix(self) -> np.ndarray:
+        """Returns a read-only (rows, dimension) memory-mapped view of all vectors."""
+        if self._rows == 0:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        if self._map is None or len(self._map) != self._rows:
+            self._map = np.memmap(
+                self._path, dtype=np.float32, mode="r", shape=(self._rows, self._dimension)
+            )
+        return self._map
+
+    def get(self, rows: np.ndarray) -> np.ndarray:
+        """Returns a copy of the vectors at the given row numbers."""
+        return np.asarray(self.matrix()[rows], dtype=np.float32)
+
+    def flush(self) -> None:
+        """Forces appended vectors to stable storage."""
+        if self._fh is not None:
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        """Closes the backing file. A final memory map is kept so searches
+        still holding this store can finish after the file is replaced."""
+        self.matrix()
+        if self._fh is not None:
+            self._fh.close()
+
+    def _check_writable(self) -> None:
+        """Raises if the store was opened read-only."""
+        if self._read_only:
+            raise RuntimeError(f"Vector store {self._path} is open read-only")
+
+    @staticmethod
+    def write(path: Path, vectors: np.ndarray) -> None:
+        """Writes a complete vector file atomically via a temp file and rename."""
+        path = Path(path)
+        tmp = Path(f"{path}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
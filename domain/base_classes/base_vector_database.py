@@ -44,6 +44,12 @@ class BaseVectorDatabase(ABC):
         """
         pass
 
+    def search_batch(self, query_matrix: VectorType, k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[List[SearchResultItem]]:
+        """Searches for the k nearest vectors of every row of the query matrix.
+        Returns one result list per row; the default issues one search per row.
+        """
+        return [self.search(query, k=k, filters=filters) for query in query_matrix]
+
     @abstractmethod
     def delete_vector(self, vector_id: str) -> None:
         """Deletes a vector from the database by its unique identifier."""
@@ -19,20 +19,23 @@ logger = logging.getLogger(__name__)
 
 def main():
     """Parses CLI arguments and dispatches the requested mode
-    (index, search, stats, or serve) for the RAG system.
+    (index, search, stats, tune, compact, or serve) for the RAG system.
     """
     parser = argparse.ArgumentParser(description="RAG System for Shoe Image Search")
-    parser.add_argument("--mode", choices=["index", "search", "serve", "stats"], default="serve")
+    parser.add_argument("--mode", choices=["index", "search", "serve", "stats", "tune", "compact"], default="serve")
     parser.add_argument("--query", type=str)
     parser.add_argument("--search-type", choices=["text", "image", "hybrid", "semantic", "natural"], default="text")
     parser.add_argument("--image-dir", type=str)
-    parser.add_argument("--vector-backend", choices=["faiss", "chroma"], default="faiss")
+    parser.add_argument("--vector-backend", choices=["faiss", "sharded", "chroma"], default="faiss")
     parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--sample-size", type=int, default=200)
     args = parser.parse_args()
 
     try:
         from rag_system import RAGSystem
-        rag = RAGSystem(vector_backend=args.vector_backend)
+        # serve shares the API's vector database; opening another writer on
+        # the same collection would fail on its writer lock.
+        rag = None if args.mode == "serve" else RAGSystem(vector_backend=args.vector_backend)
 
         if args.mode == "index":
             print(json.dumps(rag.index_images(args.image_dir), indent=2))
@@ -49,6 +52,16 @@ def main():
         elif args.mode == "stats":
             print(json.dumps(rag.get_stats(), indent=2))
 
+        elif args.mode == "tune":
+            vector_db = rag.search_engine.vector_db
+            if not hasattr(vector_db, "tune_search"):
+                print(f"Error: the {args.vector_backend} backend has no tunable search knobs")
+                return 1
+            print(json.dumps(vector_db.tune_search(args.limit, args.sample_size), indent=2))
+
+        elif args.mode == "compact":
+            print(json.dumps(rag.embedding_manager.compact_cache(), indent=2))
+
         elif args.mode == "serve":
             print("Starting RAG System...")
             print("Web interface: http://localhost:5000")
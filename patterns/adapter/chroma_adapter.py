@@ -27,18 +27,27 @@ class ChromaDBAdapter(BaseVectorDatabase):
         """Searches the ChromaDB collection for the k nearest neighbors of the query vector.
         Returns a list of SearchResultItem objects with similarity scores and metadata.
         """
-        results_data = self._collection.query(query_embeddings=[query_vector.tolist()], n_results=k)
-        results = []
-        for i, (vid, dist, meta) in enumerate(zip(results_data["ids"][0], results_data["distances"][0], results_data["metadatas"][0])):
-            results.append(SearchResultItem(
-                vector_id=vid,
-                filename=meta.get("filename", ""),
-                original_path=meta.get("original_path", ""),
-                similarity_score=1.0 - float(dist),
-                rank=i + 1,
-                metadata=meta,
-            ))
-        return results
+        return self.search_batch(query_vector.reshape(1, -1), k, filters)[0]
+
+    def search_batch(self, query_matrix: VectorType, k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[List[SearchResultItem]]:
+        """Queries the ChromaDB collection with every row of the query matrix in one call.
+        Returns one list of SearchResultItem objects per query row.
+        """
+        results_data = self._collection.query(query_embeddings=query_matrix.tolist(), n_results=k)
+        batches = []
+        for ids, dists, metas in zip(results_data["ids"], results_data["distances"], results_data["metadatas"]):
+            results = []
+            for i, (vid, dist, meta) in enumerate(zip(ids, dists, metas)):
+                results.append(SearchResultItem(
+                    vector_id=vid,
+                    filename=meta.get("filename", ""),
+                    original_path=meta.get("original_path", ""),
+                    similarity_score=1.0 - float(dist),
+                    rank=i + 1,
+                    metadata=meta,
+                ))
+            batches.append(results)
+        return batches
 
     def delete_vector(self, vector_id: str) -> None:
         """Deletes a vector from the ChromaDB collection by its unique identifier."""
@@ -16,23 +16,39 @@ class FAISSAdapter(BaseVectorDatabase):
         self._faiss = faiss
         self._np = np
         self._metadata = []
+        self._id_to_row: Dict[str, int] = {}
         self._index = self._faiss.IndexFlatL2(self._dimension)
         self._is_initialized = True
 
     def add_vectors(self, vectors: VectorType, metadata: List[Dict[str, Any]], ids: Optional[List[str]] = None) -> None:
         """Adds vectors and their associated metadata to the FAISS index.
-        Vectors are cast to float32 before insertion.
+        Vectors are cast to float32 before insertion and indexed by vector ID.
         """
         self._index.add(vectors.astype("float32"))
-        self._metadata.extend(metadata)
+        for i, meta in enumerate(metadata):
+            if ids is not None:
+                meta["vector_id"] = ids[i]
+            if "vector_id" in meta:
+                self._id_to_row[meta["vector_id"]] = len(self._metadata)
+            self._metadata.append(meta)
 
     def search(self, query_vector: VectorType, k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[SearchResultItem]:
         """Searches the FAISS index for the k nearest neighbors of the query vector.
         Returns a list of SearchResultItem objects with inverse-distance similarity scores.
         """
-        distances, indices = self._index.search(query_vector.reshape(1, -1).astype("float32"), k)
+        return self.search_batch(query_vector.reshape(1, -1), k, filters)[0]
+
+    def search_batch(self, query_matrix: VectorType, k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[List[SearchResultItem]]:
+        """Searches the FAISS index for every row of the query matrix in a single call.
+        Returns one list of SearchResultItem objects per query row.
+        """
+        distances, indices = self._index.search(query_matrix.astype("float32"), k)
+        return [self._to_items(d, i) for d, i in zip(distances, indices)]
+
+    def _to_items(self, distances, indices) -> List[SearchResultItem]:
+        """Converts one row of FAISS distances and positions into ranked result items."""
         results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+        for i, (distance, idx) in enumerate(zip(distances, indices)):
             if idx < len(self._metadata):
                 meta = self._metadata[idx]
                 results.append(SearchResultItem(
@@ -49,10 +65,9 @@ class FAISSAdapter(BaseVectorDatabase):
         """Marks a vector as deleted in the metadata store by setting a deletion flag.
         Does not remove the vector from the underlying FAISS index.
         """
-        for meta in self._metadata:
-            if meta.get("vector_id") == vector_id:
-                meta["_deleted"] = True
-                break
+        row = self._id_to_row.get(vector_id)
+        if row is not None:
+            self._metadata[row]["_deleted"] = True
 
     def get_stats(self) -> Dict[str, Any]:
         """Returns statistics about the FAISS index including total vectors,
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 from typing import List, Dict, Any, Optional
 from domain.models import SearchQuery, SearchResultItem
 from domain.base_classes import BaseSearchStrategy
@@ -21,18 +22,18 @@ class HybridSearchStrategy(BaseSearchStrategy):
         if not em or not vdb:
             raise ValueError("Missing required dependencies in context")
         all_results: Dict[str, SearchResultItem] = {}
+        branches = []
         if query.query:
-            emb = em.get_text_embedding(query.query, "clip")
-            for r in vdb.search(emb, k=query.limit * 2):
-                all_results.setdefault(r.vector_id, r)
-                all_results[r.vector_id].scores = getattr(all_results[r.vector_id], "scores", {})
-                all_results[r.vector_id].scores["text"] = r.similarity_score
+            branches.append(("text", em.get_text_embedding(query.query, "clip")))
         if query.image_path:
-            emb = em.get_image_embedding(query.image_path, "clip")
-            for r in vdb.search(emb, k=query.limit * 2):
-                all_results.setdefault(r.vector_id, r)
-                all_results[r.vector_id].scores = getattr(all_results[r.vector_id], "scores", {})
-                all_results[r.vector_id].scores["visual"] = r.similarity_score
+            branches.append(("visual", em.get_image_embedding(query.image_path, "clip")))
+        if branches:
+            batches = vdb.search_batch(np.stack([emb for _, emb in branches]), k=query.limit * 2)
+            for (kind, _), results in zip(branches, batches):
+                for r in results:
+                    all_results.setdefault(r.vector_id, r)
+                    all_results[r.vector_id].scores = getattr(all_results[r.vector_id], "scores", {})
+                    all_results[r.vector_id].scores[kind] = r.similarity_score
         if query.filters:
             for r in all_results.values():
                 r.scores["metadata"] = 1.0
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import List, Dict, Any
 from domain.models import SearchQuery, SearchResultItem
 from domain.base_classes import BaseSearchStrategy
@@ -19,9 +20,9 @@ class SemanticSearchStrategy(BaseSearchStrategy):
             raise ValueError("Missing required dependencies in context")
         expanded = qp.expand_query(query.query)
         all_results: Dict[str, SearchResultItem] = {}
-        for eq in expanded:
-            emb = em.get_text_embedding(eq, "clip")
-            for r in vdb.search(emb, k=query.limit * 2):
+        embs = np.stack([em.get_text_embedding(eq, "clip") for eq in expanded])
+        for results in vdb.search_batch(embs, k=query.limit * 2):
+            for r in results:
                 all_results.setdefault(r.vector_id, r)
                 all_results[r.vector_id].scores = getattr(all_results[r.vector_id], "scores", {"matches": 0})
                 all_results[r.vector_id].scores["matches"] += 1
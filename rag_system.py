@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 from core.search_engine import create_search_engine
-from core.embeddings import EmbeddingManager
+from core.model_registry import model_registry
 from core.query_processor import QueryProcessor
 from config.database import create_tables, test_connection
 from config.settings import DATA_DIR, VECTOR_DB_DIR, IMAGE_CONFIG
@@ -34,7 +34,7 @@ class RAGSystem:
             raise RuntimeError("Database connection failed")
         create_tables()
         self.search_engine = create_search_engine(self.vector_backend)
-        self.embedding_manager = EmbeddingManager()
+        self.embedding_manager = self.search_engine.embedding_manager
         self.query_processor = QueryProcessor()
         logger.info("RAG System initialized successfully!")
 
@@ -48,19 +48,19 @@ class RAGSystem:
             if not image_paths:
                 return {"status": "no_images", "count": 0}
 
-            indexed = failed = 0
-            for i in range(0, len(image_paths), batch_size):
-                for path in image_paths[i : i + batch_size]:
-                    try:
-                        emb = self.embedding_manager.get_image_embedding(path, "clip")
-                        meta = self._extract_metadata_from_path(path)
-                        self.search_engine.vector_db.add_vectors(
-                            vectors=emb.reshape(1, -1), metadata=[meta], ids=[f"img_{indexed}"]
-                        )
-                        indexed += 1
-                    except Exception as e:
-                        logger.error(f"Failed to index {path}: {e}")
-                        failed += 1
+            indexed = 0
+            batches = self.embedding_manager.iter_image_batches(image_paths, "clip", batch_size)
+            for rows, embeddings in batches:
+                try:
+                    self.search_engine.vector_db.add_vectors(
+                        vectors=embeddings,
+                        metadata=[self._extract_metadata_from_path(image_paths[r]) for r in rows],
+                        ids=[f"img_{indexed + i}" for i in range(len(rows))],
+                    )
+                    indexed += len(rows)
+                except Exception as e:
+                    logger.error(f"Failed to index batch starting at {image_paths[rows[0]]}: {e}")
+            failed = len(image_paths) - indexed
             return {"status": "completed", "indexed_count": indexed, "failed_count": failed, "total_found": len(image_paths)}
         except Exception as e:
             logger.error(f"Image indexing failed: {e}")
@@ -90,12 +90,15 @@ class RAGSystem:
             logger.error(f"Search failed: {e}")
             return []
 
-    def get_recommendations(self, image_path: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_recommendations(
+        self, image_path: Optional[str] = None, limit: int = 10,
+        vector_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """Returns visually similar image recommendations for the
-        given image path, delegating to the search engine.
+        given image path or indexed vector ID, delegating to the search engine.
         """
         try:
-            return self.search_engine.get_recommendations(image_path, limit)
+            return self.search_engine.get_recommendations(image_path, limit, vector_id=vector_id)
         except Exception as e:
             logger.error(f"Recommendations failed: {e}")
             return []
@@ -109,6 +112,9 @@ class RAGSystem:
                 "search_engine": self.search_engine.get_search_stats(),
                 "vector_db": self.search_engine.vector_db.get_stats(),
                 "system": {"vector_backend": self.vector_backend, "data_directory": str(DATA_DIR), "vector_db_directory": str(VECTOR_DB_DIR)},
+                "models": model_registry.loaded(),
+                "embedding_cache": self.embedding_manager.cache.stats(),
+                "query_cache": self.embedding_manager.query_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Stats retrieval failed: {e}")
@@ -55,6 +55,7 @@ class FakeVectorDB:
         query_vector: np.ndarray,
         k: int = 10,
         filters: Optional[Dict[str, Any]] = None,
+        quality: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Performs a brute-force nearest-neighbour search over stored
         vectors, applies optional filters, and returns the top-k results.
@@ -72,6 +73,28 @@ class FakeVectorDB:
             results = [r for r in results if all(r.get(fk) == fv for fk, fv in filters.items())]
         return results[:k]
 
+    def search_batch(
+        self,
+        query_matrix: np.ndarray,
+        k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        quality: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Runs search for every row of the query matrix."""
+        return [self.search(q, k=k, filters=filters) for q in query_matrix]
+
+    def search_range(
+        self,
+        query_vector: np.ndarray,
+        min_score: float,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        quality: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns search results scoring at least min_score."""
+        results = self.search(query_vector, k=limit, filters=filters)
+        return [r for r in results if r["similarity_score"] >= min_score]
+
     def get_vector_by_id(self, vector_id: str) -> Optional[np.ndarray]:
         """Looks up and returns the raw vector for the given ID, or None if not found."""
         for entry in self._store:
@@ -114,3 +137,33 @@ def random_vectors():
     """Generates a deterministic 5x512 float32 array of random vectors for testing."""
     rng = np.random.default_rng(42)
     return rng.random((5, 512)).astype("float32")
+
+
+def make_vectors(n: int, dim: int = 8, seed: int = 0) -> np.ndarray:
+    """Returns n deterministic random float32 vectors."""
+    return np.random.default_rng(seed).random((n, dim)).astype("float32")
+
+
+@pytest.fixture
+def faiss_config(tmp_path, monkeypatch):
+    """Points FAISSVectorDB and ShardedVectorDB at a temporary directory
+    with a private copy of the default FAISS policy, which is returned."""
+    from config.settings import VECTOR_DB_CONFIG
+    from core import faiss_db, sharded_db
+    monkeypatch.setattr(faiss_db, "VECTOR_DB_DIR", tmp_path)
+    monkeypatch.setattr(sharded_db, "VECTOR_DB_DIR", tmp_path)
+    monkeypatch.setitem(VECTOR_DB_CONFIG, "faiss", dict(VECTOR_DB_CONFIG["faiss"]))
+    return VECTOR_DB_CONFIG["faiss"]
+
+
+@pytest.fixture
+def chroma_config(tmp_path, monkeypatch):
+    """Points ChromaVectorDB at a temporary directory with the default
+    settings, dropping Chroma's process-wide client cache afterwards."""
+    from chromadb.api.shared_system_client import SharedSystemClient
+    from config.settings import VECTOR_DB_CONFIG
+    from core import chroma_db
+    monkeypatch.setattr(chroma_db, "VECTOR_DB_DIR", tmp_path)
+    monkeypatch.setitem(VECTOR_DB_CONFIG, "chroma", dict(VECTOR_DB_CONFIG["chroma"]))
+    yield VECTOR_DB_CONFIG["chroma"]
+    SharedSystemClient.clear_system_cache()
@@ -3,6 +3,7 @@
 Heavy ML modules are mocked before any project import so tests run fast.
 """
 import sys
+import threading
 from unittest.mock import MagicMock
 
 # Mock heavy ML modules before any project import touches them
@@ -18,6 +19,7 @@ from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 from api.main import app
+from api import dependencies
 from api.dependencies import get_search_engine
 from api.security.jwt_handler import create_access_token
 from api.security.token_blacklist import blacklist
@@ -183,3 +185,53 @@ class TestSystemEndpoints:
         """Verifies that an admin user can trigger an index rebuild successfully."""
         resp = client.post("/api/v1/system/rebuild-index", headers=auth_headers)
         assert resp.status_code == 200
+
+
+# ---------------------------------------------------------------------------
+# Upload endpoint
+# ---------------------------------------------------------------------------
+class TestUploadEndpoint:
+    def test_reupload_has_same_digest(self, client, auth_headers, tmp_path, monkeypatch):
+        """Checks that the same bytes uploaded twice get distinct files but
+        one content digest, which is what image embeddings are cached by."""
+        from api.routes.v1 import upload
+        monkeypatch.setattr(upload, "UPLOAD_DIR", tmp_path)
+        files = {"file": ("shoe.jpg", b"\xff\xd8\xff fake jpeg", "image/jpeg")}
+        first = client.post("/api/v1/files/upload", files=files, headers=auth_headers).json()
+        second = client.post("/api/v1/files/upload", files=files, headers=auth_headers).json()
+        assert first["filename"] != second["filename"]
+        assert first["digest"] == second["digest"]
+
+
+# ---------------------------------------------------------------------------
+# Dependency singletons
+# ---------------------------------------------------------------------------
+class TestDependencies:
+    def test_search_engine_creates_vector_db(self):
+        """Ensures the first get_search_engine call builds the shared vector
+        database under the singleton lock without deadlocking."""
+        dependencies.reset_instances()
+        found = []
+        with patch.object(dependencies, "create_vector_db") as create, \
+                patch.object(dependencies, "SearchEngine") as engine:
+            worker = threading.Thread(
+                target=lambda: found.append(dependencies.get_search_engine()), daemon=True
+            )
+            worker.start()
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+            assert found == [engine.return_value]
+            engine.assert_called_once_with(vector_db=create.return_value)
+        dependencies.reset_instances()
+
+    def test_second_worker_opens_read_only(self, faiss_config):
+        """Checks that a worker finding the collection's writer lock taken
+        by another worker serves the checkpoint read-only instead of failing."""
+        from core.faiss_db import FAISSVectorDB
+        dependencies.reset_instances()
+        writer = FAISSVectorDB(dimension=512, collection_name="shoe_images")
+        try:
+            assert dependencies.get_vector_db().get_stats()["read_only"] is True
+        finally:
+            dependencies.reset_instances()
+            writer.close()
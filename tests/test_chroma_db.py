@@ -0,0 +1,110 @@
+"""Tests for core.chroma_db.ChromaVectorDB against a temporary client."""
+import numpy as np
+import pytest
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from core.chroma_db import ChromaVectorDB
+from tests.conftest import make_vectors
+
+
+class TestBulkUpsert:
+    def test_chunks_respect_batch_size(self, chroma_config):
+        """Verifies that a large add is split into chunks of max_batch_size."""
+        chroma_config["max_batch_size"] = 7
+        db = ChromaVectorDB(dimension=8, collection_name="chunks")
+        sizes = []
+        upsert = db.collection.upsert
+
+        def recording_upsert(**kwargs):
+            sizes.append(len(kwargs["ids"]))
+            assert isinstance(kwargs["embeddings"], np.ndarray)
+            return upsert(**kwargs)
+
+        db.collection.upsert = recording_upsert
+        db.add_vectors(make_vectors(20), [{"brand": "nike"} for _ in range(20)])
+        assert sizes == [7, 7, 6]
+        assert db.get_stats()["total_vectors"] == 20
+
+    def test_generated_ids_do_not_collide(self, chroma_config):
+        """Checks that separate batches without IDs never overwrite each
+        other, that identical vectors with different metadata are kept
+        apart, and that re-adding the same records is an idempotent upsert."""
+        db = ChromaVectorDB(dimension=8, collection_name="ids")
+        db.add_vectors(make_vectors(5, seed=1), [{"brand": "nike"}] * 5)
+        db.add_vectors(make_vectors(5, seed=2), [{"brand": "puma"}] * 5)
+        assert db.get_stats()["total_vectors"] == 10
+        db.add_vectors(make_vectors(5, seed=2), [{"brand": "puma"}] * 5)
+        assert db.get_stats()["total_vectors"] == 10
+        db.add_vectors(make_vectors(5, seed=2), [{"brand": "vans"}] * 5)
+        assert db.get_stats()["total_vectors"] == 15
+        vid = ChromaVectorDB.content_id(make_vectors(5, seed=2)[0], {"brand": "puma"})
+        assert db.collection.get(ids=[vid])["metadatas"] == [{"brand": "puma"}]
+
+    def test_duplicates_within_a_chunk(self, chroma_config):
+        """Ensures repeated vectors in one batch are neither rejected as
+        duplicate IDs nor merged when their metadata differs."""
+        db = ChromaVectorDB(dimension=8, collection_name="dupes")
+        vecs = np.repeat(make_vectors(1), 4, axis=0)
+        paths = [{"original_path": p} for p in ("a.jpg", "b.jpg", "a.jpg", "a.jpg")]
+        db.add_vectors(vecs, paths)
+        assert db.get_stats()["total_vectors"] == 2
+        db.add_vectors(vecs[:2], [{}, {}], ids=["x", "x"])
+        assert db.get_stats()["total_vectors"] == 3
+
+    def test_add_stream_and_sparse_metadata(self, chroma_config):
+        """Ensures streamed batches are all written and that None or empty
+        metadata does not make Chroma reject the batch."""
+        db = ChromaVectorDB(dimension=8, collection_name="stream")
+        batches = ((make_vectors(4, seed=s), [{"brand": None}, {}, {"size": 9}, {}]) for s in range(3))
+        assert db.add_stream(batches) == 12
+        assert db.get_stats()["total_vectors"] == 12
+
+
+class TestPersistentClient:
+    def test_reopen_is_warm(self, chroma_config):
+        """Verifies that a persistent collection survives a client restart."""
+        vecs = make_vectors(6)
+        db = ChromaVectorDB(dimension=8, collection_name="warm")
+        db.add_vectors(vecs, [{"brand": "nike"}] * 6, ids=[f"v{i}" for i in range(6)])
+        SharedSystemClient.clear_system_cache()
+        reopened = ChromaVectorDB(dimension=8, collection_name="warm")
+        assert reopened.get_stats() == {**db.get_stats(), "total_vectors": 6}
+        np.testing.assert_allclose(reopened.get_vector_by_id("v3"), vecs[3], rtol=1e-6)
+        assert reopened.get_vector_by_id("missing") is None
+
+
+class TestSearchProjection:
+    def test_include_trims_fields(self, chroma_config):
+        """Checks that searches never fetch documents and that an ID-and-score
+        projection omits metadata."""
+        db = ChromaVectorDB(dimension=8, collection_name="project")
+        vecs = make_vectors(10)
+        db.add_vectors(vecs, [{"brand": "nike"}] * 10, ids=[f"v{i}" for i in range(10)])
+        requested = []
+        query = db.collection.query
+
+        def recording_query(**kwargs):
+            requested.append(kwargs["include"])
+            return query(**kwargs)
+
+        db.collection.query = recording_query
+        full = db.search(vecs[2], k=3)
+        slim = db.search(vecs[2], k=3, include=["distances"])
+        assert requested == [["metadatas", "distances"], ["distances"]]
+        assert full[0]["brand"] == "nike" and full[0]["vector_id"] == "v2"
+        assert set(slim[0]) == {"vector_id", "similarity_score", "rank"}
+        assert [r["vector_id"] for r in slim] == [r["vector_id"] for r in full]
+        with pytest.raises(ValueError):
+            db.search(vecs[2], include=["documents"])
+
+    def test_batched_queries_use_one_call(self, chroma_config):
+        """Ensures a multi-vector search is answered by a single query call."""
+        db = ChromaVectorDB(dimension=8, collection_name="batched")
+        vecs = make_vectors(10)
+        db.add_vectors(vecs, [{"brand": "nike"}] * 10, ids=[f"v{i}" for i in range(10)])
+        calls = []
+        query = db.collection.query
+        db.collection.query = lambda **kw: calls.append(kw) or query(**kw)
+        pages = db.search_batch(vecs[:4], k=2)
+        assert len(calls) == 1
+        assert [p[0]["vector_id"] for p in pages] == ["v0", "v1", "v2", "v3"]
@@ -0,0 +1,41 @@
+"""Tests for core.decode_pipeline.DecodePipeline (no heavy ML imports)."""
+import threading
+import time
+
+import pytest
+
+from core.decode_pipeline import DecodePipeline
+
+
+class TestDecodePipeline:
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_batches_are_full_and_ordered(self, workers):
+        """Verifies that failed loads are skipped so batches stay full and
+        that rows come back in input order."""
+        def load(path):
+            if path.startswith("bad"):
+                raise OSError("truncated file")
+            return path.upper()
+
+        paths = ["a", "bad1", "b", "c", "bad2", "d", "e"]
+        batches = list(DecodePipeline(load, workers=workers).batches(paths, 2))
+        assert batches == [([0, 2], ["A", "B"]), ([3, 5], ["C", "D"]), ([6], ["E"])]
+
+    def test_prefetch_is_bounded(self):
+        """Checks that no more than prefetch_batches * batch_size images are
+        decoded ahead of a consumer that is not keeping up."""
+        started = []
+        lock = threading.Lock()
+
+        def load(path):
+            with lock:
+                started.append(path)
+            return path
+
+        pipeline = DecodePipeline(load, workers=4, prefetch_batches=2)
+        batches = pipeline.batches([str(i) for i in range(100)], 5)
+        next(batches)
+        time.sleep(0.05)
+        with lock:
+            assert len(started) <= 5 + 2 * 5
+        batches.close()
@@ -0,0 +1,293 @@
+"""Tests for core.embedding_cache.EmbeddingCache and its use by
+EmbeddingManager. Heavy ML modules are mocked; embedders are stand-ins."""
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy ML modules before any project import touches them
+for mod_name in [
+    "clip", "sentence_transformers", "torch", "torchvision",
+    "torchvision.transforms", "torchvision.models",
+]:
+    if mod_name not in sys.modules:
+        sys.modules[mod_name] = MagicMock()
+
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from config.settings import MODEL_CONFIG
+from core import embedding_cache
+from core.embedding_cache import EmbeddingCache
+from core.embedding_manager import EmbeddingManager
+from core.query_cache import QueryEmbeddingCache
+from core.utils import FileDigestMemo
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Provides an unbounded cache in a temporary directory."""
+    c = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    yield c
+    c.close()
+
+
+def _vec(i: float, dim: int = 4) -> np.ndarray:
+    """Returns a distinct float32 test vector."""
+    return np.arange(dim, dtype=np.float32) + i
+
+
+class TestEmbeddingCache:
+    def test_put_get_roundtrip(self, cache):
+        """Verifies a stored vector comes back as equal, writable float32."""
+        cache.put("a", _vec(1).astype(np.float64))
+        out = cache.get("a")
+        np.testing.assert_array_equal(out, _vec(1))
+        assert out.dtype == np.float32 and out.flags.writeable
+        assert cache.get("missing") is None
+
+    def test_batch_get_returns_present_keys(self, cache):
+        """Checks that get_many returns only cached keys, across chunks."""
+        cache.put_many({f"k{i}": _vec(i) for i in range(1200)})
+        found = cache.get_many([f"k{i}" for i in range(0, 1300, 2)])
+        assert len(found) == 600
+        np.testing.assert_array_equal(found["k1000"], _vec(1000))
+        assert len(cache) == 1200
+
+    def test_replace_keeps_counts(self, cache):
+        """Ensures overwriting a key does not inflate entry or byte totals."""
+        cache.put("a", _vec(0))
+        cache.put("a", _vec(1, dim=8))
+        assert len(cache) == 1 and cache.stats()["vector_bytes"] == 32
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Confirms that hits protect entries from eviction past max_entries."""
+        cache = EmbeddingCache(tmp_path / "lru.sqlite3", max_entries=10)
+        cache.put_many({f"k{i}": _vec(i) for i in range(10)})
+        assert cache.get("k0") is not None
+        cache.put("k10", _vec(10))
+        assert len(cache) <= 10
+        assert cache.get("k0") is not None and cache.get("k10") is not None
+        assert cache.get("k1") is None
+        cache.close()
+
+    def test_byte_bound(self, tmp_path):
+        """Checks that max_bytes bounds the stored vector bytes."""
+        cache = EmbeddingCache(tmp_path / "bytes.sqlite3", max_bytes=1600)
+        cache.put_many({f"k{i}": _vec(i) for i in range(200)})
+        assert cache.stats()["vector_bytes"] <= 1600
+        cache.close()
+
+    def test_bounds_hold_across_instances(self, tmp_path):
+        """Checks that two caches sharing one file (as two workers would)
+        enforce max_entries together and evict the older writer's entries."""
+        path = tmp_path / "shared.sqlite3"
+        first = EmbeddingCache(path, max_entries=10)
+        second = EmbeddingCache(path, max_entries=10)
+        first.put_many({f"a{i}": _vec(i) for i in range(8)})
+        second.put_many({f"b{i}": _vec(i) for i in range(8)})
+        with sqlite3.connect(str(path)) as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        assert stored <= 10 and len(first) == len(second) == stored
+        assert all(first.get(f"b{i}") is not None for i in range(8))
+        first.close()
+        second.close()
+
+    def test_persists_and_compacts(self, tmp_path, monkeypatch):
+        """Verifies entries survive reopening and compaction reclaims space."""
+        monkeypatch.setattr(embedding_cache, "_LOW_WATER", 0.1)
+        path = tmp_path / "c.sqlite3"
+        cache = EmbeddingCache(path, max_entries=1000)
+        cache.put_many({f"k{i}": _vec(i, dim=512) for i in range(1000)})
+        cache.put("k1000", _vec(1000, dim=512))
+        result = cache.compact()
+        assert result["bytes_after"] < result["bytes_before"]
+        cache.close()
+        reopened = EmbeddingCache(path)
+        assert len(reopened) == 100
+        np.testing.assert_array_equal(reopened.get("k1000"), _vec(1000, dim=512))
+        reopened.close()
+
+
+class TestEmbeddingManagerCache:
+    @pytest.fixture
+    def manager(self, tmp_path):
+        """Builds an EmbeddingManager whose text embedder echoes text length."""
+        manager = EmbeddingManager(cache_dir=tmp_path)
+        embedder = MagicMock()
+        embedder.encode_texts_batch.side_effect = lambda texts: [
+            np.full(4, len(t), dtype=np.float32) for t in texts
+        ]
+        manager.multimodal_embedder.text_embedder = embedder
+        yield manager, embedder
+        manager.cache.close()
+
+    def test_batch_encodes_only_misses(self, manager):
+        """Checks that batch text embedding encodes only uncached texts and
+        keeps input order."""
+        manager, embedder = manager
+        manager.batch_process_texts(["ab", "abcd"])
+        out = manager.batch_process_texts(["abcd", "abc", "ab"])
+        assert embedder.encode_texts_batch.call_args_list[-1].args == (["abc"],)
+        assert [int(v[0]) for v in out] == [4, 3, 2]
+
+
+class TestContentKeys:
+    @pytest.fixture
+    def manager(self, tmp_path):
+        """Builds an EmbeddingManager whose CLIP embedder encodes each image
+        as its byte count."""
+        manager = EmbeddingManager(cache_dir=tmp_path)
+        embedder = manager.multimodal_embedder.image_embedder
+        encode = MagicMock(side_effect=lambda p: np.full(4, os.path.getsize(p), dtype=np.float32))
+        with patch.object(embedder, "encode_image", encode):
+            yield manager, encode
+        manager.cache.close()
+
+    def _write(self, path, data: bytes) -> str:
+        """Writes data to path, creating parent directories."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return str(path)
+
+    def test_same_stem_different_folders_do_not_collide(self, manager, tmp_path):
+        """Verifies two different files named shoe_001.jpg get separate entries."""
+        manager, encode = manager
+        a = self._write(tmp_path / "a" / "shoe_001.jpg", b"x" * 3)
+        b = self._write(tmp_path / "b" / "shoe_001.jpg", b"y" * 5)
+        assert manager.get_image_embedding(a)[0] == 3
+        assert manager.get_image_embedding(b)[0] == 5
+        assert encode.call_count == 2
+
+    def test_same_bytes_under_new_name_hit(self, manager, tmp_path):
+        """Checks that a re-upload of identical bytes reuses the embedding."""
+        manager, encode = manager
+        first = self._write(tmp_path / "1f0e.jpg", b"shoe-bytes")
+        again = self._write(tmp_path / "9c2d.jpg", b"shoe-bytes")
+        manager.get_image_embedding(first)
+        np.testing.assert_array_equal(
+            manager.get_image_embedding(again), manager.get_image_embedding(first)
+        )
+        assert encode.call_count == 1
+
+    def test_model_version_is_part_of_key(self, manager, tmp_path):
+        """Ensures vectors from another model variant are never served."""
+        manager, encode = manager
+        path = self._write(tmp_path / "shoe.jpg", b"shoe-bytes")
+        manager.get_image_embedding(path)
+        embedder = manager.multimodal_embedder.image_embedder
+        with patch.dict(MODEL_CONFIG["clip"], {"precision": "int8"}), \
+                patch.object(embedder, "_ensure_loaded"):
+            manager.get_image_embedding(path)
+        assert encode.call_count == 2
+
+    def test_indexing_fills_cache(self, manager, tmp_path):
+        """Verifies streamed indexing batches are cached by content, skipping
+        unreadable files and failed (zero) rows."""
+        manager, encode = manager
+        paths = [
+            self._write(tmp_path / "a.jpg", b"x" * 3),
+            self._write(tmp_path / "b.jpg", b"y" * 5),
+            str(tmp_path / "gone.jpg"),
+        ]
+        batch = np.stack([np.full(4, 3), np.zeros(4), np.full(4, 7)]).astype(np.float32)
+        embedder = manager.multimodal_embedder.image_embedder
+        with patch.object(embedder, "iter_batches", return_value=iter([([0, 1, 2], batch)])):
+            assert len(list(manager.iter_image_batches(paths))) == 1
+        assert len(manager.cache) == 1
+        assert manager.get_image_embedding(paths[0])[0] == 3
+        assert encode.call_count == 0
+
+    def test_unreadable_image_is_not_cached(self, manager, tmp_path):
+        """Checks that a missing file is encoded (to zeros) but not cached."""
+        manager, encode = manager
+        encode.side_effect = lambda p: np.zeros(4, dtype=np.float32)
+        manager.get_image_embedding(str(tmp_path / "gone.jpg"))
+        assert len(manager.cache) == 0
+
+
+class TestFileDigestMemo:
+    def test_unchanged_file_is_not_rehashed(self, tmp_path):
+        """Verifies the memo trusts (path, mtime, size) and re-hashes when
+        either changes."""
+        memo = FileDigestMemo()
+        path = tmp_path / "img.jpg"
+        path.write_bytes(b"aaaa")
+        first = memo.digest(str(path))
+        st = path.stat()
+        path.write_bytes(b"bbbb")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert memo.digest(str(path)) == first
+        path.write_bytes(b"bbbbb")
+        assert memo.digest(str(path)) != first
+
+    def test_bounded(self, tmp_path):
+        """Checks that the memo keeps at most max_entries paths."""
+        memo = FileDigestMemo(max_entries=2)
+        for i in range(3):
+            (tmp_path / f"{i}.jpg").write_bytes(bytes([i]))
+            memo.digest(str(tmp_path / f"{i}.jpg"))
+        assert len(memo._entries) == 2
+
+
+class TestQueryCache:
+    @pytest.fixture
+    def manager(self, tmp_path):
+        """Builds an EmbeddingManager whose CLIP text encoder counts calls."""
+        manager = EmbeddingManager(cache_dir=tmp_path)
+        embedder = manager.multimodal_embedder.clip_embedder
+        encode = MagicMock(side_effect=lambda t: np.full(4, len(t), dtype=np.float32))
+        with patch.object(embedder, "encode_text", encode):
+            yield manager, encode
+        manager.cache.close()
+
+    def test_repeated_query_is_memory_hit(self, manager):
+        """Checks that normalized repeats skip both the model and the disk
+        cache and are counted as hits."""
+        manager, encode = manager
+        first = manager.get_text_embedding("Red  Nike shoes", "clip")
+        with patch.object(manager.cache, "get") as disk_get:
+            again = manager.get_text_embedding("red nike shoes ", "clip")
+            manager.get_text_embedding("RED NIKE SHOES", "clip")
+        disk_get.assert_not_called()
+        assert again is manager.get_text_embedding("red nike shoes", "clip")
+        np.testing.assert_array_equal(first, again)
+        assert encode.call_count == 1 and not again.flags.writeable
+        stats = manager.query_cache_stats()
+        assert stats["hits"] == 3 and stats["misses"] == 1 and stats["entries"] == 1
+
+    def test_disk_hit_fills_memory_tier(self, manager, tmp_path):
+        """Verifies a fresh manager serves a known query from disk once,
+        then from memory."""
+        manager, encode = manager
+        manager.get_text_embedding("white sneakers", "clip")
+        manager.cache.close()
+        fresh = EmbeddingManager(cache_dir=tmp_path)
+        fresh.get_text_embedding("white sneakers", "clip")
+        with patch.object(fresh.cache, "get") as disk_get:
+            fresh.get_text_embedding("white sneakers", "clip")
+        disk_get.assert_not_called()
+        assert encode.call_count == 1
+        fresh.cache.close()
+
+    def test_clear_resets_stats(self, manager):
+        """Ensures clearing the caches publishes cache_cleared to the observer."""
+        manager, _ = manager
+        manager.get_text_embedding("boots", "clip")
+        manager.clear_cache()
+        assert manager.query_cache_stats() == {
+            "hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0,
+            "max_entries": manager.query_cache.max_entries,
+        }
+
+    def test_lru_bound(self):
+        """Checks that the least recently used query is evicted when full."""
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put("a", _vec(0))
+        cache.put("b", _vec(1))
+        cache.get("a")
+        cache.put("c", _vec(2))
+        assert cache.get("b") is None and cache.get("a") is not None
+        assert len(cache) == 2
@@ -0,0 +1,733 @@
+"""Tests for core.faiss_db.FAISSVectorDB persistence against a temporary
+vector store directory."""
+import json
+import pickle
+import threading
+import time
+
+import faiss
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from core import faiss_db
+from core.faiss_db import FAISSVectorDB, WriterLockedError, parse_durability
+from core.faiss_index_factory import needs_migration, select_index_spec
+from tests.conftest import make_vectors
+
+
+def _abandon(db: FAISSVectorDB) -> None:
+    """Simulates the owning process exiting without closing db: the
+    checkpointer stops without a final checkpoint and the kernel drops the
+    writer lock."""
+    db._stop_checkpointer()
+    db._writer_lock.release()
+
+
+class TestSegmentPersistence:
+    def test_reopen_replays_segments(self, faiss_config):
+        """Verifies that unmerged additions and updates survive a reopen."""
+        db = FAISSVectorDB(dimension=8, collection_name="wal")
+        vecs = make_vectors(5)
+        for i in range(5):
+            db.add_vectors(vecs[i : i + 1], [{"brand": "nike"}], ids=[f"v{i}"])
+        db.update_metadata("v2", {"brand": "puma"})
+        db.delete_vector("v4")
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="wal")
+        assert reopened.index.ntotal == 4
+        assert len(reopened.metadata) == 5
+        assert reopened.metadata.row(2)["brand"] == "puma"
+        assert reopened.metadata.row(4)["deleted"] is True
+
+    def test_checkpoint_merges_segments(self, faiss_config):
+        """Checks that a checkpoint folds segments into the snapshot files."""
+        db = FAISSVectorDB(dimension=8, collection_name="merge")
+        db.add_vectors(make_vectors(3), [{} for _ in range(3)])
+        db.checkpoint()
+        assert db.get_stats()["segment_bytes"] == 0
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="merge")
+        assert reopened.index.ntotal == 3
+        assert len(reopened.metadata) == 3
+
+    def test_index_is_checkpointed_with_metadata(self, faiss_config, tmp_path):
+        """Verifies the index is swapped in with the metadata directory and
+        that a collection checkpointed with a separate index file still opens."""
+        db = FAISSVectorDB(dimension=8, collection_name="atomic")
+        db.add_vectors(make_vectors(3), [{} for _ in range(3)])
+        db.close()
+        (tmp_path / "atomic_metadata" / "index.faiss").rename(tmp_path / "atomic.faiss")
+        reopened = FAISSVectorDB(dimension=8, collection_name="atomic")
+        assert reopened.index.ntotal == 3
+        reopened.checkpoint()
+        assert not (tmp_path / "atomic.faiss").exists()
+        reopened.close()
+        assert FAISSVectorDB(dimension=8, collection_name="atomic").index.ntotal == 3
+
+    def test_replay_skips_rows_already_merged(self, faiss_config):
+        """Ensures segments left behind after a merge are not applied twice."""
+        db = FAISSVectorDB(dimension=8, collection_name="dup")
+        db.add_vectors(make_vectors(2), [{}, {}])
+        db._write_snapshot(*db._capture_snapshot())
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="dup")
+        assert reopened.index.ntotal == 2
+
+    def test_torn_tail_is_truncated(self, faiss_config, tmp_path):
+        """Confirms that a partially written record is dropped on replay."""
+        db = FAISSVectorDB(dimension=8, collection_name="torn")
+        db.add_vectors(make_vectors(1), [{}], ids=["a"])
+        db._log.close()
+        segment = next((tmp_path / "torn_segments").glob("segment_*.log"))
+        with open(segment, "ab") as f:
+            f.write(b"\x10\x00\x00\x00garbage")
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="torn")
+        assert reopened.index.ntotal == 1
+
+    def test_clear_discards_older_generation(self, faiss_config):
+        """Verifies that logged additions from before a clear are never replayed."""
+        db = FAISSVectorDB(dimension=8, collection_name="gen")
+        db.add_vectors(make_vectors(2), [{}, {}])
+        db.clear_database()
+        db.add_vectors(make_vectors(1, seed=1), [{}], ids=["fresh"])
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="gen")
+        assert len(reopened.metadata) == 1
+        assert reopened.metadata.row(0)["vector_id"] == "fresh"
+
+    def test_background_merge_after_sealed_segments(self, faiss_config, tmp_path):
+        """Checks that rotating past the merge threshold triggers a merge."""
+        faiss_config.update({"segment_max_bytes": 1, "merge_after_segments": 2})
+        db = FAISSVectorDB(dimension=8, collection_name="bg")
+        vecs = make_vectors(4)
+        for i in range(4):
+            db.add_vectors(vecs[i : i + 1], [{}])
+        db._wait_for_merge()
+        assert (tmp_path / "bg_metadata" / "index.faiss").exists()
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="bg")
+        assert reopened.index.ntotal == 4
+
+
+class TestColumnarMetadata:
+    def test_migrates_legacy_pickle(self, faiss_config, tmp_path):
+        """Verifies that a pickled metadata list is loaded into the columnar store."""
+        index = faiss.IndexFlatL2(8)
+        index.add(make_vectors(2))
+        faiss.write_index(index, str(tmp_path / "legacy.faiss"))
+        with open(tmp_path / "legacy_metadata.pkl", "wb") as f:
+            pickle.dump([
+                {"vector_id": "x", "brand": "vans", "index_id": 0},
+                {"vector_id": "y", "brand": "asics", "index_id": 1, "deleted": True},
+            ], f)
+        db = FAISSVectorDB(dimension=8, collection_name="legacy")
+        assert db.metadata.row(0)["brand"] == "vans"
+        assert db.metadata.is_deleted(1)
+        assert np.allclose(db._vectors.matrix(), make_vectors(2))
+
+    def test_search_returns_materialized_rows(self, faiss_config):
+        """Checks that search results carry metadata, rank, and score."""
+        db = FAISSVectorDB(dimension=8, collection_name="rows")
+        vecs = make_vectors(3)
+        db.add_vectors(vecs, [{"brand": "nike"}, {"brand": "puma"}, {"brand": "vans"}])
+        results = db.search(vecs[1], k=1)
+        assert results[0]["brand"] == "puma"
+        assert results[0]["index_id"] == 1
+        assert results[0]["rank"] == 1
+
+    @pytest.mark.parametrize("metric", ["cosine", "l2"])
+    def test_results_are_json_serializable(self, faiss_config, metric):
+        """Ensures result rows hold plain Python numbers, so API responses
+        can be encoded without numpy-aware serializers."""
+        faiss_config["metric"] = metric
+        db = FAISSVectorDB(dimension=8, collection_name=f"json_{metric}")
+        vecs = make_vectors(5)
+        db.add_vectors(vecs, [{"brand": "nike"} for _ in range(5)])
+        results = db.search(vecs[0], k=3) + db.search_range(vecs[0], 0.1, limit=3)
+        assert json.loads(json.dumps(results))[0]["index_id"] == 0
+        assert all(type(r["similarity_score"]) is float for r in results)
+
+
+class TestFilterPushdown:
+    def test_selective_filter_returns_full_page(self, faiss_config):
+        """Verifies that a rare brand still fills the page with an IVF index."""
+        faiss_config.update({"index_type": "IVF8,Flat", "nprobe": 1, "delta_max_rows": 1})
+        db = FAISSVectorDB(dimension=8, collection_name="push")
+        vecs = make_vectors(400)
+        brands = ["jordan" if i % 40 == 0 else "nike" for i in range(400)]
+        db.add_vectors(vecs, [{"brand": b} for b in brands])
+        assert db.get_stats()["delta_rows"] == 0
+        results = db.search(vecs[1], k=10, filters={"brand": "jordan"})
+        assert len(results) == 10
+        assert all(r["brand"] == "jordan" for r in results)
+
+    def test_deleted_rows_are_not_returned(self, faiss_config):
+        """Checks that soft-deleted vectors never appear in search results."""
+        db = FAISSVectorDB(dimension=8, collection_name="del")
+        vecs = make_vectors(3)
+        db.add_vectors(vecs, [{}, {}, {}], ids=["a", "b", "c"])
+        db.delete_vector("b")
+        results = db.search(vecs[1], k=3)
+        assert len(results) == 2
+        assert "b" not in {r["vector_id"] for r in results}
+
+    def test_list_filter_and_no_match(self, faiss_config):
+        """Confirms list filters match any member and unknown values match nothing."""
+        db = FAISSVectorDB(dimension=8, collection_name="list")
+        vecs = make_vectors(3)
+        db.add_vectors(vecs, [{"brand": "nike"}, {"brand": "puma"}, {"brand": "vans"}])
+        hits = db.search(vecs[0], k=3, filters={"brand": ["puma", "vans"]})
+        assert {r["brand"] for r in hits} == {"puma", "vans"}
+        assert db.search(vecs[0], k=3, filters={"brand": "reebok"}) == []
+
+
+class TestBulkMutations:
+    def test_update_many_and_delete_many_log_once(self, faiss_config):
+        """Verifies that bulk edits are applied, logged as one record, and replayed."""
+        db = FAISSVectorDB(dimension=8, collection_name="bulk")
+        db.add_vectors(make_vectors(4), [{"brand": "nike"} for _ in range(4)], ids=list("abcd"))
+        before = db.get_stats()["segment_bytes"]
+        db.update_metadata_many({"a": {"brand": "puma"}, "b": {"brand": "vans"}, "zz": {}})
+        after_update = db.get_stats()["segment_bytes"]
+        db.delete_many(["c", "d", "missing"])
+        records = list(db._log.replay())
+        assert len(records) == 3
+        assert after_update > before
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="bulk")
+        assert reopened.metadata.row(reopened.metadata.find("b"))["brand"] == "vans"
+        assert reopened.metadata.deleted_mask().tolist() == [False, False, True, True]
+
+
+class TestRebuild:
+    def test_rebuild_compacts_deleted_rows(self, faiss_config, tmp_path):
+        """Verifies that rebuild drops deleted rows from the index, metadata,
+        and raw vector file while keeping the remaining vectors searchable."""
+        db = FAISSVectorDB(dimension=8, collection_name="rb")
+        vecs = make_vectors(6)
+        db.add_vectors(vecs, [{"brand": "nike"} for _ in range(6)], ids=list("abcdef"))
+        db.delete_many(["b", "e"])
+        db.rebuild_index()
+        stats = db.get_stats()
+        assert stats["total_vectors"] == stats["stored_vectors"] == stats["metadata_count"] == 4
+        assert stats["deleted_count"] == 0
+        assert db.search(vecs[3], k=1)[0]["vector_id"] == "d"
+        assert len(list(tmp_path.glob("rb_vectors.g*.f32"))) == 1
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="rb")
+        assert reopened.metadata.find("f") == 3
+        assert np.allclose(reopened._vectors.matrix()[3], vecs[5])
+
+    def test_rebuild_then_add_survives_reopen(self, faiss_config):
+        """Checks that additions after a rebuild are replayed onto the new generation."""
+        db = FAISSVectorDB(dimension=8, collection_name="rb2")
+        db.add_vectors(make_vectors(3), [{}, {}, {}], ids=list("abc"))
+        db.delete_vector("a")
+        db.rebuild_index()
+        db.add_vectors(make_vectors(1, seed=3), [{}], ids=["z"])
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="rb2")
+        assert [reopened.metadata.vector_id_at(i) for i in range(3)] == ["b", "c", "z"]
+        assert reopened.index.ntotal == 3
+
+    def test_generated_ids_stay_unique_after_rebuild(self, faiss_config):
+        """Ensures generated IDs continue from a persisted counter instead of
+        the row count, which shrinks when a rebuild compacts deleted rows."""
+        db = FAISSVectorDB(dimension=8, collection_name="ids")
+        db.add_vectors(make_vectors(5), [{} for _ in range(5)])
+        db.delete_vector("item_1")
+        db.rebuild_index()
+        db.add_vectors(make_vectors(1, seed=1), [{}])
+        db.close()
+        reopened = FAISSVectorDB(dimension=8, collection_name="ids")
+        reopened.add_vectors(make_vectors(1, seed=2), [{}])
+        ids = [reopened.metadata.vector_id_at(i) for i in range(len(reopened.metadata))]
+        assert ids == ["item_0", "item_2", "item_3", "item_4", "item_5", "item_6"]
+
+    def test_rebuild_requires_raw_vectors(self, faiss_config):
+        """Ensures rebuild refuses to run when raw vectors are missing."""
+        db = FAISSVectorDB(dimension=8, collection_name="rb3")
+        db.add_vectors(make_vectors(2), [{}, {}])
+        db._vectors.truncate(1)
+        with pytest.raises(RuntimeError):
+            db.rebuild_index()
+
+
+class TestAdaptiveIndex:
+    def test_small_collection_uses_flat(self, faiss_config):
+        """Verifies that a new collection starts on an exact flat index."""
+        db = FAISSVectorDB(dimension=8, collection_name="small")
+        db.add_vectors(make_vectors(5), [{} for _ in range(5)])
+        assert db.metadata.info["index_spec"] == "IDMap2,Flat"
+
+    def test_migrates_to_ivf_when_collection_grows(self, faiss_config):
+        """Checks that crossing the flat threshold rebuilds the index as IVF
+        from the stored vectors, keeping deletes and row labels intact."""
+        faiss_config.update({"flat_threshold": 100})
+        db = FAISSVectorDB(dimension=8, collection_name="grow")
+        vecs = make_vectors(300)
+        db.add_vectors(vecs[:60], [{} for _ in range(60)], ids=[f"v{i}" for i in range(60)])
+        db.delete_vector("v7")
+        db.add_vectors(vecs[60:], [{} for _ in range(240)], ids=[f"v{i}" for i in range(60, 300)])
+        db._wait_for_migration()
+        assert db.metadata.info["index_spec"].startswith("IVF")
+        assert db.index.ntotal == 299
+        assert db.search(vecs[150], k=1)[0]["vector_id"] == "v150"
+        db.checkpoint()
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="grow")
+        assert reopened.metadata.info["index_spec"] == db.metadata.info["index_spec"]
+        assert faiss.try_extract_index_ivf(reopened.index) is not None
+
+
+    def test_migration_runs_off_the_add_path(self, faiss_config, monkeypatch):
+        """Ensures adds and searches proceed while the larger index is being
+        built in the background, and that rows added meanwhile stay
+        searchable once it is swapped in."""
+        faiss_config.update({"flat_threshold": 100})
+        db = FAISSVectorDB(dimension=8, collection_name="bg_grow")
+        vecs = make_vectors(300)
+        release = threading.Event()
+        build = faiss_db.build_index
+
+        def slow_build(*args):
+            release.wait(5)
+            return build(*args)
+
+        monkeypatch.setattr(faiss_db, "build_index", slow_build)
+        db.add_vectors(vecs[:200], [{} for _ in range(200)])
+        db.add_vectors(vecs[200:], [{} for _ in range(100)])
+        assert db.metadata.info["index_spec"] == "IDMap2,Flat"
+        assert db.search(vecs[250], k=1)[0]["index_id"] == 250
+        release.set()
+        db._wait_for_migration()
+        assert db.metadata.info["index_spec"].startswith("IVF")
+        assert db.search(vecs[250], k=1)[0]["index_id"] == 250
+        assert db.get_stats()["total_vectors"] == 300
+
+
+class TestIndexPolicy:
+    def test_select_index_spec_by_size(self):
+        """Checks the Flat / IVF / large-index tiers of the selection policy."""
+        config = {"flat_threshold": 1000, "large_threshold": 100_000}
+        assert select_index_spec(10, config) == "IDMap2,Flat"
+        assert select_index_spec(10_000, config) == "IVF256,Flat"
+        assert select_index_spec(200_000, config).startswith("IDMap2,HNSW")
+        assert select_index_spec(200_000, {**config, "large_index": "ivf_pq"}) == "IVF1788,PQ64x8"
+        assert select_index_spec(5000, {"index_type": "IVF{nlist},SQ8"}) == "IVF128,SQ8"
+
+    def test_ivf_regrow_hysteresis(self):
+        """Ensures IVF is only retrained after the collection grows fourfold."""
+        config = {"flat_threshold": 10, "large_threshold": 10**9}
+        assert not needs_migration("IVF40,Flat", 2000, 4000, config)
+        assert needs_migration("IVF40,Flat", 2000, 8000, config)
+        assert needs_migration("IDMap2,Flat", 5, 20, config)
+
+
+class TestCompressedIndex:
+    @pytest.mark.parametrize("compression", ["sq8", "pq"])
+    def test_compressed_index_reranks_exactly(self, faiss_config, compression):
+        """Verifies that a compressed index returns exact distances after
+        re-ranking, so a stored vector finds itself with a perfect score."""
+        faiss_config.update({
+            "flat_threshold": 50, "compression": compression, "pq_m": 4, "pq_nbits": 4,
+            "metric": "l2",
+        })
+        db = FAISSVectorDB(dimension=8, collection_name=f"cmp_{compression}")
+        vecs = make_vectors(600)
+        db.add_vectors(vecs, [{} for _ in range(600)])
+        db._wait_for_migration()
+        assert db._is_compressed()
+        for i in (3, 250, 599):
+            top = db.search(vecs[i], k=5)
+            assert top[0]["index_id"] == i
+            assert top[0]["similarity_score"] == pytest.approx(1.0)
+            assert [r["rank"] for r in top] == [1, 2, 3, 4, 5]
+
+    def test_unknown_compression_rejected(self):
+        """Ensures an unsupported compression mode fails loudly."""
+        with pytest.raises(ValueError):
+            select_index_spec(50_000, {"compression": "zstd"})
+
+
+class TestCosineMetric:
+    def test_scores_are_cosine_similarity(self, faiss_config):
+        """Verifies that cosine indexes normalize inputs and report the inner
+        product of unit vectors, independent of vector length."""
+        faiss_config["metric"] = "cosine"
+        db = FAISSVectorDB(dimension=8, collection_name="cos")
+        vecs = make_vectors(20) - 0.5
+        db.add_vectors(vecs * 7.0, [{} for _ in range(20)])
+        top = db.search(vecs[4] * 0.1, k=3)
+        unit = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        assert top[0]["index_id"] == 4
+        assert top[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+        assert top[1]["similarity_score"] == pytest.approx(
+            float(unit[top[1]["index_id"]] @ unit[4]), abs=1e-5
+        )
+        assert db.get_stats()["metric"] == "cosine"
+
+    @pytest.mark.parametrize("metric", ["cosine", "l2"])
+    def test_search_range_matches_thresholded_topk(self, faiss_config, metric):
+        """Checks that range search returns exactly the admissible hits above
+        the threshold, best first, as a full top-k scan would."""
+        faiss_config["metric"] = metric
+        db = FAISSVectorDB(dimension=8, collection_name=f"range_{metric}")
+        vecs = make_vectors(200) - 0.5
+        db.add_vectors(vecs, [{"brand": "nike" if i % 2 else "puma"} for i in range(200)])
+        db.delete_vector("item_1")
+        threshold = 0.6
+        for filters in (None, {"brand": "nike"}):
+            expected = [
+                r["index_id"] for r in db.search(vecs[1], k=200, filters=filters)
+                if r["similarity_score"] >= threshold
+            ]
+            found = db.search_range(vecs[1], threshold, limit=200, filters=filters)
+            assert expected and [r["index_id"] for r in found] == expected
+            assert [r["rank"] for r in found] == list(range(1, len(found) + 1))
+        assert len(db.search_range(vecs[1], threshold, limit=2)) == 2
+
+    def test_metric_change_rebuilds_index(self, faiss_config):
+        """Ensures reopening under a different metric rebuilds from raw vectors."""
+        faiss_config["metric"] = "l2"
+        db = FAISSVectorDB(dimension=8, collection_name="remetric")
+        db.add_vectors(make_vectors(10), [{} for _ in range(10)])
+        db.checkpoint()
+        faiss_config["metric"] = "cosine"
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="remetric")
+        assert reopened._is_cosine() and reopened.index.ntotal == 10
+        assert reopened.search(make_vectors(10)[2], k=1)[0]["index_id"] == 2
+
+
+class TestBatchSearch:
+    def test_search_batch_matches_single_searches(self, faiss_config):
+        """Verifies that one batched call returns the same pages as per-row
+        searches, with filters applied to every row."""
+        db = FAISSVectorDB(dimension=8, collection_name="batch")
+        vecs = make_vectors(100)
+        db.add_vectors(vecs, [{"brand": "nike" if i % 3 else "puma"} for i in range(100)])
+        queries = vecs[[5, 17, 42]]
+        for filters in (None, {"brand": "puma"}):
+            batches = db.search_batch(queries, k=4, filters=filters)
+            assert batches == [db.search(q, k=4, filters=filters) for q in queries]
+        assert db.search_batch(queries, k=4, filters={"brand": "none"}) == [[], [], []]
+
+    def test_delta_is_gathered_once_per_batch(self, faiss_config):
+        """Checks that unfolded delta rows are read once for the whole batch
+        and still ranked exactly against the base index."""
+        faiss_config["delta_max_rows"] = 1000
+        db = FAISSVectorDB(dimension=8, collection_name="batch_delta")
+        vecs = make_vectors(60)
+        db.add_vectors(vecs, [{} for _ in range(60)])
+        assert db.get_stats()["delta_rows"] == 60
+        queries = vecs[[3, 30, 59]]
+        expected = [db.search(q, k=3) for q in queries]
+        with patch.object(db._snapshot.vectors, "get", wraps=db._snapshot.vectors.get) as get:
+            assert db.search_batch(queries, k=3) == expected
+        assert get.call_count == 1
+        assert [page[0]["index_id"] for page in expected] == [3, 30, 59]
+
+
+class TestReadOnlyServing:
+    def test_reader_serves_memory_mapped_checkpoint(self, faiss_config, tmp_path):
+        """Verifies that a read-only instance answers like the writer from the
+        last checkpoint, writes nothing, and rejects mutations."""
+        faiss_config["prefault"] = True
+        writer = FAISSVectorDB(dimension=8, collection_name="served")
+        vecs = make_vectors(40)
+        writer.add_vectors(vecs, [{"brand": "nike" if i % 2 else "puma"} for i in range(40)])
+        writer.delete_vector("item_3")
+        writer.checkpoint()
+        before = sorted(p.name for p in tmp_path.rglob("*"))
+        reader = FAISSVectorDB(dimension=8, collection_name="served", read_only=True)
+        assert reader.get_stats()["read_only"] is True
+        for filters in (None, {"brand": "puma"}):
+            assert reader.search(vecs[3], k=5, filters=filters) == writer.search(
+                vecs[3], k=5, filters=filters
+            )
+        with pytest.raises(RuntimeError):
+            reader.add_vectors(vecs[:1], [{}])
+        with pytest.raises(RuntimeError):
+            reader.delete_vector("item_0")
+        assert sorted(p.name for p in tmp_path.rglob("*")) == before
+
+    def test_reader_without_checkpoint_is_empty(self, faiss_config, tmp_path):
+        """Checks that opening a missing collection read-only creates no files."""
+        reader = FAISSVectorDB(dimension=8, collection_name="absent", read_only=True)
+        assert reader.search(make_vectors(1)[0], k=3) == []
+        assert list(tmp_path.iterdir()) == []
+
+    def test_reader_never_mixes_checkpoints(self, faiss_config, monkeypatch):
+        """Ensures a checkpoint swapped in between a reader's metadata and
+        index reads makes it reopen both, so they come from one checkpoint."""
+        faiss_config["delta_max_rows"] = 4
+        writer = FAISSVectorDB(dimension=8, collection_name="racy")
+        writer.add_vectors(make_vectors(6), [{} for _ in range(6)])
+        writer.checkpoint()
+        writer.add_vectors(make_vectors(6, seed=1), [{} for _ in range(6)])
+        read_index = FAISSVectorDB._read_index
+
+        def swap_first(db):
+            monkeypatch.setattr(FAISSVectorDB, "_read_index", read_index)
+            writer.checkpoint()
+            return read_index(db)
+
+        monkeypatch.setattr(FAISSVectorDB, "_read_index", swap_first)
+        reader = FAISSVectorDB(dimension=8, collection_name="racy", read_only=True)
+        assert len(reader.metadata) == 12
+        assert reader.index.ntotal == reader._snapshot.base_rows == 12
+
+    def test_reader_leaves_interrupted_swap_alone(self, faiss_config, tmp_path):
+        """Checks that a reader opens a store left at .old by an interrupted
+        swap in place, leaving its recovery to the writer."""
+        writer = FAISSVectorDB(dimension=8, collection_name="torn")
+        writer.add_vectors(make_vectors(3), [{} for _ in range(3)])
+        writer.close()
+        meta = tmp_path / "torn_metadata"
+        meta.rename(tmp_path / "torn_metadata.old")
+        reader = FAISSVectorDB(dimension=8, collection_name="torn", read_only=True)
+        assert reader.get_stats()["total_vectors"] == 3
+        assert not meta.exists()
+        assert FAISSVectorDB(dimension=8, collection_name="torn").get_stats()["total_vectors"] == 3
+        assert meta.exists()
+
+    def test_single_writer_per_collection(self, faiss_config):
+        """Ensures a second writable open fails while readers and other
+        collections are unaffected, and the lock is released on close."""
+        writer = FAISSVectorDB(dimension=8, collection_name="owned")
+        writer.add_vectors(make_vectors(2), [{}, {}])
+        with pytest.raises(WriterLockedError, match="already open for writing.*FAISS_READ_ONLY"):
+            FAISSVectorDB(dimension=8, collection_name="owned")
+        FAISSVectorDB(dimension=8, collection_name="owned", read_only=True)
+        FAISSVectorDB(dimension=8, collection_name="other").close()
+        writer.close()
+        assert FAISSVectorDB(dimension=8, collection_name="owned").get_stats()["total_vectors"] == 2
+
+
+class TestVectorLookup:
+    def test_get_vector_by_id(self, faiss_config):
+        """Verifies that stored vectors are returned by ID across a reopen and
+        that unknown or deleted IDs return None."""
+        db = FAISSVectorDB(dimension=8, collection_name="lookup")
+        vecs = make_vectors(10)
+        db.add_vectors(vecs, [{} for _ in range(10)])
+        db.delete_vector("item_4")
+        np.testing.assert_array_equal(db.get_vector_by_id("item_7"), vecs[7])
+        assert db.get_vector_by_id("item_4") is None
+        assert db.get_vector_by_id("missing") is None
+        db.checkpoint()
+        reopened = FAISSVectorDB(dimension=8, collection_name="lookup", read_only=True)
+        np.testing.assert_array_equal(reopened.get_vector_by_id("item_2"), vecs[2])
+
+
+class TestSnapshotIsolation:
+    def test_published_snapshot_is_never_mutated(self, faiss_config):
+        """Verifies that writes publish new snapshots while a pinned one keeps
+        its index, rows, and deletions, and that folding copies the index
+        only while a snapshot is pinned."""
+        faiss_config["delta_max_rows"] = 8
+        db = FAISSVectorDB(dimension=8, collection_name="snap")
+        vecs = make_vectors(20)
+        db.add_vectors(vecs[:5], [{} for _ in range(5)])
+        with db._reading() as before:
+            db.delete_vector("item_0")
+            db.add_vectors(vecs[5:12], [{} for _ in range(7)])
+            assert before.rows == 5 and not before.deleted.any()
+            assert before.index.ntotal == 0 and db.index is not before.index
+        unpinned = db.index
+        db.add_vectors(vecs[12:], [{} for _ in range(8)])
+        assert db.index is unpinned
+        assert db.get_stats()["delta_rows"] == 0 and db.index.ntotal == 19
+        assert db.search(vecs[0], k=1)[0]["vector_id"] != "item_0"
+
+    def test_delta_rows_are_searched_exactly(self, faiss_config):
+        """Checks that rows not yet folded are found with filters applied and
+        merged with base-index hits in score order."""
+        faiss_config["delta_max_rows"] = 100
+        db = FAISSVectorDB(dimension=8, collection_name="delta")
+        vecs = make_vectors(30)
+        db.add_vectors(vecs[:20], [{"brand": "nike"} for _ in range(20)])
+        db._fold()
+        db.add_vectors(vecs[20:], [{"brand": "puma"} for _ in range(10)])
+        assert db.get_stats()["delta_rows"] == 10
+        assert db.search(vecs[25], k=1)[0]["vector_id"] == "item_25"
+        assert {r["brand"] for r in db.search(vecs[25], k=5, filters={"brand": "nike"})} == {"nike"}
+        scores = [r["similarity_score"] for r in db.search(vecs[25], k=30)]
+        assert len(scores) == 30 and scores == sorted(scores, reverse=True)
+
+    def test_concurrent_searches_during_ingestion(self, faiss_config):
+        """Ensures searches running alongside writers and folds never fail or
+        return rows outside the snapshot they started from."""
+        faiss_config["delta_max_rows"] = 16
+        db = FAISSVectorDB(dimension=8, collection_name="race")
+        vecs = make_vectors(400)
+        db.add_vectors(vecs[:10], [{} for _ in range(10)])
+        errors, done = [], threading.Event()
+
+        def reader():
+            while not done.is_set():
+                try:
+                    for page in db.search_batch(vecs[:3], k=5):
+                        assert 0 < len(page) <= 5
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for i in range(10, 400, 10):
+            db.add_vectors(vecs[i : i + 10], [{} for _ in range(10)])
+            db.delete_vector(f"item_{i}")
+        done.set()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert db.get_stats()["total_vectors"] == 400 - 39
+
+    def test_filtered_searches_during_ingestion(self, faiss_config):
+        """Ensures filtered searches see only the metadata of their snapshot
+        while writers append rows and edit existing ones."""
+        faiss_config["delta_max_rows"] = 64
+        db = FAISSVectorDB(dimension=8, collection_name="filtered_race")
+        vecs = make_vectors(600)
+        db.add_vectors(vecs[:30], [{"brand": "nike", "color": "red"} for _ in range(30)])
+        before = db._snapshot
+        errors, done = [], threading.Event()
+
+        def reader():
+            while not done.is_set():
+                try:
+                    for page in db.search_batch(vecs[:3], k=5, filters={"color": "red"}):
+                        assert page and all(r["color"] == "red" for r in page)
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for i in range(30, 600, 30):
+            db.add_vectors(vecs[i : i + 30], [{"brand": "puma", "color": "red"} for _ in range(30)])
+            db.update_metadata(f"item_{i}", {"brand": "vans"})
+        db.update_metadata("item_0", {"brand": "vans"})
+        done.set()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert before.metadata.row(0)["brand"] == "nike" and len(before.metadata) == 30
+        assert before.metadata.mask({"color": "red"}).shape == (30,)
+        assert db.search(vecs[0], k=1, filters={"brand": "vans"})[0]["vector_id"] == "item_0"
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> bool:
+    """Polls predicate until it holds or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestDurability:
+    def test_parse_durability(self):
+        """Checks the accepted policy spellings and rejects malformed ones."""
+        assert parse_durability("sync") == ("sync", 0)
+        assert parse_durability("interval=2.5") == ("interval", 2.5)
+        assert parse_durability("every=100") == ("every", 100)
+        for bad in ("always", "every", "interval=0", "sync=1"):
+            with pytest.raises(ValueError):
+                parse_durability(bad)
+
+    def test_sync_snapshot_written_before_return(self, faiss_config, tmp_path):
+        """Verifies that the sync policy persists each mutation in the caller."""
+        faiss_config.update({"durability": "sync", "persistence": "snapshot"})
+        db = FAISSVectorDB(dimension=8, collection_name="durable")
+        db.add_vectors(make_vectors(2), [{}, {}])
+        assert db.get_stats()["checkpoint_lag_ops"] == 0
+        _abandon(db)
+        assert FAISSVectorDB(dimension=8, collection_name="durable").get_stats()["total_vectors"] == 2
+
+    @pytest.mark.parametrize("policy", ["every=3", "interval=0.05"])
+    def test_background_checkpoint_clears_lag(self, faiss_config, policy):
+        """Checks that background policies report lag and then checkpoint
+        without the writer doing any snapshot I/O."""
+        faiss_config.update({"durability": policy, "persistence": "snapshot"})
+        db = FAISSVectorDB(dimension=8, collection_name="lazy")
+        vecs = make_vectors(3)
+        for i in range(3):
+            db.add_vectors(vecs[i : i + 1], [{}])
+        assert _wait_until(lambda: db.get_stats()["checkpoint_lag_ops"] == 0)
+        db._wait_for_merge()
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="lazy")
+        assert reopened.get_stats()["total_vectors"] == 3
+
+    def test_close_writes_final_checkpoint(self, faiss_config):
+        """Ensures closing flushes mutations the checkpointer has not written."""
+        faiss_config.update({"durability": "interval=3600", "persistence": "snapshot"})
+        db = FAISSVectorDB(dimension=8, collection_name="closing")
+        db.add_vectors(make_vectors(4), [{} for _ in range(4)])
+        stats = db.get_stats()
+        assert stats["checkpoint_lag_ops"] == 1 and stats["checkpoint_lag_seconds"] >= 0
+        db.close()
+        _abandon(db)
+        assert FAISSVectorDB(dimension=8, collection_name="closing").get_stats()["total_vectors"] == 4
+
+
+class TestSearchQuality:
+    def test_quality_is_per_call(self, faiss_config):
+        """Checks that quality levels map to increasing nprobe values passed
+        per call, leaving the shared index untouched."""
+        faiss_config.update({"index_type": "IVF32,Flat", "delta_max_rows": 1})
+        db = FAISSVectorDB(dimension=8, collection_name="quality")
+        vecs = make_vectors(2000)
+        db.add_vectors(vecs, [{} for _ in range(2000)])
+        knobs = db.get_stats()["search_knobs"]
+        assert knobs["fast"] < knobs["balanced"] < knobs["precise"]
+        before = faiss.extract_index_ivf(db.index).nprobe
+        precise = db.search(vecs[0], k=5, quality="precise")
+        assert precise[0]["vector_id"] == "item_0"
+        assert len(db.search(vecs[0], k=5, quality="fast")) == 5
+        assert faiss.extract_index_ivf(db.index).nprobe == before
+        with pytest.raises(ValueError):
+            db.search(vecs[0], k=5, quality="perfect")
+
+    @pytest.mark.parametrize("index_type", ["IVF32,Flat", "IDMap2,HNSW8"])
+    def test_tune_search_meets_recall_targets(self, faiss_config, index_type):
+        """Verifies that tuning stores the cheapest knob meeting each recall
+        target and that searches pick it up after a reopen."""
+        faiss_config.update({"index_type": index_type})
+        db = FAISSVectorDB(dimension=8, collection_name="tuned")
+        db.add_vectors(make_vectors(2000), [{} for _ in range(2000)])
+        knobs = db.tune_search(k=5, sample_size=100)
+        assert knobs["fast"] <= knobs["balanced"] <= knobs["precise"]
+        tuning = db.metadata.info["search_tuning"]
+        for level, target in faiss_config["quality"].items():
+            measured = tuning["recall"][str(knobs[level])]
+            assert measured >= target or knobs[level] == max(map(int, tuning["recall"]))
+        _abandon(db)
+        reopened = FAISSVectorDB(dimension=8, collection_name="tuned")
+        assert reopened.get_stats()["search_knobs"] == knobs
+
+    def test_tuning_ignores_self_matches(self, faiss_config, monkeypatch):
+        """Ensures a query finding only its own stored row scores no recall."""
+        faiss_config.update({"index_type": "IVF32,Flat"})
+        db = FAISSVectorDB(dimension=8, collection_name="selfmatch")
+        db.add_vectors(make_vectors(2000), [{} for _ in range(2000)])
+        monkeypatch.setattr(db, "_search_base", lambda snap, queries, admissible, k, knob: [
+            (np.zeros(1, dtype=np.float32), rows)
+            for rows in db._exact_knn(snap, queries, np.flatnonzero(admissible), 1)[1]
+        ])
+        db.tune_search(k=5, sample_size=50)
+        assert set(db.metadata.info["search_tuning"]["recall"].values()) == {0.0}
+
+    def test_flat_index_has_nothing_to_tune(self, faiss_config):
+        """Confirms that exact flat indexes skip tuning."""
+        db = FAISSVectorDB(dimension=8, collection_name="flat")
+        db.add_vectors(make_vectors(50), [{} for _ in range(50)])
+        assert db.tune_search() == {}
@@ -0,0 +1,67 @@
+"""Tests for core.image_embedder.ImageEmbedder batching logic.
+
+Heavy ML imports (clip, torch, torchvision) are mocked out; preprocessing
+and the forward pass are replaced with NumPy stand-ins so only the batch
+assembly and failure masking are exercised.
+"""
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy ML modules before any project import touches them
+for mod_name in [
+    "clip", "sentence_transformers", "torch", "torchvision",
+    "torchvision.transforms", "torchvision.models",
+]:
+    if mod_name not in sys.modules:
+        sys.modules[mod_name] = MagicMock()
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from core.image_embedder import ImageEmbedder
+
+
+@pytest.fixture
+def embedder():
+    """Builds an ImageEmbedder without loading a model: images "decode" to
+    their path index and the forward pass records each batch it sees."""
+    emb = ImageEmbedder.__new__(ImageEmbedder)
+    emb.model_type = "clip"
+    emb.dimension = 4
+    emb.batches = []
+
+    def load(path):
+        if path.startswith("bad"):
+            raise OSError("cannot identify image file")
+        return np.full(4, float(path.split("_")[1]), dtype=np.float32)
+
+    def forward(batch):
+        emb.batches.append(len(batch))
+        return batch + 1.0
+
+    emb._load_image = load
+    emb._forward = forward
+    return emb
+
+
+class TestEncodeImagesBatch:
+    def test_one_forward_pass_per_batch(self, embedder):
+        """Verifies that images are encoded in stacked batches and returned
+        as one contiguous float32 matrix in input order."""
+        paths = [f"img_{i}" for i in range(7)]
+        with patch.object(sys.modules["torch"], "stack", np.stack):
+            out = embedder.encode_images_batch(paths, batch_size=3)
+        assert embedder.batches == [3, 3, 1]
+        assert out.shape == (7, 4) and out.dtype == np.float32
+        assert out.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(out[:, 0], np.arange(7) + 1.0)
+
+    def test_failed_image_is_zero_row(self, embedder):
+        """Checks that an unreadable image yields a zero row without failing
+        the rest of its batch."""
+        paths = ["img_0", "bad_1", "img_2", "bad_3"]
+        with patch.object(sys.modules["torch"], "stack", np.stack):
+            out = embedder.encode_images_batch(paths, batch_size=4)
+        assert embedder.batches == [2]
+        np.testing.assert_array_equal(out[:, 0], [1.0, 0.0, 3.0, 0.0])
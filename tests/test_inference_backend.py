@@ -0,0 +1,168 @@
+"""Tests for core.inference_backend.
+
+Backend selection and the tolerance fallback run against NumPy stand-ins
+with torch mocked. The end-to-end export check runs in a fresh interpreter,
+so the mocks cannot leak into it, and is skipped where torch is missing.
+"""
+import subprocess
+import sys
+import textwrap
+from unittest.mock import MagicMock
+
+# Mock heavy ML modules before any project import touches them
+for mod_name in [
+    "clip", "sentence_transformers", "torch", "torchvision",
+    "torchvision.transforms", "torchvision.models",
+]:
+    if mod_name not in sys.modules:
+        sys.modules[mod_name] = MagicMock()
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from core import inference_backend
+from core.inference_backend import (
+    check_config, compile_module, min_cosine, served_variant, variant,
+)
+
+
+class FakeTensor:
+    """Just enough of a torch tensor for the tolerance check."""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def float(self):
+        return self
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class FakeModel:
+    """A linear "encoder" whose output can be perturbed."""
+
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode_image(self, batch):
+        return FakeTensor(batch.values * 2.0 + self.noise * np.array([1.0, -1.0, 1.0]))
+
+
+class TestBackendConfig:
+    def test_variant_names_backend_and_precision(self):
+        """Checks the registry-key variant for eager and compiled models."""
+        assert variant({}) == "fp32"
+        assert variant({"backend": "torch", "precision": "int8"}) == "int8"
+        assert variant({"backend": "onnx", "precision": "int8"}) == "onnx-int8"
+
+    def test_rejects_unknown_backend_and_gpu_int8(self):
+        """Ensures bad backends and CPU-only options on a GPU fail early."""
+        with pytest.raises(ValueError):
+            check_config({"backend": "tensorrt"}, "clip")
+        with pytest.raises(ValueError):
+            check_config({"precision": "int4"}, "clip")
+        with pytest.raises(ValueError):
+            check_config({"device": "cuda", "precision": "int8"}, "clip")
+        check_config({"device": "cuda", "backend": "torchscript"}, "clip")
+
+    def test_min_cosine_is_worst_row(self):
+        """Verifies that agreement is the lowest row-wise cosine similarity."""
+        reference = np.array([[1.0, 0.0], [0.0, 1.0]])
+        assert min_cosine(reference, reference * 3.0) == pytest.approx(1.0)
+        assert min_cosine(reference, [[1.0, 0.0], [1.0, 1.0]]) == pytest.approx(0.5 ** 0.5)
+
+
+class TestToleranceFallback:
+    def _compile(self, compiled):
+        """Compiles a FakeModel to torch/int8 with quantization returning compiled."""
+        model = FakeModel()
+        probe = FakeTensor([[0.2, 0.5, 0.9], [0.7, 0.1, 0.3]])
+        with patch.object(inference_backend, "_quantize", return_value=compiled):
+            result = compile_module(
+                model, {"encode_image": (probe,)},
+                {"backend": "torch", "precision": "int8"}, "clip-test",
+            )
+        return model, result
+
+    def test_faithful_model_is_used(self):
+        """Checks that a compiled model within tolerance replaces the eager one."""
+        compiled = FakeModel(noise=0.001)
+        _, result = self._compile(compiled)
+        assert result is compiled
+        assert served_variant({"precision": "int8"}, "clip-test") == "int8"
+
+    def test_drifting_model_falls_back_to_eager(self):
+        """Ensures a compiled model below min_cosine is discarded and that
+        the eager variant is reported as the one serving."""
+        model, result = self._compile(FakeModel(noise=1.0))
+        assert result is model
+        assert served_variant({"precision": "int8"}, "clip-test") == "fp32"
+
+    def test_torchscript_loads_onto_configured_device(self, tmp_path):
+        """Verifies a cached TorchScript export is loaded onto the model's
+        device rather than the CPU."""
+        (tmp_path / "clip-test.fp32.pt").write_bytes(b"")
+        torch = sys.modules["torch"]
+        inference_backend._torchscript(FakeModel(), {}, tmp_path / "clip-test", "fp32", "cuda")
+        assert torch.jit.load.call_args.kwargs["map_location"] == "cuda"
+
+    def test_eager_fp32_is_untouched(self):
+        """Confirms the default configuration never converts the model."""
+        model = FakeModel()
+        with patch.object(inference_backend, "_quantize") as quantize:
+            assert compile_module(model, {}, {"backend": "torch"}, "clip-test") is model
+        quantize.assert_not_called()
+
+
+_EXPORT_SCRIPT = textwrap.dedent("""
+    import sys
+    import torch
+    from config.settings import MODEL_CONFIG
+    from core.inference_backend import compile_module, min_cosine
+
+    backend, precision, cache_dir = sys.argv[1:]
+    MODEL_CONFIG["inference"]["cache_dir"] = cache_dir
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Linear(64, 256), torch.nn.GELU(), torch.nn.Linear(256, 32)
+    ).eval()
+    config = {"backend": backend, "precision": precision}
+    probe = torch.randn(4, 64)
+    for _ in range(2):  # the second pass loads the cached export
+        compiled = compile_module(model, {"forward": (probe,)}, config, "mlp")
+    assert compiled is not model, "compiled model was rejected"
+    queries = torch.randn(16, 64)
+    with torch.no_grad():
+        print(min_cosine(model(queries).numpy(), compiled(queries).float().numpy()))
+""")
+
+
+def _fresh_import(module: str) -> bool:
+    """Returns whether a module imports in a fresh, unmocked interpreter."""
+    return subprocess.run([sys.executable, "-c", f"import {module}"]).returncode == 0
+
+
+class TestNumericalTolerance:
+    @pytest.mark.parametrize("backend,precision", [
+        ("torch", "int8"), ("torchscript", "fp32"), ("torchscript", "int8"),
+        ("onnx", "fp32"), ("onnx", "int8"),
+    ])
+    def test_compiled_outputs_match_eager(self, backend, precision, tmp_path):
+        """Exports a small model with each backend and precision and checks
+        that its outputs stay within min_cosine of eager fp32."""
+        if not _fresh_import("torch"):
+            pytest.skip("torch is not installed")
+        if backend == "onnx" and not _fresh_import("onnx"):
+            pytest.skip("onnx is not installed")
+        result = subprocess.run(
+            [sys.executable, "-c", _EXPORT_SCRIPT, backend, precision, str(tmp_path)],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        score = float(result.stdout.strip().splitlines()[-1])
+        assert score >= inference_backend.MODEL_CONFIG["inference"]["min_cosine"]
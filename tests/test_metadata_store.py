@@ -0,0 +1,159 @@
+"""Tests for core.metadata_store.ColumnarMetadataStore."""
+import numpy as np
+import pytest
+
+from core import metadata_store
+from core.metadata_store import ColumnarMetadataStore
+from core.vector_db_base import BaseVectorDB
+
+
+@pytest.fixture
+def store():
+    """Provides a store with three rows covering typed and extra fields."""
+    return ColumnarMetadataStore.from_records([
+        {"vector_id": "a", "brand": "nike", "filename": "a.jpg", "color": "red"},
+        {"vector_id": "b", "brand": "adidas", "size": "large"},
+        {"vector_id": "c", "brand": "nike", "image_width": 640},
+    ])
+
+
+class TestColumnarMetadataStore:
+    def test_row_materializes_all_fields(self, store):
+        """Verifies that typed and JSON fields round-trip into one dictionary."""
+        assert store.row(0) == {
+            "vector_id": "a", "brand": "nike", "filename": "a.jpg",
+            "color": "red", "index_id": 0,
+        }
+        assert store.row(2)["image_width"] == 640
+
+    def test_update_and_delete(self, store):
+        """Checks that updates overwrite typed columns and deletes are flagged."""
+        store.update(1, {"brand": "puma", "filename": "renamed.jpg"})
+        store.update(2, {"deleted": True})
+        assert store.row(1)["brand"] == "puma"
+        assert store.row(1)["filename"] == "renamed.jpg"
+        assert store.row(2)["deleted"] is True
+        assert store.deleted_mask().tolist() == [False, False, True]
+        store.update(2, {"deleted": True})
+        assert store.deleted_count() == 1
+
+    def test_non_string_categorical_goes_to_extra(self, store):
+        """Ensures a non-string value for a typed column still round-trips."""
+        store.update(0, {"size": 42})
+        assert store.row(0)["size"] == 42
+        store.update(0, {"size": "small"})
+        assert store.row(0)["size"] == "small"
+
+    def test_find(self, store):
+        """Confirms that vector IDs resolve to their row numbers."""
+        assert store.find("b") == 1
+        assert store.find("missing") is None
+
+    def test_write_and_open_memory_mapped(self, store, tmp_path):
+        """Verifies that a persisted store reopens memory-mapped with identical rows
+        and that in-process edits never touch the files on disk."""
+        ColumnarMetadataStore.write(tmp_path / "meta", *store.export())
+        opened = ColumnarMetadataStore.open(tmp_path / "meta")
+        assert isinstance(opened._deleted._pages[0], np.memmap)
+        assert opened.rows(range(3)) == store.rows(range(3))
+        opened.update(0, {"filename": "changed.jpg"})
+        assert ColumnarMetadataStore.open(tmp_path / "meta").row(0)["filename"] == "a.jpg"
+
+    def test_edit_after_freeze_copies_one_page(self, tmp_path):
+        """Checks that editing a row a frozen copy can see copies only its
+        page, leaving the frozen rows and the other mapped pages untouched."""
+        n = 3 * metadata_store._PAGE_ROWS
+        records = [{"vector_id": f"v{i}", "brand": "nike"} for i in range(n)]
+        ColumnarMetadataStore.write(
+            tmp_path / "meta", *ColumnarMetadataStore.from_records(records).export()
+        )
+        opened = ColumnarMetadataStore.open(tmp_path / "meta")
+        frozen = opened.view()
+        opened.update(n - 1, {"deleted": True})
+        pages = opened._deleted._pages
+        assert [isinstance(p, np.memmap) for p in pages] == [True, True, False]
+        assert frozen.deleted_mask().sum() == 0
+        assert opened.deleted_mask()[n - 1]
+
+    def test_write_fsyncs_every_file_and_directory(self, store, tmp_path, monkeypatch):
+        """Checks that every column, extra file, and the manifest are fsynced,
+        along with the store directory and its parent after the swap."""
+        synced = set()
+        fsync = metadata_store.os.fsync
+
+        def record(fd):
+            synced.add(metadata_store.os.fstat(fd).st_ino)
+            fsync(fd)
+
+        monkeypatch.setattr(metadata_store.os, "fsync", record)
+        directory = tmp_path / "meta"
+        ColumnarMetadataStore.write(directory, *store.export(), files={"index.faiss": b"x"})
+        expected = {p.stat().st_ino for p in (directory, tmp_path, *directory.iterdir())}
+        assert expected <= synced
+
+    def test_take_compacts_rows(self, store):
+        """Checks that take keeps the selected rows renumbered from zero."""
+        store.update(0, {"filename": "rewritten.jpg"})
+        compact = store.take(np.array([False, True, True]))
+        assert len(compact) == 2
+        assert compact.row(0)["vector_id"] == "b"
+        assert compact.row(1)["index_id"] == 1
+        assert compact._strings["filename"].arrays()[2].size == 0
+
+    def test_open_missing_returns_none(self, tmp_path):
+        """Confirms that opening a non-existent store returns None."""
+        assert ColumnarMetadataStore.open(tmp_path / "nope") is None
+
+    def test_mask_matches_apply_filters(self, store):
+        """Checks that mask agrees with BaseVectorDB._apply_filters semantics."""
+        rows = store.rows(range(len(store)))
+        for filters in (
+            {"brand": "nike"}, {"brand": ["adidas", "nike"]},
+            {"size": "large"}, {"color": "red"}, {"image_width": 640},
+            {"brand": "nike", "color": "red"}, {"vector_id": "b"},
+        ):
+            expected = [r["vector_id"] for r in BaseVectorDB._apply_filters(rows, filters)]
+            mask = store.mask(filters)
+            assert [r["vector_id"] for r, m in zip(rows, mask) if m] == expected
+
+    def test_find_uses_persisted_id_index(self, store, tmp_path):
+        """Verifies that IDs resolve through the sorted hash column after reopen."""
+        ColumnarMetadataStore.write(tmp_path / "meta", *store.export())
+        opened = ColumnarMetadataStore.open(tmp_path / "meta")
+        assert opened._id_overlay == {}
+        assert [opened.find(v) for v in ("a", "b", "c", "zzz")] == [0, 1, 2, None]
+        assert opened.vector_id_at(2) == "c"
+
+    def test_find_prefers_live_row_after_readd(self, store, tmp_path):
+        """Checks that a re-added ID resolves to its new, live row."""
+        store.update(0, {"deleted": True})
+        store.append({"vector_id": "a"})
+        assert store.find("a") == 3
+        ColumnarMetadataStore.write(tmp_path / "meta", *store.export())
+        assert ColumnarMetadataStore.open(tmp_path / "meta").find("a") == 3
+
+    def test_take_rebuilds_id_index(self, store):
+        """Ensures compaction keeps the ID lookup in sync with new row numbers."""
+        compact = store.take(np.array([False, True, True]))
+        assert compact.find("c") == 1
+        assert compact.find("a") is None
+
+    def test_open_promotes_newly_coded_columns(self, tmp_path, monkeypatch):
+        """Checks that a store written before color and style were coded
+        reopens with them moved out of the JSON column, rows unchanged."""
+        monkeypatch.setattr(
+            metadata_store, "CATEGORICAL_COLUMNS", ("brand", "pattern", "shape", "size")
+        )
+        old = ColumnarMetadataStore.from_records([
+            {"vector_id": "a", "color": "red"},
+            {"vector_id": "b", "style": "casual", "image_width": 640},
+            {"vector_id": "c", "color": 7},
+        ])
+        ColumnarMetadataStore.write(tmp_path / "meta", *old.export())
+        rows = old.rows(range(3))
+        monkeypatch.undo()
+        opened = ColumnarMetadataStore.open(tmp_path / "meta")
+        assert opened.rows(range(3)) == rows
+        assert opened._strings["extra"].get(0) is None
+        assert opened.mask({"color": "red"}).tolist() == [True, False, False]
+        assert opened.mask({"style": "casual"}).tolist() == [False, True, False]
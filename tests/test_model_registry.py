@@ -0,0 +1,141 @@
+"""Tests for core.model_registry and the embedders' use of it.
+
+Heavy ML modules are mocked so no model is actually loaded.
+"""
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Mock heavy ML modules before any project import touches them
+for mod_name in [
+    "clip", "sentence_transformers", "torch", "torchvision",
+    "torchvision.transforms", "torchvision.models",
+]:
+    if mod_name not in sys.modules:
+        sys.modules[mod_name] = MagicMock()
+
+import pytest
+from unittest.mock import patch
+
+from core.model_registry import ModelRegistry, model_registry
+from core.multimodal_embedder import MultiModalEmbedder
+from core.text_embedder import TextEmbedder
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Starts and ends every test with an empty process-wide registry."""
+    model_registry.clear()
+    yield
+    model_registry.clear()
+
+
+class TestModelRegistry:
+    def test_concurrent_acquire_loads_once(self):
+        """Verifies that simultaneous requests for one model share one load."""
+        registry = ModelRegistry()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        key = ("clip:ViT-B/32", "cpu", "fp32")
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.acquire(key, loader)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert len({id(r) for r in results}) == 1
+        assert registry.refcount(key) == 8
+
+    def test_distinct_models_load_concurrently(self):
+        """Checks that loading one model does not block loading another."""
+        registry = ModelRegistry()
+        barrier = threading.Barrier(2, timeout=2)
+
+        def loader():
+            barrier.wait()
+            return object()
+
+        threads = [
+            threading.Thread(target=registry.acquire, args=((name, "cpu", "fp32"), loader))
+            for name in ("clip", "resnet")
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert registry.loaded() == {"clip@cpu/fp32": 1, "resnet@cpu/fp32": 1}
+
+    def test_release_unloads_last_reference(self):
+        """Ensures a model is dropped only when its last holder releases it."""
+        registry = ModelRegistry()
+        key = ("m", "cpu", "fp32")
+        first = registry.acquire(key, object)
+        registry.acquire(key, object)
+        registry.release(key)
+        assert registry.acquire(key, object) is first
+        registry.release(key)
+        registry.release(key)
+        assert registry.refcount(key) == 0
+        assert registry.acquire(key, object) is not first
+
+
+class TestSharedEmbedders:
+    def test_clip_and_minilm_load_once_per_process(self):
+        """Confirms that several multimodal embedders share a single CLIP and
+        sentence-transformer load."""
+        with patch.object(sys.modules["clip"], "load", return_value=(MagicMock(), MagicMock())) as load, \
+                patch.object(sys.modules["sentence_transformers"], "SentenceTransformer") as st:
+            first, second = MultiModalEmbedder(), MultiModalEmbedder()
+            assert load.call_count == 0 and st.call_count == 0
+            first.warmup()
+            second.warmup()
+        assert load.call_count == 1 and st.call_count == 1
+        assert first.image_embedder.model is second.clip_embedder.model
+        assert model_registry.loaded() == {
+            "clip:ViT-B/32@cpu/fp32": 2, "sentence_transformer:all-MiniLM-L6-v2@cpu/fp32": 2,
+        }
+        first.close()
+        second.close()
+        assert model_registry.loaded() == {}
+
+
+class TestLazyLoading:
+    def test_first_use_loads_model(self):
+        """Checks that an embedder loads nothing until it is first used."""
+        with patch.object(sys.modules["sentence_transformers"], "SentenceTransformer") as st:
+            st.return_value.encode.return_value = [[0.5, 0.5]]
+            embedder = TextEmbedder()
+            assert not embedder.is_loaded and model_registry.loaded() == {}
+            assert list(embedder.encode_text("red sneakers")) == [0.5, 0.5]
+        assert st.call_count == 1 and embedder.is_loaded
+        embedder.close()
+        assert model_registry.loaded() == {}
+
+    def test_unknown_warmup_model_rejected(self):
+        """Ensures warmup fails fast on a model name it does not know."""
+        with pytest.raises(ValueError):
+            MultiModalEmbedder().warmup(["bert"])
+
+    def test_api_import_does_not_load_torch(self):
+        """Confirms that importing the API app and its dependencies, in a
+        fresh interpreter without mocks, imports no ML framework."""
+        code = (
+            "import sys; import api.main, api.dependencies; "
+            "heavy = {'torch', 'torchvision', 'clip', 'sentence_transformers'}; "
+            "print(sorted(heavy & set(sys.modules)))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        )
+        assert out.stdout.strip().splitlines()[-1] == "[]"
@@ -94,6 +94,53 @@ class TestTextSearch:
         assert len(results) <= 2
 
 
+class TestBatchedSearch:
+    @patch("core.search_analytics.get_db_session")
+    def test_semantic_search_issues_one_batch(self, mock_db, engine, seeded_db):
+        """Checks that all query expansions are searched in a single batched call."""
+        mock_db.return_value.__enter__ = MagicMock()
+        mock_db.return_value.__exit__ = MagicMock(return_value=False)
+        engine.similarity_threshold = 0.0
+        with patch.object(seeded_db, "search_batch", wraps=seeded_db.search_batch) as batch:
+            results = engine.semantic_search("nike shoe", limit=3)
+        assert batch.call_count == 1
+        assert len(batch.call_args[0][0]) == len(engine._expand_query("nike shoe"))
+        assert 0 < len(results) <= 3
+
+    @patch("core.search_analytics.get_db_session")
+    def test_quality_reaches_vector_db(self, mock_db, engine, seeded_db):
+        """Ensures the per-request quality level is forwarded to the backend."""
+        mock_db.return_value.__enter__ = MagicMock()
+        mock_db.return_value.__exit__ = MagicMock(return_value=False)
+        with patch.object(seeded_db, "search", wraps=seeded_db.search) as search:
+            engine.text_to_image_search("shoes", limit=2, quality="fast")
+        assert search.call_args.kwargs["quality"] == "fast"
+
+
+class TestVectorIdSearch:
+    @patch("core.search_analytics.get_db_session")
+    def test_uses_stored_vector_without_inference(self, mock_db, engine, mock_embedding_manager):
+        """Checks that recommendations by vector ID skip embedding and exclude the source."""
+        mock_db.return_value.__enter__ = MagicMock()
+        mock_db.return_value.__exit__ = MagicMock(return_value=False)
+        engine.similarity_threshold = 0.0
+        results = engine.get_recommendations(vector_id="fake_2", limit=3)
+        assert len(results) == 3
+        assert all(r["vector_id"] != "fake_2" for r in results)
+        mock_embedding_manager.get_image_embedding.assert_not_called()
+
+    def test_similarity_by_vector_id_excludes_reference(self, engine, seeded_db):
+        """Ensures threshold search from a stored vector leaves out the
+        reference item and still fills the requested limit."""
+        results = engine.search_by_similarity(vector_id="fake_2", similarity_threshold=0.0, limit=4)
+        assert len(results) == 4
+        assert all(r["vector_id"] != "fake_2" for r in results)
+
+    def test_unknown_vector_id_returns_empty(self, engine):
+        """Confirms that an unknown vector ID yields no results."""
+        assert engine.search_by_vector_id("missing") == []
+
+
 class TestQueryExpansion:
     def test_includes_original(self, engine):
         """Confirms that query expansion always includes the original query string."""
@@ -0,0 +1,94 @@
+"""Tests for core.sharded_db.ShardedVectorDB."""
+import numpy as np
+import pytest
+
+from core.faiss_db import FAISSVectorDB
+from core.sharded_db import ShardedVectorDB
+from tests.conftest import make_vectors
+
+
+def _metadata(n: int):
+    """Returns metadata cycling through three brands."""
+    return [{"brand": ("nike", "puma", "adidas")[i % 3]} for i in range(n)]
+
+
+class TestShardedVectorDB:
+    @pytest.mark.parametrize("shard_by", ["hash", "brand"])
+    def test_matches_single_collection(self, faiss_config, shard_by):
+        """Verifies that scatter-gather search returns the same top-k as one
+        unsharded collection holding the same vectors."""
+        vecs = make_vectors(120)
+        single = FAISSVectorDB(dimension=8, collection_name="single")
+        single.add_vectors(vecs, _metadata(120))
+        sharded = ShardedVectorDB(8, "multi", num_shards=3, shard_by=shard_by)
+        sharded.add_vectors(vecs, _metadata(120))
+        assert sharded.get_stats()["total_vectors"] == 120
+        for filters in (None, {"brand": "puma"}, {"brand": ["nike", "adidas"]}):
+            for q in (vecs[0], vecs[77]):
+                expected = [r["vector_id"] for r in single.search(q, k=6, filters=filters)]
+                found = sharded.search(q, k=6, filters=filters)
+                assert [r["vector_id"] for r in found] == expected
+                assert [r["rank"] for r in found] == list(range(1, 7))
+        batches = sharded.search_batch(vecs[[3, 4]], k=5)
+        assert batches == [sharded.search(vecs[3], k=5), sharded.search(vecs[4], k=5)]
+
+    def test_brand_sharding_colocates_brands(self, faiss_config):
+        """Checks that brand routing keeps each brand on a single shard."""
+        sharded = ShardedVectorDB(8, "brands", num_shards=4, shard_by="brand")
+        sharded.add_vectors(make_vectors(30), _metadata(30))
+        for brand in ("nike", "puma", "adidas"):
+            holders = [
+                i for i, s in enumerate(sharded.shards) if s.metadata.mask({"brand": brand}).any()
+            ]
+            assert holders == sharded._targets({"brand": brand})
+
+    def test_mutations_route_to_owning_shard(self, faiss_config):
+        """Ensures lookups, updates, and deletes reach the shard holding the ID."""
+        vecs = make_vectors(20)
+        sharded = ShardedVectorDB(8, "mutate", num_shards=3)
+        sharded.add_vectors(vecs, _metadata(20))
+        np.testing.assert_array_equal(sharded.get_vector_by_id("item_5"), vecs[5])
+        sharded.update_metadata("item_5", {"brand": "reebok"})
+        assert sharded.search(vecs[5], k=1, filters={"brand": "reebok"})[0]["vector_id"] == "item_5"
+        sharded.delete_many(["item_5", "item_6"])
+        assert sharded.get_vector_by_id("item_5") is None
+        assert sharded.get_stats()["total_vectors"] == 18
+        sharded.add_vectors(vecs[:2], _metadata(2))
+        assert sharded.get_vector_by_id("item_20") is not None
+
+    def test_mutations_route_to_owning_brand_shard(self, faiss_config):
+        """Ensures that under brand routing an item whose brand changes moves
+        to the new brand's shard, keeping brand-filtered searches complete."""
+        vecs = make_vectors(20)
+        sharded = ShardedVectorDB(8, "mutate", num_shards=3, shard_by="brand")
+        sharded.add_vectors(vecs, _metadata(20))
+        sharded.update_metadata_many({
+            "item_5": {"brand": "reebok", "color": "red"}, "item_6": {"color": "blue"},
+        })
+        found = sharded.search(vecs[5], k=1, filters={"brand": "reebok"})
+        assert [(r["vector_id"], r["color"]) for r in found] == [("item_5", "red")]
+        assert sharded.search(vecs[5], k=1, filters={"brand": "adidas"})[0]["vector_id"] != "item_5"
+        assert sharded.search(vecs[6], k=1, filters={"color": "blue"})[0]["vector_id"] == "item_6"
+        holders = [i for i, s in enumerate(sharded.shards) if s.get_vector_by_id("item_5") is not None]
+        assert holders == sharded._targets({"brand": "reebok"})
+        np.testing.assert_array_equal(sharded.get_vector_by_id("item_5"), vecs[5])
+        sharded.delete_many(["item_5", "item_6"])
+        assert sharded.get_vector_by_id("item_5") is None
+        assert sharded.get_stats()["total_vectors"] == 18
+
+    def test_unknown_shard_key_rejected(self, faiss_config):
+        """Confirms that an unsupported shard key fails loudly."""
+        with pytest.raises(ValueError):
+            ShardedVectorDB(8, "bad", num_shards=2, shard_by="color")
+
+    def test_layout_change_rejected(self, faiss_config):
+        """Ensures a collection reopened with another shard count or key
+        fails instead of routing items to shards that do not hold them."""
+        sharded = ShardedVectorDB(8, "layout", num_shards=3)
+        sharded.add_vectors(make_vectors(9), _metadata(9))
+        sharded.close()
+        for layout in ({"num_shards": 4}, {"num_shards": 3, "shard_by": "brand"}):
+            with pytest.raises(ValueError, match="re-index"):
+                ShardedVectorDB(8, "layout", **layout)
+        reopened = ShardedVectorDB(8, "layout", num_shards=3)
+        assert reopened.get_vector_by_id("item_4") is not None
@@ -5,14 +5,14 @@ import logging
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 
-from core.search_engine import create_search_engine
+from api.dependencies import get_search_engine
 from core.query_processor import QueryProcessor
 
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint("api", __name__)
 
-search_engine = create_search_engine()
+search_engine = get_search_engine()
 query_processor = QueryProcessor()
 
 
@@ -27,13 +27,16 @@ def api_search():
         stype = data.get("type", "text")
         filters = data.get("filters", {})
         limit = data.get("limit", 20)
+        quality = data.get("quality")
         if not query:
             return jsonify({"error": "Query is required"}), 400
         fn = {
-            "text": lambda: search_engine.text_to_image_search(query, filters, limit),
-            "image": lambda: search_engine.image_to_image_search(query, filters, limit),
-            "hybrid": lambda: search_engine.hybrid_search(query=query, filters=filters, limit=limit),
-            "semantic": lambda: search_engine.semantic_search(query, filters, limit),
+            "text": lambda: search_engine.text_to_image_search(query, filters, limit, quality),
+            "image": lambda: search_engine.image_to_image_search(query, filters, limit, quality),
+            "hybrid": lambda: search_engine.hybrid_search(
+                query=query, filters=filters, limit=limit, quality=quality
+            ),
+            "semantic": lambda: search_engine.semantic_search(query, filters, limit, quality),
         }.get(stype)
         if fn is None:
             return jsonify({"error": "Invalid search type"}), 400
@@ -89,15 +92,21 @@ def api_similar():
 @api_bp.route("/api/recommendations", methods=["POST"])
 def api_recommendations():
     """Generates product recommendations based on the given
-    reference image and returns them as JSON.
+    reference image or indexed vector ID and returns them as JSON.
     """
     try:
         data = request.get_json()
         image_path = data.get("image_path", "")
-        if not image_path:
-            return jsonify({"error": "Image path is required"}), 400
-        results = search_engine.get_recommendations(image_path, limit=data.get("limit", 10))
-        return jsonify({"results": results, "total_count": len(results), "reference_image": image_path})
+        vector_id = data.get("vector_id")
+        if not image_path and not vector_id:
+            return jsonify({"error": "Image path or vector_id is required"}), 400
+        results = search_engine.get_recommendations(
+            image_path, limit=data.get("limit", 10), vector_id=vector_id
+        )
+        return jsonify({
+            "results": results, "total_count": len(results),
+            "reference_image": image_path or vector_id,
+        })
     except Exception as e:
         logger.error(f"Recommendations failed: {e}")
         return jsonify({"error": str(e)}), 500
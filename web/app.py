@@ -5,7 +5,7 @@ from flask import Flask, render_template, request, redirect, url_for, send_file,
 from werkzeug.utils import secure_filename
 from pathlib import Path
 
-from core.search_engine import create_search_engine
+from api.dependencies import get_search_engine
 from config.settings import WEB_CONFIG, IMAGE_CONFIG, METADATA_CATEGORIES
 
 logger = logging.getLogger(__name__)
@@ -22,7 +22,7 @@ UPLOAD_FOLDER = Path(__file__).parent / "static" / "uploads"
 UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = str(UPLOAD_FOLDER)
 
-search_engine = create_search_engine()
+search_engine = get_search_engine()
 
 from web.api_routes import api_bp  # noqa: E402
 app.register_blueprint(api_bp)